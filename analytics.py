@@ -0,0 +1,260 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import combinations
+from math import sqrt
+
+from names import name_key, parse_authors
+from records import PaperRecord
+from stats import year_key
+
+TOP_K = 10
+TREND_WINDOW = 5  # Years of a trend window, compared with the window before it
+MAX_COAUTHORS = 50  # Papers with more authors (e.g. consortia) count per author but add no co-author pairs
+MIN_CLUSTER_WEIGHT = 2  # Co-occurrences needed before two labels pull each other into a cluster
+MIN_CLUSTER_SIMILARITY = 0.1  # Cosine similarity needed as well, so prolific authors and common tags don't absorb everyone
+CLUSTER_ITERATIONS = 10
+
+
+class Cooccurrence:
+    """Sparse symmetric co-occurrence matrix between labels.
+
+    Stored as a Counter of (a, b) pairs with a < b, i.e. the upper triangle
+    of a dictionary-of-keys sparse matrix, so memory grows with the pairs
+    that actually occur together rather than with the square of the number
+    of labels. counts holds each label's total. The per-label rows used by
+    top() and clusters() are built on first use.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.pairs = Counter()
+        self._rows = None
+
+    def add(self, labels, pairs=True):
+        """Count one group of labels (e.g. a paper's authors) and, with pairs, every pair in it."""
+        labels = sorted(set(labels))
+        self.counts.update(labels)
+        if pairs and len(labels) > 1:
+            self.pairs.update(combinations(labels, 2))
+        self._rows = None
+
+    def rows(self):
+        """Return the matrix as a dict mapping each label to a Counter of the labels seen with it."""
+        if self._rows is None:
+            rows = defaultdict(Counter)
+            for (a, b), count in self.pairs.items():
+                rows[a][b] = count
+                rows[b][a] = count
+            self._rows = dict(rows)
+        return self._rows
+
+    def weight(self, a, b):
+        return self.pairs[(a, b) if a < b else (b, a)]
+
+    def top(self, label, k=TOP_K):
+        """Return the k labels seen most often with label as (label, count) pairs."""
+        row = self.rows().get(label)
+        return row.most_common(k) if row else []
+
+    def strongest(self, k=TOP_K):
+        """Return the k most frequent pairs as (a, b, count) triples."""
+        return [(a, b, count) for (a, b), count in self.pairs.most_common(k)]
+
+    def clusters(self, min_weight=MIN_CLUSTER_WEIGHT, min_similarity=MIN_CLUSTER_SIMILARITY,
+                 iterations=CLUSTER_ITERATIONS):
+        """Group labels by label propagation and return the clusters of two or more, largest first.
+
+        Two labels are linked if seen together at least min_weight times and
+        their cosine similarity (count / sqrt(count a * count b)) is at least
+        min_similarity. Each label repeatedly takes the cluster its links
+        weigh most towards, visiting frequent labels first and breaking ties
+        by the smallest cluster label, so the result is deterministic.
+        """
+        counts = self.counts
+        links = defaultdict(list)
+        for (a, b), count in self.pairs.items():
+            if count < min_weight:
+                continue
+            similarity = count / sqrt(counts[a] * counts[b])
+            if similarity >= min_similarity:
+                links[a].append((b, similarity))
+                links[b].append((a, similarity))
+        cluster = {label: label for label in links}
+        order = sorted(links, key=lambda label: (-counts[label], label))
+        for _ in range(iterations):
+            changed = False
+            for label in order:
+                weights = defaultdict(float)
+                for other, similarity in links[label]:
+                    weights[cluster[other]] += similarity
+                best = max(weights.values())
+                if weights.get(cluster[label]) == best:
+                    continue
+                cluster[label] = min(candidate for candidate, weight in weights.items() if weight == best)
+                changed = True
+            if not changed:
+                break
+
+        groups = defaultdict(list)
+        for label, group in cluster.items():
+            groups[group].append(label)
+        clusters = [sorted(members, key=lambda label: (-counts[label], label))
+                    for members in groups.values() if len(members) > 1]
+        clusters.sort(key=lambda members: (-len(members), members[0]))
+        return clusters
+
+
+class LibraryAnalytics:
+    """Co-authorship and tag/category co-occurrence of a set of papers.
+
+    Built in one pass over the papers, e.g. on a worker thread, and
+    read-only afterwards; the GUI builds a new one when the library has
+    changed instead of updating it. Authors are matched by name_key(), and
+    shown with the first spelling seen. Topics are ("tag", value) and
+    ("category", value) labels, so a tag and a category with the same name
+    stay apart. Clusters are computed on first use and kept.
+    """
+
+    def __init__(self, papers, max_coauthors=MAX_COAUTHORS):
+        self.total = 0
+        self.names = {}
+        self._keys = {}
+        self.coauthors = Cooccurrence()
+        self.topics = Cooccurrence()
+        self.year_totals = Counter()
+        self.tag_years = defaultdict(Counter)
+        self._clusters = {}
+        for paper in papers:
+            self._add(paper, max_coauthors)
+
+    def _add(self, paper, max_coauthors):
+        if isinstance(paper, PaperRecord):
+            # Stored values skip the conversions of dict-style access
+            authors, year = paper.raw("authors", ""), paper.raw("year", "")
+            categories, tags = paper.raw("categories", ()), paper.raw("tags", ())
+        else:
+            authors, year = paper.get("authors", ""), paper.get("year", "")
+            categories, tags = paper.get("categories", []), paper.get("tags", [])
+        self.total += 1
+
+        keys = []
+        for name in parse_authors(authors):
+            key = self._keys.get(name)
+            if key is None:
+                key = self._keys[name] = name_key(name)
+                self.names.setdefault(key, name)
+            if key:
+                keys.append(key)
+        self.coauthors.add(keys, pairs=len(keys) <= max_coauthors)
+
+        tags = {tag for tag in tags if tag}
+        self.topics.add([("category", category) for category in categories if category] +
+                        [("tag", tag) for tag in tags])
+        year = year_key(year)
+        if isinstance(year, int):
+            self.year_totals[year] += 1
+            for tag in tags:
+                self.tag_years[tag][year] += 1
+
+    def precompute(self):
+        """Build the clusters and co-author rows now, e.g. on the worker thread, so summary_text() stays quick."""
+        self.coauthors.rows()
+        self.topics.rows()
+        self.author_clusters()
+        self.topic_clusters()
+
+    def name(self, key):
+        return self.names.get(key, key)
+
+    def top_authors(self, k=TOP_K):
+        """Return (name, papers) pairs of the k most prolific authors."""
+        return [(self.name(key), count) for key, count in self.coauthors.counts.most_common(k)]
+
+    def top_collaborators(self, author, k=TOP_K):
+        """Return (name, shared papers) pairs of an author's k most frequent co-authors."""
+        return [(self.name(key), count) for key, count in self.coauthors.top(name_key(author), k)]
+
+    def strongest_collaborations(self, k=TOP_K):
+        return [(self.name(a), self.name(b), count) for a, b, count in self.coauthors.strongest(k)]
+
+    def related_topics(self, kind, value, k=TOP_K):
+        """Return ((kind, value), papers) pairs of the tags and categories most often found with a topic."""
+        return self.topics.top((kind, value), k)
+
+    def strongest_topic_pairs(self, k=TOP_K):
+        return self.topics.strongest(k)
+
+    def trending_tags(self, window=TREND_WINDOW, end=None, k=TOP_K):
+        """Return the tags whose share of papers grew most from one year window to the next.
+
+        The recent window is the window years up to end (default: the
+        latest numeric year) and is compared with the window before it.
+        Returns (tag, recent papers, earlier papers) triples, fastest
+        growing first, for tags whose share grew.
+        """
+        if not self.year_totals:
+            return []
+        end = max(self.year_totals) if end is None else end
+        recent = range(end - window + 1, end + 1)
+        earlier = range(end - 2 * window + 1, end - window + 1)
+        recent_total = sum(self.year_totals[year] for year in recent)
+        earlier_total = sum(self.year_totals[year] for year in earlier)
+        if not recent_total:
+            return []
+        scores = []
+        for tag, years in self.tag_years.items():
+            recent_count = sum(years[year] for year in recent if year in years)
+            if not recent_count:
+                continue
+            earlier_count = sum(years[year] for year in earlier if year in years)
+            growth = recent_count / recent_total - (earlier_count / earlier_total if earlier_total else 0)
+            if growth > 0:
+                scores.append((growth, tag, recent_count, earlier_count))
+        return [(tag, recent_count, earlier_count) for _, tag, recent_count, earlier_count in heapq.nlargest(k, scores)]
+
+    def author_clusters(self, min_weight=MIN_CLUSTER_WEIGHT):
+        """Return groups of author names that repeatedly publish together, largest first."""
+        key = ("authors", min_weight)
+        if key not in self._clusters:
+            self._clusters[key] = [[self.name(author) for author in cluster]
+                                   for cluster in self.coauthors.clusters(min_weight)]
+        return self._clusters[key]
+
+    def topic_clusters(self, min_weight=MIN_CLUSTER_WEIGHT):
+        """Return groups of (kind, value) topics that are often assigned together, largest first."""
+        key = ("topics", min_weight)
+        if key not in self._clusters:
+            self._clusters[key] = self.topics.clusters(min_weight)
+        return self._clusters[key]
+
+    def summary_text(self, window=TREND_WINDOW, author=None, k=TOP_K):
+        """Return the analytics part of the Statistics tab; author optionally lists that author's collaborators."""
+        if not self.total:
+            return ""
+        lines = []
+        if author:
+            collaborators = self.top_collaborators(author, k)
+            lines.append(f"Top Collaborators of {author}:")
+            lines += [f"{name}: {count}" for name, count in collaborators] or ["None found."]
+            lines.append("")
+
+        lines.append("Most Prolific Authors:")
+        lines += [f"{name}: {count}" for name, count in self.top_authors(k)]
+        lines.append("\nStrongest Collaborations:")
+        lines += [f"{a} & {b}: {count}" for a, b, count in self.strongest_collaborations(k)]
+
+        trending = self.trending_tags(window, k=k)
+        if trending:
+            end = max(self.year_totals)
+            lines.append(f"\nTrending Tags ({end - window + 1}-{end} vs {end - 2 * window + 1}-{end - window}):")
+            lines += [f"{tag}: {recent} papers (was {earlier})" for tag, recent, earlier in trending]
+
+        lines.append("\nTags and Categories Used Together:")
+        lines += [f"{a[1]} + {b[1]}: {count}" for a, b, count in self.strongest_topic_pairs(k)]
+        lines.append("\nTopic Clusters:")
+        lines += [", ".join(value for _, value in cluster[:k]) + (" ..." if len(cluster) > k else "")
+                  for cluster in self.topic_clusters()[:k]]
+        lines.append("\nAuthor Clusters:")
+        lines += [", ".join(cluster[:k]) + (" ..." if len(cluster) > k else "")
+                  for cluster in self.author_clusters()[:k]]
+        return "\n".join(lines)
@@ -0,0 +1,353 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from exporters import export_papers
+from history import History
+from instrumentation import percentile
+from journal import Journal, write_snapshot
+from ranking import RankedIndex
+from records import compact
+from stats import LibraryStats
+from store import PaperStore
+from text_index import TextIndex
+
+# Never imports tkinter: every benchmark drives the data layer the GUI uses, so no display is needed
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_REPEAT = 20
+DEFAULT_TOLERANCE = 0.25  # Allowed slowdown or memory growth before a result counts as a regression
+MIN_COMPARED_SECONDS = 0.005  # Timings below this are too noisy to flag
+MIN_FLAGGED_SAMPLES = 5  # Fewer timed runs than this never count as a regression
+PERCENTILES = [50, 90, 99]
+
+WORDS = (
+    "learning deep neural network graph model data analysis language retrieval search ranking attention "
+    "transformer survey study method approach efficient scalable robust adaptive optimization inference "
+    "bayesian causal reinforcement representation embedding clustering classification detection vision "
+    "speech text knowledge semantic memory distributed parallel federated privacy fairness evaluation "
+    "benchmark dataset training generalization transfer contrastive generative diffusion sparse"
+).split()
+NUM_TAGS = 400
+NUM_CATEGORIES = 40
+NUM_AUTHORS = 5000
+SUMMARY_WORDS = 120
+
+
+def zipf_weights(count, exponent=1.1):
+    """Cumulative weights under which a few values are very common and most are rare, as with real tags."""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def generate_papers(count, seed=0):
+    """Return count synthetic papers; the same seed always gives the same library."""
+    rng = random.Random(seed)
+    tags = [f"{rng.choice(WORDS)}-{i}" for i in range(NUM_TAGS)]
+    categories = [f"{rng.choice(WORDS).title()} {i}" for i in range(NUM_CATEGORIES)]
+    authors = [f"Author {i:04d}" for i in range(NUM_AUTHORS)]
+    tag_weights = zipf_weights(NUM_TAGS)
+    category_weights = zipf_weights(NUM_CATEGORIES)
+    author_weights = zipf_weights(NUM_AUTHORS, 0.8)
+    # Recent years are more common
+    years = list(range(1980, 2026))
+    year_weights = list(itertools.accumulate(1.08 ** (year - 1980) for year in years))
+
+    papers = []
+    for i in range(count):
+        papers.append({
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(4, 12))).capitalize(),
+            "authors": ", ".join(dict.fromkeys(rng.choices(authors, cum_weights=author_weights, k=rng.randint(1, 6)))),
+            "year": str(rng.choices(years, cum_weights=year_weights)[0]),
+            "doi": f"10.{rng.randint(1000, 9999)}/bench.{i}" if rng.random() < 0.7 else "",
+            "categories": list(dict.fromkeys(rng.choices(categories, cum_weights=category_weights, k=rng.randint(1, 2)))),
+            "tags": list(dict.fromkeys(rng.choices(tags, cum_weights=tag_weights, k=rng.randint(0, 5)))),
+            "summary": " ".join(rng.choices(WORDS, k=rng.randint(SUMMARY_WORDS // 2, SUMMARY_WORDS * 2))),
+            "notes": " ".join(rng.choices(WORDS, k=rng.randint(5, 40))) if rng.random() < 0.3 else "",
+        })
+    return papers
+
+
+class Context:
+    """A store filled with a synthetic library and the listeners the GUI attaches to it."""
+
+    def __init__(self, papers, seed, directory):
+        self.size = len(papers)
+        self.directory = directory
+        self.rng = random.Random(seed)
+        self.store = PaperStore()
+        self.text_index = TextIndex()
+        self.stats = LibraryStats()
+        self.store.load(papers)
+        self.text_index.attach(self.store)
+        self.stats.attach(self.store)
+        self.history = History(self.store)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+
+# Each benchmark gets a Context and returns a function that performs one timed operation
+
+def bench_filter(context):
+    """Text search plus category/tag filter, as filter_papers does on each keystroke."""
+    queries = []
+    for _ in range(50):
+        query = " ".join(word[:context.rng.randint(2, len(word))] for word in context.rng.sample(WORDS, 2))
+        category = context.rng.choice(context.stats.categories() + [""] * 5)
+        tag = context.rng.choice(context.stats.tags()[:20] + [""] * 10)
+        queries.append((query, category, tag))
+    queries = itertools.cycle(queries)
+
+    def run():
+        query, category, tag = next(queries)
+        hits = context.text_index.search(query)
+        context.store.filter(category=category, tag=tag, within=hits)
+    return run
+
+
+def bench_ranked_search(context):
+    index = RankedIndex()
+    index.attach(context.store)
+    index.search("warm up")
+    # Searches don't change the store, and other benchmarks shouldn't pay for keeping this index current
+    context.store.unsubscribe(index.on_change)
+    queries = itertools.cycle([" ".join(context.rng.sample(WORDS, 3)) + " year:2000..2020" for _ in range(50)])
+
+    def run():
+        index.search(next(queries))
+    return run
+
+
+def bench_statistics(context):
+    """Edit a paper and redraw the Statistics tab, as an attached LibraryStats does on every change."""
+    # A copy of the attached aggregates, so the edits below never touch the store the other benchmarks use
+    stats = LibraryStats()
+    for paper in context.store.papers():
+        stats.add(paper)
+    tags = stats.tags()[:20] or ["benchmark"]
+    edits = []
+    for paper_id in context.rng.sample(context.store.ids(), min(100, context.size)):
+        old = context.store.get(paper_id)
+        new = compact(dict(old, year=str(int(old["year"]) - 1), tags=old["tags"][1:] + [context.rng.choice(tags)]))
+        edits.append((paper_id, old, new))
+    edits = itertools.cycle(edits + [(paper_id, new, old) for paper_id, old, new in edits])
+
+    def run():
+        paper_id, old, new = next(edits)
+        stats.on_change("update", paper_id, old, new)
+        stats.summary_text()
+    return run
+
+
+def bench_auto_load(context):
+    """Load the autosave snapshot and journal into a fresh store, as auto_load does."""
+    snapshot_path = context.path("autosave.json")
+    write_snapshot(snapshot_path, context.store.items())
+    with open(snapshot_path + ".journal", "w") as f:
+        for paper_id in context.store.ids()[:max(1, context.size // 100)]:
+            record = {"op": "update", "id": paper_id, "paper": context.store.get(paper_id)}
+            f.write(json.dumps(record, default=dict) + "\n")
+
+    def run():
+        store = PaperStore()
+        journal = Journal(snapshot_path)
+        journal.load(store)
+        journal.close()
+    return run
+
+
+def bench_undo_redo(context):
+    """Undo and redo a bulk tag edit of 100 papers with the GUI's listeners attached."""
+    paper_ids = context.rng.sample(context.store.ids(), min(100, context.size))
+    with context.history.action("Add Tag"):
+        for paper_id in paper_ids:
+            paper = context.store.get(paper_id)
+            context.store.update_paper(paper_id, dict(paper, tags=paper["tags"] + ["benchmark"]))
+
+    def run():
+        context.history.undo()
+        context.history.redo()
+    return run
+
+
+def export_benchmark(file_format):
+    def setup(context):
+        file_path = context.path(f"export.{file_format}")
+
+        def run():
+            export_papers(context.store.papers(), file_path, file_format)
+        return run
+    setup.__doc__ = f"Export the whole library to {file_format}."
+    return setup
+
+
+BENCHMARKS = {
+    "filter": bench_filter,
+    "ranked_search": bench_ranked_search,
+    "statistics": bench_statistics,
+    "auto_load": bench_auto_load,
+    "undo_redo": bench_undo_redo,
+    "export_csv": export_benchmark("csv"),
+    "export_latex": export_benchmark("latex"),
+    "export_docx": export_benchmark("docx"),
+}
+
+
+def measure(run, repeat):
+    """Time run repeat times, then once more under tracemalloc for its peak allocation."""
+    run()  # Warm-up, e.g. lazily built indexes
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {f"p{percent}": percentile(timings, percent) for percent in PERCENTILES}
+    result.update({"min": timings[0], "max": timings[-1], "samples": repeat, "peak_kib": peak // 1024})
+    return result
+
+
+def library_memory(papers):
+    """KiB held by a store after loading papers from JSON, as from a saved library."""
+    data = json.dumps(papers)
+    tracemalloc.start()
+    try:
+        store = PaperStore()
+        store.load(json.loads(data))
+        held = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return held // 1024
+
+
+def run_benchmarks(sizes, names, repeat=DEFAULT_REPEAT, seed=0, report=print):
+    results = {}
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix="bench-")
+        try:
+            report(f"Generating {size} papers...")
+            papers = generate_papers(size, seed)
+            size_results = {"library": {"held_kib": library_memory(papers)}}
+            report(f"{size:>9} {'library':<14} held {size_results['library']['held_kib']} KiB")
+            context = Context(papers, seed, directory)
+            del papers
+            for name in names:
+                size_results[name] = measure(BENCHMARKS[name](context), repeat)
+                report(format_result(size, name, size_results[name]))
+            results[str(size)] = size_results
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def format_result(size, name, result):
+    timings = "  ".join(f"p{percent} {result[f'p{percent}'] * 1000:9.2f} ms" for percent in PERCENTILES)
+    return f"{size:>9} {name:<14} {timings}  peak {result['peak_kib']:>9} KiB"
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return (message, regressed) pairs comparing two runs' p50 latency and peak memory.
+
+    A slower p50 only counts when the fastest run slowed down too, both runs
+    took long enough to time reliably and had enough samples; otherwise a
+    busy machine flags benchmarks that did not change.
+    """
+    lines = []
+    for size, size_results in current["results"].items():
+        for name, result in size_results.items():
+            old = baseline.get("results", {}).get(size, {}).get(name)
+            if old is None:
+                continue
+            for metric in ("p50", "peak_kib", "held_kib"):
+                if metric not in result or metric not in old or not old[metric]:
+                    continue
+                ratio = result[metric] / old[metric]
+                regressed = ratio > 1 + tolerance
+                if metric == "p50" and regressed:
+                    regressed = not _noisy(result, old) and _slower(result, old, "min", tolerance)
+                lines.append((f"{size:>9} {name:<14} {metric:<8} {old[metric]:>12.5g} -> {result[metric]:<12.5g}"
+                              f" {ratio:6.2f}x{'  REGRESSION' if regressed else ''}", regressed))
+    return lines
+
+
+def _noisy(result, old):
+    if max(result["p50"], old["p50"]) < MIN_COMPARED_SECONDS:
+        return True
+    return min(result.get("samples", 0), old.get("samples", 0)) < MIN_FLAGGED_SAMPLES
+
+
+def _slower(result, old, metric, tolerance):
+    # Results saved before the metric existed can't confirm the slowdown, so they don't veto it
+    if not old.get(metric) or metric not in result:
+        return True
+    return result[metric] / old[metric] > 1 + tolerance
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench.py", description="Benchmark the paper store headlessly.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="library sizes to generate (default: %(default)s)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic libraries")
+    parser.add_argument("--save", metavar="PATH", help="write the results to a JSON file, e.g. as a new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown or memory growth counted as a regression (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        current = run_benchmarks(args.sizes, args.only or list(BENCHMARKS), max(1, args.repeat), args.seed)
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump(current, f, indent=2)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if baseline is None:
+        return 0
+    if baseline.get("seed") != current["seed"]:
+        print("Warning: the baseline was generated with a different seed", file=sys.stderr)
+    lines = compare(current, baseline, args.tolerance)
+    print()
+    for line, _ in lines:
+        print(line)
+    regressions = sum(regressed for _, regressed in lines)
+    print(f"\n{regressions} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
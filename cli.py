@@ -0,0 +1,323 @@
+import argparse
+import os
+import sys
+
+# Never imports tkinter; commands import what they need lazily so simple queries start fast
+LIBRARY_DB = "library.db"
+AUTOSAVE = "autosave.json"
+
+
+def default_library():
+    return LIBRARY_DB if os.path.exists(LIBRARY_DB) else AUTOSAVE
+
+
+def is_database(path):
+    return path.endswith(".db")
+
+
+class Library:
+    """A library file opened for reading, or for writing with changes persisted as in the GUI."""
+
+    def __init__(self, path, writable=False):
+        from store import PaperStore
+
+        self.path = path
+        self.store = PaperStore()
+        self._persistence = None
+        if is_database(path):
+            from sqlite_backend import SQLiteBackend
+            self._persistence = SQLiteBackend(path)
+            self._persistence.attach(self.store)
+        elif writable:
+            from journal import Journal
+            self._persistence = Journal(path)
+            self._persistence.load(self.store)
+        else:
+            from journal import read_library
+            items = read_library(path)
+            self.store.load([paper for _, paper in items], [paper_id for paper_id, _ in items])
+
+    def close(self):
+        if self._persistence is not None:
+            self._persistence.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def matching_ids(store, args):
+    """Return the IDs of the papers matching the query and filter arguments."""
+    hits = None
+    if args.query:
+        from text_index import TextIndex
+        text_index = TextIndex()
+        text_index.attach(store)
+        hits = text_index.search(args.query)
+    return store.filter(year=args.year, category=args.category, tag=args.tag, within=hits)
+
+
+def search_database(args):
+    # Push the query down into SQL instead of loading the whole library
+    from sqlite_backend import SQLiteBackend
+    backend = SQLiteBackend(args.library)
+    try:
+        return backend.filter(args.query, args.year, args.category, args.tag, limit=args.limit)
+    finally:
+        backend.close()
+
+
+def ranked_ids(store, args):
+    """Return the IDs matching a ranked query, best first; --year, --category and --tag still apply."""
+    from ranking import RankedIndex
+    ranked_index = RankedIndex()
+    ranked_index.attach(store)
+    if not (args.year or args.category or args.tag):
+        return ranked_index.search(args.query, limit=args.limit)
+    allowed = set(store.filter(year=args.year, category=args.category, tag=args.tag))
+    return [paper_id for paper_id in ranked_index.search(args.query, limit=None) if paper_id in allowed]
+
+
+def cmd_search(args):
+    if is_database(args.library) and not args.ranked:
+        results = search_database(args)
+    else:
+        with Library(args.library) as library:
+            paper_ids = (ranked_ids if args.ranked else matching_ids)(library.store, args)
+            if args.limit is not None:
+                paper_ids = paper_ids[:args.limit]
+            results = [(paper_id, library.store.get(paper_id)) for paper_id in paper_ids]
+
+    if args.json:
+        import json
+        for paper_id, paper in results:
+            print(json.dumps(dict(paper, id=paper_id)))
+    else:
+        for paper_id, paper in results:
+            print(f"{paper_id}\t{paper['year']}\t{paper['title']}\t{paper['authors']}")
+    return 0
+
+
+def cmd_stats(args):
+    from stats import LibraryStats
+
+    with Library(args.library) as library:
+        stats = LibraryStats()
+        stats.attach(library.store)
+        print(stats.summary_text())
+    return 0
+
+
+def cmd_analytics(args):
+    from analytics import LibraryAnalytics
+
+    with Library(args.library) as library:
+        analytics = LibraryAnalytics(library.store.papers())
+    print(analytics.summary_text(args.window, args.author, args.limit))
+    return 0
+
+
+def cmd_export(args):
+    from exporters import export_papers
+
+    file_format = args.format or {".tex": "latex", ".docx": "docx"}.get(os.path.splitext(args.file)[1].lower(), "csv")
+    with Library(args.library) as library:
+        paper_ids = matching_ids(library.store, args)
+        written = export_papers((library.store.get(paper_id) for paper_id in paper_ids), args.file, file_format,
+                                total=len(paper_ids))
+    print(f"Exported {written} papers to {args.file}")
+    return 0
+
+
+def cmd_import(args):
+    from importers import import_file
+
+    with Library(args.library, writable=True) as library:
+        imported, errors = import_file(args.file, library.store)
+    print(f"Imported {imported} papers ({errors} skipped)")
+    return 0
+
+
+def cmd_dedupe(args):
+    from dedupe import DuplicateIndex, merge_papers
+
+    with Library(args.library, writable=args.apply) as library:
+        store = library.store
+        duplicates = DuplicateIndex()
+        duplicates.attach(store)
+        groups = duplicates.find_groups()
+        for paper_ids in groups:
+            print(", ".join(str(paper_id) for paper_id in paper_ids) + f"\t{store.get(paper_ids[0])['title']}")
+        if args.apply:
+            # Keep the oldest entry of each group, filled in from the others
+            with store.batch():
+                for paper_ids in groups:
+                    store.update_paper(paper_ids[0], merge_papers([store.get(paper_id) for paper_id in paper_ids]))
+                    for paper_id in paper_ids[1:]:
+                        store.delete_paper(paper_id)
+            print(f"Merged {sum(len(paper_ids) - 1 for paper_ids in groups)} duplicates")
+        else:
+            print(f"{len(groups)} duplicate groups found")
+    return 0
+
+
+def cmd_related(args):
+    from related import RelatedIndex, index_path
+
+    with Library(args.library) as library:
+        if args.id not in library.store:
+            raise ValueError(f"No paper with ID {args.id}")
+        related = RelatedIndex(index_path(args.library))
+        related.attach(library.store)
+        for paper_id, similarity in related.related(args.id, args.limit):
+            paper = library.store.get(paper_id)
+            print(f"{paper_id}\t{similarity:.2f}\t{paper['year']}\t{paper['title']}")
+        related.save()
+    return 0
+
+
+def cmd_serve(args):
+    import asyncio
+    from server import serve
+
+    with Library(args.library, writable=True) as library:
+        started = lambda server: print(f"Serving {len(library.store)} papers on http://{args.host}:{args.port}/", flush=True)
+        try:
+            asyncio.run(serve(library.store, args.host, args.port, started))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def cmd_enrich(args):
+    from doi_resolver import DOIResolver, apply_metadata
+
+    with Library(args.library, writable=True) as library:
+        store = library.store
+        targets = {paper_id: paper["doi"] for paper_id, paper in store.items() if paper.get("doi", "").strip()}
+        resolver = DOIResolver(args.endpoint, args.cache, concurrency=args.concurrency)
+        results, errors = resolver.resolve_many(targets.values())
+        updated = apply_metadata(store, targets, results, overwrite=args.overwrite)
+    for doi, reason in errors.items():
+        print(f"{doi}\t{reason}", file=sys.stderr)
+    print(f"Updated {updated} of {len(targets)} papers with a DOI ({len(errors)} lookups failed)")
+    return 0
+
+
+def cmd_sync(args):
+    import json
+    from sync import apply_changes, changes, count_changes, index_library, is_json_list, merge, read_items
+
+    # A saved JSON list has no journal, so it is rewritten instead of updated record by record
+    rewrite_other = args.both and not args.dry_run and is_json_list(args.other)
+    with Library(args.library, writable=not args.dry_run) as library, \
+            Library(args.other, writable=args.both and not args.dry_run and not rewrite_other) as other:
+        ours = index_library(library.store.items())
+        theirs = index_library(other.store.items())
+        base = index_library(read_items(args.base)) if args.base else None
+        merged, conflicts = merge(ours, theirs, base, args.prefer)
+        our_changes = changes(ours, merged)
+        their_changes = changes(theirs, merged) if args.both else []
+        if not args.dry_run:
+            apply_changes(library.store, our_changes)
+            apply_changes(other.store, their_changes)
+            if rewrite_other and their_changes:
+                with open(args.other, "w") as f:
+                    json.dump(other.store.papers(), f, indent=2, default=dict)
+
+    for key, reason, fields in conflicts:
+        print(f"conflict\t{key}\t{reason}" + (f" ({', '.join(fields)})" if fields else ""))
+    verb = "would change" if args.dry_run else "changed"
+    for path, paper_changes in [(args.library, our_changes)] + ([(args.other, their_changes)] if args.both else []):
+        counts = count_changes(paper_changes)
+        print(f"{path} {verb}: {counts['add']} added, {counts['update']} updated, {counts['delete']} deleted")
+    print(f"{len(conflicts)} conflicts, resolved to {args.prefer}")
+    return 0
+
+
+def add_filter_arguments(parser):
+    parser.add_argument("query", nargs="?", default="", help="words to search for in titles, authors, summaries and notes")
+    parser.add_argument("--year")
+    parser.add_argument("--category")
+    parser.add_argument("--tag")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="littapp", description="Work with a LiTTApp library from the command line.")
+    parser.add_argument("--library", default=None,
+                        help=f"library file: a .db database or a JSON autosave (default: {LIBRARY_DB} if present, else {AUTOSAVE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="list papers matching a query and filters")
+    add_filter_arguments(search)
+    search.add_argument("--limit", type=int)
+    search.add_argument("--ranked", action="store_true",
+                        help="order by relevance; the query may use year:2019..2023, tag:, category:, doi:, title: etc.")
+    search.add_argument("--json", action="store_true", help="print one JSON object per paper")
+    search.set_defaults(handler=cmd_search)
+
+    stats = commands.add_parser("stats", help="print year, category and tag statistics")
+    stats.set_defaults(handler=cmd_stats)
+
+    analytics = commands.add_parser("analytics", help="print top authors and collaborators, trending tags and clusters")
+    analytics.add_argument("--author", help="also list this author's most frequent co-authors")
+    analytics.add_argument("--window", type=int, default=5, help="years per trend window (default: %(default)s)")
+    analytics.add_argument("--limit", type=int, default=10, help="entries per list (default: %(default)s)")
+    analytics.set_defaults(handler=cmd_analytics)
+
+    export = commands.add_parser("export", help="export matching papers to CSV, LaTeX or Word")
+    export.add_argument("file")
+    add_filter_arguments(export)
+    export.add_argument("--format", choices=["csv", "latex", "docx"], help="defaults to the file extension")
+    export.set_defaults(handler=cmd_export)
+
+    import_ = commands.add_parser("import", help="import a CSV, BibTeX or RIS file into the library")
+    import_.add_argument("file")
+    import_.set_defaults(handler=cmd_import)
+
+    dedupe = commands.add_parser("dedupe", help="find papers with the same DOI or a near-identical title and year")
+    dedupe.add_argument("--apply", action="store_true", help="merge each group into its oldest entry")
+    dedupe.set_defaults(handler=cmd_dedupe)
+
+    related = commands.add_parser("related", help="list the papers most similar to a paper")
+    related.add_argument("id", type=int)
+    related.add_argument("--limit", type=int, default=10)
+    related.set_defaults(handler=cmd_related)
+
+    enrich = commands.add_parser("enrich", help="fill in paper metadata looked up by DOI")
+    enrich.add_argument("--overwrite", action="store_true", help="replace fields that are already filled in")
+    enrich.add_argument("--endpoint", help="metadata URL the DOI is appended to (default: Crossref, or $LITT_DOI_ENDPOINT)")
+    enrich.add_argument("--cache", default="doi_cache.db", help="lookup cache file (default: %(default)s)")
+    enrich.add_argument("--concurrency", type=int, default=8, help="requests in flight at once (default: %(default)s)")
+    enrich.set_defaults(handler=cmd_enrich)
+
+    sync = commands.add_parser("sync", help="merge another library into this one, optionally in both directions")
+    sync.add_argument("other", help="the other library: a .db database, an autosave or a saved JSON list")
+    sync.add_argument("--base", help="the library both started from, e.g. a backup, for a three-way merge")
+    sync.add_argument("--both", action="store_true", help="also write the merged papers back to the other library")
+    sync.add_argument("--prefer", choices=["ours", "theirs"], default="ours", help="how conflicts are resolved")
+    sync.add_argument("--dry-run", action="store_true", help="only report what would change")
+    sync.set_defaults(handler=cmd_sync)
+
+    serve = commands.add_parser("serve", help="answer search, stats and edit requests over HTTP/JSON")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on (default: localhost only)")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.set_defaults(handler=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.library is None:
+        args.library = default_library()
+    try:
+        return args.handler(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
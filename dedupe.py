@@ -0,0 +1,249 @@
+import math
+import random
+from collections import Counter
+
+from text_index import tokenize
+
+NUM_BANDS = 8
+ROWS_PER_BAND = 4
+SIMILARITY_THRESHOLD = 0.8
+
+# One 64-bit mask per MinHash function; XOR with a random mask permutes the token hashes
+_MASKS = [random.Random(20240901 + i).getrandbits(64) for i in range(NUM_BANDS * ROWS_PER_BAND)]
+
+
+def title_tokens(title):
+    return frozenset(tokenize(title))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def band_keys(tokens):
+    """Return the LSH bucket keys of a token set; similar sets are likely to share one."""
+    if not tokens:
+        return []
+    # hash() is salted per process, which is fine as signatures are never persisted
+    hashes = [hash(token) for token in tokens]
+    signature = [min(map(mask.__xor__, hashes)) for mask in _MASKS]
+    return [
+        (band,) + tuple(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+        for band in range(NUM_BANDS)
+    ]
+
+
+def merge_papers(papers):
+    """Merge duplicate papers into one, keeping the first paper's values where set.
+
+    Empty fields are filled from the others, categories and tags are
+    combined, and differing notes are appended rather than lost.
+    """
+    merged = dict(papers[0])
+    for paper in papers[1:]:
+        for field in ("title", "authors", "year", "doi", "summary"):
+            if not str(merged.get(field, "")).strip():
+                merged[field] = paper.get(field, "")
+        for field in ("categories", "tags"):
+            values = list(merged.get(field, []))
+            values += [value for value in paper.get(field, []) if value not in values]
+            merged[field] = values
+        notes = paper.get("notes", "").strip()
+        if notes and notes not in merged.get("notes", ""):
+            merged["notes"] = f"{merged['notes']}\n\n{notes}" if merged.get("notes") else notes
+    return merged
+
+
+def similar_titles(titles, threshold=SIMILARITY_THRESHOLD):
+    """Yield the pairs of distinct token sets in titles whose Jaccard similarity reaches threshold.
+
+    Uses prefix filtering: with each set's tokens ordered rarest first, two
+    such sets share one of the first len - ceil(threshold * len) + 1 tokens
+    of each, so only sets sharing one of those are compared.
+    """
+    frequency = Counter(token for tokens in titles for token in tokens)
+    by_prefix = {}
+    for tokens in titles:
+        ordered = sorted(tokens, key=lambda token: (frequency[token], token))
+        prefix = ordered[:len(ordered) - math.ceil(threshold * len(ordered) - 1e-9) + 1]
+        candidates = set()
+        for token in prefix:
+            candidates.update(by_prefix.get(token, ()))
+        for other in candidates:
+            if jaccard(tokens, other) >= threshold:
+                yield tokens, other
+        for token in prefix:
+            by_prefix.setdefault(token, []).append(tokens)
+
+
+def group_duplicates(doi_groups, buckets, papers, threshold=SIMILARITY_THRESHOLD):
+    """Return the sorted groups of duplicates among candidate sets, ordered by their oldest paper.
+
+    doi_groups lists IDs sharing a DOI, buckets sets of IDs with similar
+    titles and papers maps each ID to its (year, DOI, title tokens). Bucket
+    members are split by year first, papers with equal titles are joined
+    without comparing them and only one of each title is compared with the
+    others (see similar_titles()), so a library full of "Editorial"s is
+    not compared pairwise. Papers with two DOIs only ever match through
+    their DOI group.
+    """
+    parent = {}
+
+    def find(paper_id):
+        root = paper_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while paper_id != root:
+            parent[paper_id], paper_id = root, parent[paper_id]
+        return root
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    for ids in doi_groups:
+        for paper_id in ids[1:]:
+            union(ids[0], paper_id)
+
+    for ids in buckets:
+        by_year = {}
+        for paper_id in ids:
+            year, doi, tokens = papers[paper_id]
+            # Title -> IDs, for papers without and with a DOI
+            by_year.setdefault(year, ({}, {}))[bool(doi)].setdefault(tokens, []).append(paper_id)
+        for plain, with_doi in by_year.values():
+            for tokens, titled in plain.items():
+                for paper_id in titled[1:] + with_doi.get(tokens, []):
+                    union(titled[0], paper_id)
+            titles = list(plain) + [tokens for tokens in with_doi if tokens not in plain]
+            for tokens_a, tokens_b in similar_titles(titles, threshold):
+                if tokens_a not in plain:
+                    tokens_a, tokens_b = tokens_b, tokens_a
+                if tokens_a not in plain:
+                    continue
+                for paper_id in [plain[tokens_b][0]] if tokens_b in plain else with_doi[tokens_b]:
+                    union(plain[tokens_a][0], paper_id)
+
+    groups = {}
+    for paper_id in set(parent) | set(parent.values()):
+        groups.setdefault(find(paper_id), []).append(paper_id)
+    return sorted(sorted(ids) for ids in groups.values())
+
+
+class DuplicateIndex:
+    """Find likely duplicate papers in a PaperStore in roughly linear time.
+
+    Papers sharing a DOI are duplicates. Otherwise candidates come from
+    MinHash-LSH buckets over the title words, so only papers with similar
+    titles are ever compared, and are confirmed when the years match and
+    the title Jaccard similarity reaches the threshold. Papers with two
+    different DOIs are never treated as duplicates.
+
+    The buckets are built on first use and then kept up to date from store
+    changes, so libraries that never look for duplicates pay nothing.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.store = None
+        self._built = False
+        self._buckets = {}
+        self._tokens = {}
+        self._keys = {}
+
+    def attach(self, store):
+        self.store = store
+        self._reset()
+        store.subscribe(self.on_change)
+
+    def on_change(self, event, paper_id, old, new):
+        if not self._built or event in ("begin", "commit"):
+            return
+        if event == "clear":
+            self._reset()
+            return
+        if old is not None:
+            self._remove(paper_id)
+        if new is not None:
+            self._add(paper_id, new)
+
+    def duplicates_of(self, paper, exclude=None):
+        """Return the sorted IDs of stored papers that look like duplicates of paper.
+
+        paper need not be in the store, so this can be checked before adding it.
+        """
+        self._ensure_built()
+        tokens = title_tokens(paper["title"])
+        candidates = self.store.ids_for_doi(paper.get("doi", ""))
+        for key in band_keys(tokens):
+            candidates |= self._buckets.get(key, set())
+        candidates.discard(exclude)
+        return sorted(
+            paper_id for paper_id in candidates
+            if self.is_duplicate(paper, tokens, self.store.get(paper_id), self._tokens[paper_id])
+        )
+
+    def find_groups(self):
+        """Return groups of duplicate paper IDs, each sorted, ordered by their oldest paper."""
+        return group_duplicates(*self.candidates(), threshold=self.threshold)
+
+    def candidates(self):
+        """Return the arguments of group_duplicates() for the stored papers.
+
+        They are copies, so the grouping itself can run on a worker thread
+        while the store keeps changing.
+        """
+        self._ensure_built()
+        papers = {}
+        by_doi = {}
+        for paper_id, paper in self.store.items():
+            doi = paper.raw("doi", "").strip().lower()
+            if doi:
+                by_doi.setdefault(doi, []).append(paper_id)
+            papers[paper_id] = (str(paper.raw("year", "")).strip(), doi, self._tokens[paper_id])
+        doi_groups = [ids for ids in by_doi.values() if len(ids) > 1]
+        # Papers with the same title share all of their buckets; each distinct set is compared once
+        buckets = {frozenset(ids) for ids in self._buckets.values() if len(ids) > 1}
+        return doi_groups, buckets, papers
+
+    def is_duplicate(self, a, tokens_a, b, tokens_b):
+        doi_a = a.get("doi", "").strip().lower()
+        doi_b = b.get("doi", "").strip().lower()
+        if doi_a and doi_b:
+            return doi_a == doi_b
+        return (str(a["year"]).strip() == str(b["year"]).strip()
+                and jaccard(tokens_a, tokens_b) >= self.threshold)
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        for paper_id, paper in self.store.items():
+            self._add(paper_id, paper)
+        self._built = True
+
+    def _reset(self):
+        self._built = False
+        self._buckets = {}
+        self._tokens = {}
+        self._keys = {}
+
+    def _add(self, paper_id, paper):
+        tokens = title_tokens(paper["title"])
+        keys = band_keys(tokens)
+        self._tokens[paper_id] = tokens
+        self._keys[paper_id] = keys
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(paper_id)
+
+    def _remove(self, paper_id):
+        self._tokens.pop(paper_id, None)
+        for key in self._keys.pop(paper_id, []):
+            ids = self._buckets.get(key)
+            if ids is None:
+                continue
+            ids.discard(paper_id)
+            if not ids:
+                del self._buckets[key]
@@ -0,0 +1,359 @@
+import asyncio
+import html
+import json
+import os
+import random
+import re
+import sqlite3
+import ssl
+import time
+from urllib.parse import quote, urljoin, urlsplit
+
+ENDPOINT_ENV_VAR = "LITT_DOI_ENDPOINT"  # Overrides the default endpoint, e.g. with a local stub server
+DEFAULT_ENDPOINT = "https://api.crossref.org/works/"  # The DOI is appended to it
+CACHE_PATH = "doi_cache.db"
+CACHE_TTL = 30 * 24 * 3600  # Seconds a lookup is reused without asking the endpoint again
+NOT_FOUND_TTL = 24 * 3600  # The same for DOIs the endpoint didn't know
+CACHE_MAX_ENTRIES = 50000  # Least recently used lookups beyond this are evicted
+CONCURRENCY = 8  # Requests in flight at once
+RETRIES = 3  # Further attempts after a timeout, connection error, 429 or 5xx response
+BACKOFF = 0.5  # Seconds before the first retry, doubled for each further one
+MAX_RETRY_AFTER = 60  # Longest Retry-After a server can ask for, in seconds
+TIMEOUT = 10  # Seconds per request
+MAX_REDIRECTS = 5
+MAX_RESPONSE_SIZE = 4 * 1024 * 1024
+USER_AGENT = "LiTTApp/1.0"
+
+DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:")
+REDIRECTS = (301, 302, 303, 307, 308)
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_ssl_context = None
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    doi TEXT PRIMARY KEY,
+    fields TEXT,
+    fetched REAL NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lookups_used ON lookups (used);
+"""
+
+
+class ResolverError(Exception):
+    def __init__(self, message, retryable=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def normalize_doi(doi):
+    """Return a DOI without a doi.org URL or doi: prefix, lowercased as DOIs are case-insensitive."""
+    doi = doi.strip().lower()
+    if doi.startswith(("http", "doi:")):
+        for prefix in DOI_PREFIXES:
+            if doi.startswith(prefix):
+                return doi[len(prefix):].strip()
+    return doi
+
+
+def _clean(text):
+    return _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", str(text)))).strip()
+
+
+def parse_work(data):
+    """Return the paper fields of a Crossref work or CSL-JSON record; unknown fields are left out."""
+    work = data.get("message", data) if isinstance(data, dict) else None
+    if not isinstance(work, dict):
+        raise ValueError("Unexpected metadata format")
+    fields = {}
+    title = work.get("title")
+    if isinstance(title, list):
+        title = title[0] if title else ""
+    if title:
+        fields["title"] = _clean(title)
+
+    names = []
+    for author in work.get("author") or []:
+        name = author.get("name") or " ".join(part for part in (author.get("given"), author.get("family")) if part)
+        if name:
+            names.append(_clean(name))
+    if names:
+        fields["authors"] = ", ".join(names)
+
+    for key in ("issued", "published-print", "published-online", "created"):
+        date_parts = (work.get(key) or {}).get("date-parts") or [[]]
+        if date_parts[0] and date_parts[0][0]:
+            fields["year"] = str(date_parts[0][0])
+            break
+
+    if work.get("DOI"):
+        fields["doi"] = str(work["DOI"])
+    subjects = [_clean(subject) for subject in work.get("subject") or []]
+    if subjects:
+        fields["categories"] = subjects
+    if work.get("abstract"):
+        fields["summary"] = _clean(work["abstract"])
+    return fields
+
+
+def fill_paper(paper, fields, overwrite=False):
+    """Return paper with its empty fields (or all, with overwrite) taken from fields, or None if nothing changes."""
+    current = dict(paper)
+    updated = dict(current)
+    for name, value in fields.items():
+        # The paper's own DOI spelling is kept
+        if name != "doi" and value and (overwrite or not updated.get(name)):
+            updated[name] = value
+    return None if updated == current else updated
+
+
+def apply_metadata(store, targets, results, overwrite=False):
+    """Update the papers of targets, a dict of paper ID to DOI, from resolved fields; returns how many changed."""
+    updated = 0
+    with store.batch():
+        for paper_id, doi in targets.items():
+            fields = results.get(normalize_doi(doi))
+            # Papers may have been deleted while their DOIs were looked up
+            if not fields or paper_id not in store:
+                continue
+            paper = fill_paper(store.get(paper_id), fields, overwrite)
+            if paper is not None:
+                store.update_paper(paper_id, paper)
+                updated += 1
+    return updated
+
+
+class MetadataCache:
+    """DOI lookups kept in SQLite, reused until their TTL runs out.
+
+    Expired entries stay until evicted, least recently used first, once
+    there are more than max_entries, so they can still answer while the
+    endpoint can't be reached. A DOI the endpoint didn't know is stored
+    with fields NULL and a shorter TTL.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, not_found_ttl=NOT_FOUND_TTL):
+        self.ttl = ttl
+        self.not_found_ttl = not_found_ttl
+        self.max_entries = max_entries
+        # Autocommit, as in sqlite_backend: each write is its own short transaction, so the
+        # write lock is never held across a network fetch while another resolver waits on it
+        self.connection = sqlite3.connect(path, timeout=10, isolation_level=None)
+        self.connection.executescript(CACHE_SCHEMA)
+
+    def lookup(self, doi):
+        """Return (fields, fresh) for a cached DOI, fields being None if it wasn't found, or None if not cached."""
+        row = self.connection.execute("SELECT fields, fetched FROM lookups WHERE doi = ?", (doi,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        self.connection.execute("UPDATE lookups SET used = ? WHERE doi = ?", (now, doi))
+        fields = None if row[0] is None else json.loads(row[0])
+        return fields, now - row[1] < (self.ttl if fields is not None else self.not_found_ttl)
+
+    def store(self, doi, fields):
+        now = time.time()
+        self.connection.execute("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?)",
+                                (doi, None if fields is None else json.dumps(fields), now, now))
+
+    def evict(self):
+        self.connection.execute(
+            "DELETE FROM lookups WHERE doi IN (SELECT doi FROM lookups ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,))
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+
+    def close(self):
+        self.evict()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _ssl():
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+async def _read_all(reader):
+    chunks = []
+    size = 0
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            return b"".join(chunks)
+        size += len(chunk)
+        if size > MAX_RESPONSE_SIZE:
+            raise ResolverError("Response too large", retryable=False)
+        chunks.append(chunk)
+
+
+async def http_get(url, timeout=TIMEOUT):
+    """GET url and return (status, headers, body).
+
+    Speaks HTTP/1.0 so the server closes the connection after a plain,
+    unchunked body.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ResolverError(f"Unsupported URL: {url}", retryable=False)
+    secure = parts.scheme == "https"
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, parts.port or (443 if secure else 80), ssl=_ssl() if secure else None),
+        timeout)
+    try:
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        writer.write(
+            f"GET {target} HTTP/1.0\r\n"
+            f"Host: {parts.netloc}\r\n"
+            f"Accept: application/json, application/vnd.citationstyles.csl+json\r\n"
+            f"User-Agent: {USER_AGENT}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(_read_all(reader), timeout)
+    finally:
+        writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        raise ResolverError(f"Malformed response from {parts.netloc}")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, body
+
+
+class DOIResolver:
+    """Look up paper metadata by DOI, concurrently and through a persistent cache.
+
+    Lookups run on an asyncio event loop with at most `concurrency`
+    requests in flight. Timeouts, connection errors, 429 and 5xx responses
+    are retried with exponential backoff and jitter (or after the server's
+    Retry-After). Every answer, including "not found", is cached in
+    SQLite; cached lookups skip the network until their TTL runs out, and
+    expired ones are still used when the endpoint can't be reached, so
+    libraries already looked up work offline.
+
+    The endpoint defaults to the Crossref REST API, or the LITT_DOI_ENDPOINT
+    environment variable if set. The DOI is appended to it, and Crossref
+    works as well as CSL-JSON records are understood.
+    """
+
+    def __init__(self, endpoint=None, cache_path=CACHE_PATH, concurrency=CONCURRENCY, retries=RETRIES,
+                 backoff=BACKOFF, timeout=TIMEOUT, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.endpoint = endpoint or os.environ.get(ENDPOINT_ENV_VAR) or DEFAULT_ENDPOINT
+        self.cache_path = cache_path
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def resolve(self, doi):
+        """Return the paper fields of a DOI, or None if the endpoint doesn't know it."""
+        results, errors = self.resolve_many([doi])
+        if errors:
+            raise ResolverError(next(iter(errors.values())), retryable=False)
+        return results.get(normalize_doi(doi))
+
+    def resolve_many(self, dois, progress=None, cancel=None):
+        """Look up DOIs and return (results, errors), both keyed by normalized DOI.
+
+        results maps each DOI looked up to its fields, or None if the endpoint
+        doesn't know it; errors maps the DOIs that failed to the reason.
+        progress(done, total) is called as lookups finish. Once the
+        threading.Event cancel is set, the remaining DOIs are skipped.
+        """
+        return asyncio.run(self._resolve_all(dois, progress, cancel))
+
+    async def _resolve_all(self, dois, progress, cancel):
+        dois = list(dict.fromkeys(normalize_doi(doi) for doi in dois if doi.strip()))
+        pending = iter(dois)
+        results = {}
+        errors = {}
+        done = 0
+
+        async def worker(cache):
+            nonlocal done
+            # Workers share one iterator, so at most `concurrency` lookups are in flight
+            for doi in pending:
+                if cancel is not None and cancel.is_set():
+                    return
+                try:
+                    results[doi] = await self._lookup(doi, cache)
+                except ResolverError as e:
+                    errors[doi] = str(e)
+                done += 1
+                if progress is not None:
+                    progress(done, len(dois))
+
+        with MetadataCache(self.cache_path, self.ttl, self.max_entries) as cache:
+            await asyncio.gather(*(worker(cache) for _ in range(self.concurrency)))
+        return results, errors
+
+    async def _lookup(self, doi, cache):
+        cached = cache.lookup(doi)
+        if cached is not None and cached[1]:
+            return cached[0]
+        try:
+            fields = await self._fetch(doi)
+        except ResolverError:
+            if cached is None:
+                raise
+            # Offline or failing: an expired lookup is better than none
+            return cached[0]
+        cache.store(doi, fields)
+        return fields
+
+    async def _fetch(self, doi):
+        """Return the fields of a DOI from the endpoint, retrying transient failures."""
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._request(doi)
+            except ResolverError as e:
+                if not e.retryable or attempt == self.retries:
+                    raise
+                wait = min(e.retry_after, MAX_RETRY_AFTER) if e.retry_after is not None else delay
+            except (OSError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise ResolverError(str(e) or type(e).__name__)
+                wait = delay
+            # Jitter keeps concurrent retries from hitting the server together
+            await asyncio.sleep(wait * random.uniform(0.5, 1.5))
+            delay *= 2
+
+    async def _request(self, doi):
+        url = self.endpoint + quote(doi, safe="/")
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = await http_get(url, self.timeout)
+            if status in REDIRECTS and "location" in headers:
+                url = urljoin(url, headers["location"])
+                continue
+            if status == 200:
+                try:
+                    return parse_work(json.loads(body.decode("utf-8")))
+                except (UnicodeDecodeError, ValueError):
+                    raise ResolverError(f"Invalid metadata for {doi}", retryable=False)
+            if status == 404:
+                return None
+            retry_after = headers.get("retry-after", "")
+            raise ResolverError(f"HTTP {status} from {urlsplit(url).netloc}",
+                                retryable=status == 429 or status >= 500,
+                                retry_after=int(retry_after) if retry_after.isdigit() else None)
+        raise ResolverError(f"Too many redirects for {doi}", retryable=False)
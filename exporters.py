@@ -0,0 +1,170 @@
+import csv
+import io
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+CHUNK_SIZE = 500
+BUFFER_SIZE = 1024 * 1024
+
+CSV_FIELDS = ["title", "authors", "year", "doi", "categories", "tags", "summary", "notes"]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def iter_chunks(papers, chunk_size=CHUNK_SIZE):
+    chunk = []
+    for paper in papers:
+        if paper is None:
+            continue
+        chunk.append(paper)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def csv_rows(paper):
+    return [
+        paper["title"], paper["authors"], paper["year"], paper["doi"],
+        ", ".join(paper["categories"]), ", ".join(paper["tags"]), paper["summary"], paper["notes"]
+    ]
+
+
+def write_csv(chunks, f):
+    writer = csv.writer(f)
+    writer.writerow(CSV_FIELDS)
+    for chunk in chunks:
+        writer.writerows(csv_rows(paper) for paper in chunk)
+        yield len(chunk)
+
+
+def latex_entry(paper):
+    return (
+        f"\\section*{{{paper['title']}}}\n"
+        f"\\textbf{{Authors:}} {paper['authors']} \\\\ \n"
+        f"\\textbf{{Year:}} {paper['year']} \\\\ \n"
+        f"\\textbf{{DOI:}} {paper['doi']} \\\\ \n"
+        f"\\textbf{{Categories:}} {', '.join(paper['categories'])} \\\\ \n"
+        f"\\textbf{{Tags:}} {', '.join(paper['tags'])} \\\\ \n"
+        f"\\textbf{{Summary:}} \n{paper['summary']} \\\\ \n"
+        f"\\textbf{{Notes:}} \n{paper['notes']} \\\\ \n"
+    )
+
+
+def write_latex(chunks, f):
+    f.write("\\documentclass{article}\n\\begin{document}\n\\title{Literature Review}\n\\maketitle\n")
+    for chunk in chunks:
+        f.write("".join(latex_entry(paper) for paper in chunk))
+        yield len(chunk)
+    f.write("\\end{document}")
+
+
+# Minimal WordprocessingML package; document.xml is streamed into the zip
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+DOCX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+)
+DOCX_FOOTER = '</w:body></w:document>'
+
+
+def docx_paragraph(text, bold=False, size=None):
+    properties = ""
+    if bold or size:
+        properties = "<w:rPr>" + ("<w:b/>" if bold else "") + (f'<w:sz w:val="{size}"/>' if size else "") + "</w:rPr>"
+    runs = '<w:r><w:br/></w:r>'.join(
+        f'<w:r>{properties}<w:t xml:space="preserve">{escape(line)}</w:t></w:r>' for line in str(text).split("\n")
+    )
+    return f"<w:p>{runs}</w:p>"
+
+
+def docx_entry(paper):
+    return "".join([
+        docx_paragraph(paper["title"], bold=True, size=28),
+        docx_paragraph(f"Authors: {paper['authors']}"),
+        docx_paragraph(f"Year: {paper['year']}"),
+        docx_paragraph(f"DOI: {paper['doi']}"),
+        docx_paragraph(f"Categories: {', '.join(paper['categories'])}"),
+        docx_paragraph(f"Tags: {', '.join(paper['tags'])}"),
+        docx_paragraph("Summary:", bold=True),
+        docx_paragraph(paper["summary"]),
+        docx_paragraph("Notes:", bold=True),
+        docx_paragraph(paper["notes"]),
+    ])
+
+
+def write_docx(chunks, f):
+    with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        package.writestr("_rels/.rels", DOCX_RELS)
+        with package.open("word/document.xml", "w") as raw:
+            document = io.TextIOWrapper(io.BufferedWriter(raw, BUFFER_SIZE), encoding="utf-8")
+            document.write(DOCX_HEADER + docx_paragraph("Literature Review", bold=True, size=36))
+            for chunk in chunks:
+                document.write("".join(docx_entry(paper) for paper in chunk))
+                yield len(chunk)
+            document.write(DOCX_FOOTER)
+            document.flush()
+            document.detach()
+
+
+# Format name -> (writer, opens the file in binary mode)
+WRITERS = {
+    "csv": (write_csv, False),
+    "latex": (write_latex, False),
+    "docx": (write_docx, True),
+}
+
+
+def export_papers(papers, file_path, file_format, total=None, progress=None, cancel=None, chunk_size=CHUNK_SIZE):
+    """Stream papers to file_path in the given format and return how many were written.
+
+    papers may be any iterable, e.g. a generator fetching papers from the
+    store by ID, so nothing is copied up front. progress(done, total) is
+    called after each chunk. If the optional cancel event gets set the
+    export stops, the partial file is removed and ExportCancelled is
+    raised. The file is written to a temporary name and only moved into
+    place once complete. Safe to run on a worker thread.
+    """
+    writer, binary = WRITERS[file_format]
+    temp_path = file_path + ".part"
+    written = 0
+    try:
+        if binary:
+            f = open(temp_path, "wb")
+        else:
+            f = open(temp_path, "w", newline="" if file_format == "csv" else None, encoding="utf-8", buffering=BUFFER_SIZE)
+        with f:
+            for count in writer(iter_chunks(papers, chunk_size), f):
+                written += count
+                if progress is not None:
+                    progress(written, total)
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
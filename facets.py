@@ -0,0 +1,251 @@
+import heapq
+from collections import Counter
+from itertools import compress
+
+from names import parse_authors
+from records import PaperRecord
+from stats import year_key
+
+FACETS = ("year", "category", "tag", "author")
+DENSE_FRACTION = 1024  # Values on at least 1/1024 of the papers get a bitmap when counted, rarer ones use their ID set
+CANDIDATES = 100  # Most common values of a facet whose counts are computed on each selection
+EXACT_BASE = 1000  # Selections leaving at most this many papers count all their values instead
+FACET_LIMIT = 30  # Values returned per facet, most matches first
+
+_BINARY_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def ids_to_bitmap(ids):
+    """Return an int with bit i set for each paper ID i."""
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for paper_id in ids:
+        data[paper_id >> 3] |= 1 << (paper_id & 7)
+    return int.from_bytes(data, "little")
+
+
+def bitmap_to_ids(bitmap):
+    """Return the sorted IDs whose bits are set."""
+    # bin() lists the bits as text; reversed and mapped to 0/1 bytes, compress() picks the IDs in C
+    bits = bin(bitmap)[:1:-1].encode("ascii").translate(_BINARY_DIGITS)
+    return list(compress(range(len(bits)), bits))
+
+
+def paper_facets(paper):
+    """Return the (facet, value) pairs of a paper; years are ints when numeric."""
+    if isinstance(paper, PaperRecord):
+        # Stored values skip the conversions of dict-style access
+        year, categories, tags, authors = paper.raw("year", ""), paper.raw("categories", ()), paper.raw("tags", ()), \
+            paper.raw("authors", "")
+    else:
+        year, categories, tags, authors = paper.get("year", ""), paper.get("categories", []), paper.get("tags", []), \
+            paper.get("authors", "")
+    pairs = []
+    year = year_key(year)
+    if year != "":
+        pairs.append(("year", year))
+    pairs.extend(("category", category) for category in set(categories) if category)
+    pairs.extend(("tag", tag) for tag in set(tags) if tag)
+    pairs.extend(("author", name) for name in set(parse_authors(authors)))
+    return pairs
+
+
+class FacetIndex:
+    """Multi-select facet filtering with live counts over a PaperStore.
+
+    Every year, category, tag and author maps to the set of papers having
+    it. Values found on many papers also get a bitmap (a Python int with
+    bit i set for paper ID i), so combining selections is a bitwise OR
+    within a facet and AND across facets, and a count is one AND plus
+    bit_count(). Rare values such as most authors keep only their ID set,
+    so memory stays proportional to the number of assignments. Bitmaps are
+    built on demand and dropped when one of their papers changes.
+
+    Like DuplicateIndex, the sets are built on first use and then kept up
+    to date from store changes.
+    """
+
+    def __init__(self):
+        self.store = None
+        self._reset()
+
+    def attach(self, store):
+        self.store = store
+        self._reset()
+        store.subscribe(self.on_change)
+
+    def on_change(self, event, paper_id, old, new):
+        if not self._built or event in ("begin", "commit"):
+            return
+        if event == "clear":
+            self._reset()
+            return
+        if old is not None:
+            self._remove(paper_id, old)
+        if new is not None:
+            self._add(paper_id, new)
+
+    def values(self, facet):
+        """Return every value of a facet."""
+        self._ensure_built()
+        return list(self._ids[facet])
+
+    def years_between(self, low=None, high=None):
+        """Return the numeric years from low to high inclusive; either end may be None."""
+        self._ensure_built()
+        return [year for year in self._ids["year"]
+                if isinstance(year, int) and (low is None or low <= year) and (high is None or year <= high)]
+
+    def select(self, selection, within=None, limit=FACET_LIMIT):
+        """Return the sorted IDs matching selection and the facet counts.
+
+        selection maps facets to collections of selected values; a paper
+        matches if it has at least one selected value of every facet with a
+        selection. Facets that are missing or None are not restricted, while
+        an empty collection (e.g. a year range without papers) matches
+        nothing. within optionally restricts the result to a set of IDs,
+        e.g. text search hits. The counts map each facet to (value, count)
+        pairs of the values with the most matches, where count is how many
+        papers the other facets' selections leave with that value. Selected
+        values are always included.
+        """
+        self._ensure_built()
+        selection = {facet: set(values) for facet, values in selection.items() if values is not None}
+        masks = {facet: self._mask(facet, values) for facet, values in selection.items()}
+        within_mask = None if within is None else ids_to_bitmap(within)
+
+        result = self._intersect([within_mask] + list(masks.values()))
+        paper_ids = self.store.ids() if result is None else bitmap_to_ids(result)
+
+        counts = {}
+        ids_of = {}
+        counted = {}
+        for facet in FACETS:
+            base = self._intersect([within_mask] + [mask for other, mask in masks.items() if other != facet])
+            counts[facet] = self._counts(facet, base, selection.get(facet, set()), limit, ids_of, counted)
+        return paper_ids, counts
+
+    def _intersect(self, masks):
+        """AND the given bitmaps, skipping None; returns None if all are None (no restriction)."""
+        result = None
+        for mask in masks:
+            if mask is not None:
+                result = mask if result is None else result & mask
+        return result
+
+    def _counts(self, facet, base, selected, limit, ids_of, counted):
+        values = self._ids[facet]
+        if base is not None and base.bit_count() <= EXACT_BASE:
+            # The candidates are the library's most common values, which a narrow selection may not have
+            found = counted.get(base)
+            if found is None:
+                found = counted[base] = {other: Counter() for other in FACETS}
+                for paper_id in bitmap_to_ids(base):
+                    for other, value in paper_facets(self.store.get(paper_id)):
+                        found[other][value] += 1
+            found = found[facet]
+            counts = list(found.items())
+            counts += [(value, 0) for value in selected if value in values and value not in found]
+        else:
+            counts = self._candidate_counts(facet, base, selected, ids_of)
+        counts.sort(key=lambda item: (-item[1], str(item[0])))
+        shown = counts[:limit]
+        shown += [item for item in counts[limit:] if item[0] in selected]
+        return shown
+
+    def _candidate_counts(self, facet, base, selected, ids_of):
+        values = self._ids[facet]
+        candidates = set(self._candidates(facet))
+        candidates.update(value for value in selected if value in values)
+        counts = []
+        for value in candidates:
+            if base is None:
+                count = len(values[value])
+            else:
+                container = self._container(facet, value)
+                if isinstance(container, int):
+                    count = (base & container).bit_count()
+                else:
+                    # Rare values are counted against the base's IDs, converted once per distinct base
+                    if base not in ids_of:
+                        ids_of[base] = set(bitmap_to_ids(base))
+                    base_ids = ids_of[base]
+                    count = len(container & base_ids)
+            if count or value in selected:
+                counts.append((value, count))
+        return counts
+
+    def _candidates(self, facet):
+        if self._top[facet] is None:
+            values = self._ids[facet]
+            self._top[facet] = heapq.nlargest(CANDIDATES, values, key=lambda value: len(values[value]))
+        return self._top[facet]
+
+    def _container(self, facet, value):
+        """Return the value's bitmap if it is common, else its set of IDs."""
+        key = (facet, value)
+        container = self._bitmaps.get(key)
+        if container is None:
+            ids = self._ids[facet][value]
+            if len(ids) * DENSE_FRACTION < len(self.store):
+                return ids
+            container = self._bitmaps[key] = ids_to_bitmap(ids)
+        return container
+
+    def _mask(self, facet, values):
+        mask = 0
+        for value in values:
+            if value in self._ids[facet]:
+                container = self._container(facet, value)
+                mask |= container if isinstance(container, int) else ids_to_bitmap(container)
+        return mask
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        ids_by_facet = self._ids
+        for paper_id, paper in self.store.items():
+            for facet, value in paper_facets(paper):
+                ids = ids_by_facet[facet].get(value)
+                if ids is None:
+                    ids_by_facet[facet][value] = {paper_id}
+                else:
+                    ids.add(paper_id)
+        self._built = True
+
+    def _add(self, paper_id, paper):
+        for facet, value in paper_facets(paper):
+            ids = self._ids[facet].get(value)
+            if ids is None:
+                self._ids[facet][value] = {paper_id}
+                self._top[facet] = None
+            else:
+                ids.add(paper_id)
+            self._changed(facet, value)
+
+    def _remove(self, paper_id, paper):
+        for facet, value in paper_facets(paper):
+            ids = self._ids[facet].get(value)
+            if ids is None:
+                continue
+            ids.discard(paper_id)
+            if not ids:
+                del self._ids[facet][value]
+                self._top[facet] = None
+            self._changed(facet, value)
+
+    def _changed(self, facet, value):
+        self._bitmaps.pop((facet, value), None)
+        # Counts only reorder the candidates gradually; refresh them after many changes
+        self._pending_changes += 1
+        if self._pending_changes > CANDIDATES:
+            self._pending_changes = 0
+            self._top = dict.fromkeys(FACETS)
+
+    def _reset(self):
+        self._built = False
+        self._ids = {facet: {} for facet in FACETS}
+        self._bitmaps = {}
+        self._top = dict.fromkeys(FACETS)
+        self._pending_changes = 0
@@ -1,12 +1,37 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 import json
-import csv
-from collections import Counter
-import webbrowser
 import atexit
-
-from utils import export_to_latex
+import os
+
+from store import PaperStore
+from text_index import TextIndex
+from paper_list import VirtualPaperList
+from journal import Journal
+from history import History
+from stats import LibraryStats
+from analytics import TREND_WINDOW, LibraryAnalytics
+from dedupe import DuplicateIndex, group_duplicates, merge_papers
+from ranking import RankedIndex
+from related import RelatedIndex, index_path
+from tasks import TaskRunner
+from reminders import ReminderScheduler, parse_time
+from facets import FacetIndex
+from instrumentation import Instrumentation, instrumented
+
+FILTER_DELAY_MS = 150  # Debounce for the search bar
+LIBRARY_DB = "library.db"  # Loaded instead of autosave.json when present
+RANKED_RESULTS = 50  # Hits shown by a ranked search
+RELATED_RESULTS = 20  # Papers listed by Related Papers
+LOAD_BATCH = 2000  # Papers added to the store per Tk callback while the library loads at startup
+TEXT_INDEX_BATCH = 250  # Papers whose summaries and notes are indexed per Tk callback after a load
+TEXT_INDEX_DELAY_MS = 10
+DIAGNOSTICS_REFRESH_MS = 1000
+# Operations timed by the instrumentation, offered for profiling in the Diagnostics window
+INSTRUMENTED_OPERATIONS = [
+    "load.autosave", "load.database", "load.parse", "load.store", "save", "filter", "list.refresh",
+    "search.advanced", "search.ranked", "statistics", "analytics", "export", "merge", "undo", "redo",
+]
 
 class LiteratureReviewApp:
     def __init__(self, master):
@@ -14,9 +39,38 @@ class LiteratureReviewApp:
         self.master.title("LiTTApp")
         self.master.geometry("800x600")
 
-        self.papers = []
-        self.undo_stack = []
-        self.redo_stack = []
+        self.instruments = Instrumentation()
+        self.store = PaperStore()
+        self.text_index = TextIndex()
+        self.text_index.attach(self.store)
+        self.stats = LibraryStats()
+        self.stats.attach(self.store)
+        self.duplicates = DuplicateIndex()
+        self.duplicates.attach(self.store)
+        self.ranked_index = RankedIndex()
+        self.ranked_index.attach(self.store)
+        self.related = RelatedIndex()
+        self.related.attach(self.store)
+        self.facets = FacetIndex()
+        self.facets.attach(self.store)
+        self._facet_shown = {"category": [], "tag": [], "author": []}
+        self._facet_selected = {"category": set(), "tag": set(), "author": set()}
+        self._stats_version = None
+        self._analytics = None
+        self._analytics_version = None
+        self._analytics_task = None
+        self._category_values_version = None
+        self._tag_values_version = None
+        self.store.subscribe(self.on_store_change)
+        self.backend = None
+        self.journal = None
+        self._filter_job = None
+        self._text_index_job = None
+        self._last_filter = None
+        self._load_task = None
+        self.history = History(self.store)
+        self.tasks = TaskRunner(self.master)
+        self.reminders = ReminderScheduler(self.master, self.show_reminder)
 
         # Create and set up the notebook
         self.notebook = ttk.Notebook(self.master)
@@ -30,6 +84,7 @@ class LiteratureReviewApp:
         self.notebook.add(self.add_paper_tab, text="Add Paper")
         self.notebook.add(self.view_papers_tab, text="View Papers")
         self.notebook.add(self.statistics_tab, text="Statistics")
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.update_statistics())
 
         self.setup_add_paper_tab()
         self.setup_view_papers_tab()
@@ -38,10 +93,12 @@ class LiteratureReviewApp:
         # Set up menu
         self.setup_menu()
 
-        # Auto-load data and state
+        # Auto-load data and state; the autosave is read in the background so the window shows at once
         self.auto_load()
+        self.reminders.start()
 
-        # Register auto-save on exit
+        # Close the library while Tk is still alive; atexit covers other ways out
+        self.master.protocol("WM_DELETE_WINDOW", self.quit)
         atexit.register(self.auto_save)
 
         # Setup keyboard shortcuts
@@ -59,13 +116,17 @@ class LiteratureReviewApp:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Save", command=self.save_to_file, accelerator="Ctrl+S")
         file_menu.add_command(label="Load", command=self.load_from_file, accelerator="Ctrl+O")
+        file_menu.add_command(label="Open Database...", command=self.open_database)
+        file_menu.add_command(label="Save as Database...", command=self.save_as_database)
+        file_menu.add_command(label="Import...", command=self.import_papers)
+        file_menu.add_command(label="Merge Library...", command=self.merge_library)
         file_menu.add_command(label="Export as CSV", command=self.export_csv)
-        file_menu.add_command(label="Export to Word", command=lambda: export_to_word(self.papers))
-        file_menu.add_command(label="Export to LaTeX", command=lambda: export_to_latex(self.papers))
+        file_menu.add_command(label="Export to Word", command=lambda: self.export_papers("docx"))
+        file_menu.add_command(label="Export to LaTeX", command=lambda: self.export_papers("latex"))
         file_menu.add_command(label="Backup", command=self.backup_data)
         file_menu.add_command(label="Restore", command=self.restore_data)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.master.quit, accelerator="Ctrl+Q")
+        file_menu.add_command(label="Exit", command=self.quit, accelerator="Ctrl+Q")
 
         edit_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Edit", menu=edit_menu)
@@ -75,7 +136,10 @@ class LiteratureReviewApp:
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_command(label="Advanced Search", command=self.setup_advanced_search, accelerator="Ctrl+F")
+        tools_menu.add_command(label="Find Duplicates...", command=self.find_duplicates)
+        tools_menu.add_command(label="Fetch Metadata from DOIs...", command=self.fetch_library_metadata)
         tools_menu.add_command(label="Set Reminder", command=self.set_reminder)
+        tools_menu.add_command(label="Diagnostics...", command=self.show_diagnostics)
 
         view_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="View", menu=view_menu)
@@ -94,6 +158,9 @@ class LiteratureReviewApp:
             entry.grid(row=i, column=1, columnspan=2, padx=5, pady=5)
             setattr(self, f"{attr}_entry", entry)
 
+        self.fetch_button = tk.Button(self.add_paper_tab, text="Fetch", command=self.fetch_doi_metadata)
+        self.fetch_button.grid(row=fields.index(("DOI:", "doi")), column=3, sticky="w", padx=5, pady=5)
+
         # Summary
         tk.Label(self.add_paper_tab, text="Summary:").grid(row=len(fields), column=0, sticky="ne", padx=5, pady=5)
         self.summary_text = tk.Text(self.add_paper_tab, width=50, height=5)
@@ -116,30 +183,38 @@ class LiteratureReviewApp:
         tk.Label(search_frame, text="Search:").pack(side="left")
         self.search_entry = tk.Entry(search_frame, width=30)
         self.search_entry.pack(side="left", padx=5)
-        self.search_entry.bind("<KeyRelease>", self.filter_papers)
+        self.search_entry.bind("<KeyRelease>", self.schedule_filter)
 
         tk.Label(search_frame, text="Category:").pack(side="left", padx=(20, 5))
         self.category_var = tk.StringVar()
-        self.category_combobox = ttk.Combobox(search_frame, textvariable=self.category_var)
+        self.category_combobox = ttk.Combobox(search_frame, textvariable=self.category_var, postcommand=self.update_category_filter)
         self.category_combobox.pack(side="left")
         self.category_combobox.bind("<<ComboboxSelected>>", self.filter_papers)
 
         tk.Label(search_frame, text="Tag:").pack(side="left", padx=(20, 5))
         self.tag_var = tk.StringVar()
-        self.tag_combobox = ttk.Combobox(search_frame, textvariable=self.tag_var)
+        self.tag_combobox = ttk.Combobox(search_frame, textvariable=self.tag_var, postcommand=self.update_tag_filter)
         self.tag_combobox.pack(side="left")
         self.tag_combobox.bind("<<ComboboxSelected>>", self.filter_papers)
 
-        # Treeview
-        self.tree = ttk.Treeview(self.view_papers_tab, columns=("Title", "Authors", "Year", "Tags"), show="headings")
-        self.tree.heading("Title", text="Title")
-        self.tree.heading("Authors", text="Authors")
-        self.tree.heading("Year", text="Year")
-        self.tree.heading("Tags", text="Tags")
-        self.tree.pack(expand=True, fill="both", padx=10, pady=10)
+        self.facets_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame, text="Facets", variable=self.facets_var,
+                       command=self.toggle_facets).pack(side="left", padx=(20, 0))
+
+        body = ttk.Frame(self.view_papers_tab)
+        body.pack(expand=True, fill="both", padx=10, pady=10)
+
+        # Facet panel, shown next to the list when enabled
+        self.facet_panel = ttk.Frame(body)
+        self.setup_facet_panel()
+
+        # Paper list (only the visible rows are materialized)
+        self.paper_list = VirtualPaperList(body, ("Title", "Authors", "Year", "Tags"),
+                                           row_values=self.row_values, sort_key=self.sort_key)
+        self.paper_list.pack(side="right", expand=True, fill="both")
 
         # Contextual actions via right-click menu
-        self.tree.bind("<Button-3>", self.show_context_menu)
+        self.paper_list.tree.bind("<Button-3>", self.show_context_menu)
 
         # Buttons
         button_frame = ttk.Frame(self.view_papers_tab)
@@ -155,15 +230,93 @@ class LiteratureReviewApp:
         for text, command in buttons:
             ttk.Button(button_frame, text=text, command=command).pack(side="left", padx=5)
 
+    def setup_facet_panel(self):
+        tk.Label(self.facet_panel, text="Years:").pack(anchor="w")
+        years_frame = tk.Frame(self.facet_panel)
+        years_frame.pack(fill="x")
+        self.year_from_entry = tk.Entry(years_frame, width=6)
+        self.year_from_entry.pack(side="left")
+        tk.Label(years_frame, text="to").pack(side="left", padx=5)
+        self.year_to_entry = tk.Entry(years_frame, width=6)
+        self.year_to_entry.pack(side="left")
+        for entry in (self.year_from_entry, self.year_to_entry):
+            entry.bind("<KeyRelease>", self.schedule_filter)
+
+        # Several values of one facet widen the selection, selections in different facets narrow it
+        self.facet_lists = {}
+        for facet, title in (("category", "Categories"), ("tag", "Tags"), ("author", "Authors")):
+            tk.Label(self.facet_panel, text=f"{title}:").pack(anchor="w", pady=(5, 0))
+            listbox = tk.Listbox(self.facet_panel, selectmode=tk.MULTIPLE, exportselection=False, height=7, width=28)
+            listbox.pack(expand=True, fill="both")
+            listbox.bind("<<ListboxSelect>>", lambda event, facet=facet: self.on_facet_select(facet))
+            self.facet_lists[facet] = listbox
+
+        ttk.Button(self.facet_panel, text="Clear Facets", command=self.clear_facets).pack(pady=5)
+
+    def toggle_facets(self):
+        if self.facets_var.get():
+            self.facet_panel.pack(side="left", fill="y", padx=(0, 10), before=self.paper_list)
+        else:
+            self.facet_panel.pack_forget()
+            self.clear_facets(refilter=False)
+        self.filter_papers()
+
+    def on_facet_select(self, facet):
+        shown = self._facet_shown[facet]
+        self._facet_selected[facet] = {shown[index] for index in self.facet_lists[facet].curselection()}
+        self.filter_papers()
+
+    def clear_facets(self, refilter=True):
+        for selected in self._facet_selected.values():
+            selected.clear()
+        self.year_from_entry.delete(0, tk.END)
+        self.year_to_entry.delete(0, tk.END)
+        if refilter:
+            self.filter_papers()
+
+    def facet_selection(self):
+        """Return the facet panel's selection in the form FacetIndex.select takes."""
+        selection = {facet: selected for facet, selected in self._facet_selected.items() if selected}
+        low, high = (entry.get().strip() for entry in (self.year_from_entry, self.year_to_entry))
+        if low or high:
+            selection["year"] = self.facets.years_between(int(low) if low.isdigit() else None,
+                                                          int(high) if high.isdigit() else None)
+        return selection
+
+    def show_facet_counts(self, counts):
+        for facet, listbox in self.facet_lists.items():
+            shown = self._facet_shown[facet] = [value for value, _ in counts[facet]]
+            # Selected values that no paper has any more are dropped
+            self._facet_selected[facet] &= set(shown)
+            listbox.delete(0, tk.END)
+            for index, (value, count) in enumerate(counts[facet]):
+                listbox.insert(tk.END, f"{value} ({count})")
+                if value in self._facet_selected[facet]:
+                    listbox.selection_set(index)
+
     def show_context_menu(self, event):
         menu = tk.Menu(self.master, tearoff=0)
         menu.add_command(label="View Details", command=self.view_paper_details)
+        menu.add_command(label="Related Papers", command=self.show_related_papers)
         menu.add_command(label="Edit Paper", command=self.edit_paper)
         menu.add_command(label="Delete Paper", command=self.delete_paper)
         menu.add_command(label="Open DOI", command=self.open_doi)
         menu.tk_popup(event.x_root, event.y_root)
 
     def setup_statistics_tab(self):
+        controls = ttk.Frame(self.statistics_tab)
+        controls.pack(fill="x", padx=10, pady=(10, 0))
+        ttk.Label(controls, text="Collaborators of:").pack(side=tk.LEFT)
+        self.collaborator_entry = ttk.Entry(controls, width=25)
+        self.collaborator_entry.pack(side=tk.LEFT, padx=5)
+        self.collaborator_entry.bind("<Return>", lambda event: self.update_statistics(force=True))
+        ttk.Label(controls, text="Trend window (years):").pack(side=tk.LEFT, padx=(10, 0))
+        self.trend_window_spinbox = ttk.Spinbox(controls, from_=1, to=50, width=4,
+                                                command=lambda: self.update_statistics(force=True))
+        self.trend_window_spinbox.set(TREND_WINDOW)
+        self.trend_window_spinbox.pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Show", command=lambda: self.update_statistics(force=True)).pack(side=tk.LEFT)
+
         self.stats_text = tk.Text(self.statistics_tab, wrap=tk.WORD, width=70, height=20)
         self.stats_text.pack(expand=True, fill="both", padx=10, pady=10)
         self.update_statistics()
@@ -171,13 +324,15 @@ class LiteratureReviewApp:
     def setup_shortcuts(self):
         self.master.bind("<Control-s>", lambda event: self.save_to_file())
         self.master.bind("<Control-o>", lambda event: self.load_from_file())
-        self.master.bind("<Control-q>", lambda event: self.master.quit())
+        self.master.bind("<Control-q>", lambda event: self.quit())
         self.master.bind("<Control-f>", lambda event: self.setup_advanced_search())
         self.master.bind("<Control-z>", lambda event: self.undo())
         self.master.bind("<Control-y>", lambda event: self.redo())
         self.master.bind("<Control-d>", lambda event: self.toggle_dark_mode())
 
     def add_paper(self):
+        if self.library_loading():
+            return
         title = self.title_entry.get()
         authors = self.authors_entry.get()
         year = self.year_entry.get()
@@ -202,11 +357,17 @@ class LiteratureReviewApp:
             "notes": notes
         }
 
-        self.undo_stack.append((self.papers.copy(), "Add Paper"))
-        self.redo_stack.clear()
-
-        self.papers.append(paper)
-        self.tree.insert("", tk.END, values=(title, authors, year, ", ".join(tags)))
+        duplicates = self.duplicates.duplicates_of(paper)
+        if duplicates:
+            existing = self.store.get(duplicates[0])
+            if not messagebox.askyesno(
+                "Possible Duplicate",
+                f"This looks like a duplicate of \"{existing['title']}\" ({existing['year']}). Add it anyway?"
+            ):
+                return
+
+        with self.history.action("Add Paper"):
+            self.store.add_paper(paper)
         self.clear_fields()
         self.update_statistics()
         self.update_category_filter()
@@ -222,13 +383,12 @@ class LiteratureReviewApp:
                 widget.delete("1.0", tk.END)
 
     def view_paper_details(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        selected = self.paper_list.selection()
+        if not selected:
             messagebox.showerror("Error", "Please select a paper to view details.")
             return
 
-        index = self.tree.index(selected_item)
-        paper = self.papers[index]
+        paper = self.store.get(selected[0])
 
         details_window = tk.Toplevel(self.master)
         details_window.title("Paper Details")
@@ -244,14 +404,49 @@ class LiteratureReviewApp:
             else:
                 tk.Label(details_window, text=f"{key.capitalize()}: {value}").pack(anchor="w", padx=10, pady=5)
 
+    def show_related_papers(self):
+        selected = self.paper_list.selection()
+        if not selected:
+            messagebox.showerror("Error", "Please select a paper to find related papers.")
+            return
+
+        paper_id = selected[0]
+        self.master.config(cursor="watch")
+        self.master.update_idletasks()
+        try:
+            related = self.related.related(paper_id, RELATED_RESULTS)
+        finally:
+            self.master.config(cursor="")
+        if not related:
+            messagebox.showinfo("Info", "No related papers found.")
+            return
+
+        related_window = tk.Toplevel(self.master)
+        related_window.title(f"Related to: {self.store.get(paper_id)['title']}")
+        related_window.geometry("600x400")
+
+        tree = ttk.Treeview(related_window, columns=("Title", "Year", "Similarity"), show="headings")
+        for column in ("Title", "Year", "Similarity"):
+            tree.heading(column, text=column)
+        tree.column("Year", width=60)
+        tree.column("Similarity", width=80)
+        tree.pack(expand=True, fill="both", padx=10, pady=5)
+        for other_id, similarity in related:
+            paper = self.store.get(other_id)
+            tree.insert("", "end", values=(paper["title"], paper["year"], f"{similarity:.0%}"))
+
+        tk.Button(related_window, text="Show in List", command=lambda: self.show_papers(
+            [paper_id] + [other_id for other_id, _ in related], ranked=True
+        )).pack(pady=5)
+
     def edit_paper(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        selected = self.paper_list.selection()
+        if not selected:
             messagebox.showerror("Error", "Please select a paper to edit.")
             return
 
-        index = self.tree.index(selected_item)
-        paper = self.papers[index]
+        paper_id = selected[0]
+        paper = self.store.get(paper_id)
 
         # Pre-fill the fields with the selected paper's details
         self.title_entry.insert(0, paper['title'])
@@ -264,26 +459,25 @@ class LiteratureReviewApp:
         self.notes_text.insert(tk.END, paper['notes'])
 
         # Change the Add Paper button to Update Paper
-        self.add_button.config(text="Update Paper", command=lambda: self.update_paper(index))
+        self.add_button.config(text="Update Paper", command=lambda: self.update_paper(paper_id))
 
         # Switch to the Add Paper tab
         self.notebook.select(self.add_paper_tab)
 
-    def update_paper(self, index):
-        paper = self.papers[index]
-        paper['title'] = self.title_entry.get()
-        paper['authors'] = self.authors_entry.get()
-        paper['year'] = self.year_entry.get()
-        paper['doi'] = self.doi_entry.get()
-        paper['categories'] = [cat.strip() for cat in self.categories_entry.get().split(',')]
-        paper['tags'] = [tag.strip() for tag in self.tags_entry.get().split(',')]
-        paper['summary'] = self.summary_text.get("1.0", tk.END).strip()
-        paper['notes'] = self.notes_text.get("1.0", tk.END).strip()
-
-        self.undo_stack.append((self.papers.copy(), "Edit Paper"))
-        self.redo_stack.clear()
-
-        self.tree.item(self.tree.get_children()[index], values=(paper['title'], paper['authors'], paper['year'], ", ".join(paper['tags'])))
+    def update_paper(self, paper_id):
+        paper = {
+            "title": self.title_entry.get(),
+            "authors": self.authors_entry.get(),
+            "year": self.year_entry.get(),
+            "doi": self.doi_entry.get(),
+            "categories": [cat.strip() for cat in self.categories_entry.get().split(',')],
+            "tags": [tag.strip() for tag in self.tags_entry.get().split(',')],
+            "summary": self.summary_text.get("1.0", tk.END).strip(),
+            "notes": self.notes_text.get("1.0", tk.END).strip()
+        }
+
+        with self.history.action("Edit Paper"):
+            self.store.update_paper(paper_id, paper)
         self.clear_fields()
         self.update_statistics()
         self.update_category_filter()
@@ -295,17 +489,13 @@ class LiteratureReviewApp:
         messagebox.showinfo("Success", "Paper updated successfully!")
 
     def delete_paper(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        selected = self.paper_list.selection()
+        if not selected:
             messagebox.showerror("Error", "Please select a paper to delete.")
             return
 
-        index = self.tree.index(selected_item)
-        self.undo_stack.append((self.papers.copy(), "Delete Paper"))
-        self.redo_stack.clear()
-
-        del self.papers[index]
-        self.tree.delete(selected_item)
+        with self.history.action("Delete Paper"):
+            self.store.delete_paper(selected[0])
         self.update_statistics()
         self.update_category_filter()
         self.update_tag_filter()
@@ -313,22 +503,101 @@ class LiteratureReviewApp:
         messagebox.showinfo("Success", "Paper deleted successfully!")
 
     def open_doi(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        selected = self.paper_list.selection()
+        if not selected:
             messagebox.showerror("Error", "Please select a paper to open its DOI.")
             return
 
-        index = self.tree.index(selected_item)
-        paper = self.papers[index]
+        paper = self.store.get(selected[0])
         doi = paper.get('doi')
 
         if doi:
+            import webbrowser
             webbrowser.open(f"https://doi.org/{doi}")
         else:
             messagebox.showinfo("Info", "This paper does not have a DOI.")
 
+    def fetch_doi_metadata(self):
+        """Fill in the Add Paper form from the entered DOI, looked up on a worker thread.
+
+        The title, authors and year are replaced; categories and summary are
+        only filled in when empty.
+        """
+        doi = self.doi_entry.get().strip()
+        if not doi:
+            messagebox.showerror("Error", "Please enter a DOI to fetch.")
+            return
+
+        # Loaded on first use; it brings in asyncio, ssl and sqlite3
+        from doi_resolver import DOIResolver
+
+        def done(fields):
+            self.fetch_button.config(state=tk.NORMAL)
+            if fields is None:
+                messagebox.showinfo("Not Found", f"No metadata found for {doi}.")
+                return
+            for attr in ("title", "authors", "year"):
+                if fields.get(attr):
+                    entry = getattr(self, f"{attr}_entry")
+                    entry.delete(0, tk.END)
+                    entry.insert(0, fields[attr])
+            if fields.get("categories") and not self.categories_entry.get().strip():
+                self.categories_entry.insert(0, ", ".join(fields["categories"]))
+            if fields.get("summary") and not self.summary_text.get("1.0", tk.END).strip():
+                self.summary_text.insert("1.0", fields["summary"])
+
+        def failed(error):
+            self.fetch_button.config(state=tk.NORMAL)
+            messagebox.showerror("Error", f"Failed to fetch metadata: {str(error)}")
+
+        self.fetch_button.config(state=tk.DISABLED)
+        self.tasks.submit(lambda task: DOIResolver().resolve(doi), on_done=done, on_error=failed)
+
+    def fetch_library_metadata(self):
+        """Fill in the empty fields of every paper with a DOI, looking the DOIs up concurrently."""
+        if self.library_loading():
+            return
+        targets = {paper_id: paper["doi"] for paper_id, paper in self.store.items() if paper.get("doi", "").strip()}
+        if not targets:
+            messagebox.showinfo("Info", "No papers have a DOI.")
+            return
+
+        from doi_resolver import DOIResolver, apply_metadata
+
+        def job(task):
+            return DOIResolver().resolve_many(targets.values(), progress=lambda done, total: task.progress(done / total),
+                                              cancel=task.cancel_event)
+
+        def done(result):
+            window.destroy()
+            results, errors = result
+            with self.history.action("Fetch Metadata"):
+                updated = apply_metadata(self.store, targets, results)
+            self.update_statistics()
+            self.update_category_filter()
+            self.update_tag_filter()
+            message = f"Updated {updated} of {len(targets)} papers with a DOI."
+            if errors:
+                message += f"\n{len(errors)} DOIs could not be looked up."
+            messagebox.showinfo("Fetch Metadata", message)
+
+        def cancelled():
+            window.destroy()
+            # Answers are cached as they arrive, so fetching again only repeats the unfinished lookups
+            messagebox.showinfo("Fetch Cancelled", "No papers were changed. DOIs looked up so far are cached.")
+
+        def failed(error):
+            window.destroy()
+            messagebox.showerror("Error", f"Failed to fetch metadata: {str(error)}")
+
+        task = self.tasks.submit(job, on_done=done, on_cancel=cancelled, on_error=failed,
+                                 on_progress=lambda value: bar.config(value=value))
+        window, label, bar = self.show_progress("Fetch Metadata", f"Looking up {len(targets)} DOIs...", task)
+
     def save_to_file(self):
-        if not self.papers:
+        if self.library_loading():
+            return
+        if not self.store:
             messagebox.showerror("Error", "No papers to save!")
             return
 
@@ -336,133 +605,447 @@ class LiteratureReviewApp:
         if not file_path:
             return
 
-        with open(file_path, "w") as f:
-            json.dump(self.papers, f, indent=2)
-
-        messagebox.showinfo("Success", f"Papers saved to {file_path}")
+        self.write_json(file_path, f"Papers saved to {file_path}", "Failed to save papers")
 
     def load_from_file(self):
+        if self.library_loading():
+            return
         file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
         if not file_path:
             return
 
-        try:
-            with open(file_path, "r") as f:
-                self.papers = json.load(f)
+        self.read_json(file_path, f"Papers loaded from {file_path}", "Failed to load papers")
+
+    def write_json(self, file_path, success, failure):
+        """Write the papers to a JSON file on a worker thread."""
+        papers = self.store.papers()
 
-            self.tree.delete(*self.tree.get_children())
+        def job(task):
+            with self.instruments.measure("save"), open(file_path, "w") as f:
+                json.dump(papers, f, indent=2, default=dict)
 
-            for paper in self.papers:
-                self.tree.insert("", tk.END, values=(paper["title"], paper["authors"], paper["year"], ", ".join(paper["tags"])))
+        self.tasks.submit(
+            job,
+            on_done=lambda result: messagebox.showinfo("Success", success),
+            on_error=lambda e: messagebox.showerror("Error", f"{failure}: {str(e)}")
+        )
 
+    def read_json(self, file_path, success, failure):
+        """Parse a JSON file of papers on a worker thread, then replace the library with it."""
+        def job(task):
+            with self.instruments.measure("load.parse"), open(file_path, "r") as f:
+                return json.load(f)
+
+        def done(papers):
+            try:
+                with self.instruments.measure("load.store"):
+                    self.store.load(papers)
+            except Exception as e:
+                messagebox.showerror("Error", f"{failure}: {str(e)}")
+                return
             self.update_statistics()
             self.update_category_filter()
             self.update_tag_filter()
-            messagebox.showinfo("Success", f"Papers loaded from {file_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load papers: {str(e)}")
+            messagebox.showinfo("Success", success)
+
+        self.tasks.submit(job, on_done=done, on_error=lambda e: messagebox.showerror("Error", f"{failure}: {str(e)}"))
+
+    def schedule_filter(self, event=None):
+        """Run filter_papers once typing pauses, dropping any pending run."""
+        if self._filter_job is not None:
+            self.master.after_cancel(self._filter_job)
+        self._filter_job = self.master.after(FILTER_DELAY_MS, self.filter_papers)
 
+    def request_filter(self):
+        """Re-apply the current filter on the next idle turn, coalescing repeated requests."""
+        if self._filter_job is None:
+            self._filter_job = self.master.after_idle(self.filter_papers)
+
+    @instrumented("filter")
     def filter_papers(self, event=None):
-        search_query = self.search_entry.get().lower()
+        if self._filter_job is not None:
+            self.master.after_cancel(self._filter_job)
+            self._filter_job = None
+
+        search_query = self.search_entry.get()
         category_filter = self.category_var.get()
         tag_filter = self.tag_var.get()
 
-        self.tree.delete(*self.tree.get_children())
-
-        for paper in self.papers:
-            if all([
-                search_query in paper["title"].lower() or search_query in paper["authors"].lower() or search_query in paper["year"],
-                not category_filter or category_filter in paper["categories"],
-                not tag_filter or tag_filter in paper["tags"]
-            ]):
-                self.tree.insert("", tk.END, values=(paper["title"], paper["authors"], paper["year"], ", ".join(paper["tags"])))
-
-    def update_statistics(self):
-        if not self.papers:
+        # A query that only grows can only narrow the previous result, so refine it instead of rescanning
+        within = None
+        if self._last_filter is not None:
+            last_query, last_category, last_tag, last_ids = self._last_filter
+            if (last_category, last_tag) == (category_filter, tag_filter) and search_query.startswith(last_query):
+                within = last_ids
+
+        hits = self.text_index.search(search_query, within=within)
+        paper_ids = self.store.filter(category=category_filter, tag=tag_filter, within=hits)
+        self._last_filter = (search_query, category_filter, tag_filter, set(paper_ids))
+        if self.facets_var.get():
+            restricted = hits is not None or category_filter or tag_filter
+            paper_ids, counts = self.facets.select(self.facet_selection(),
+                                                   within=self._last_filter[3] if restricted else None)
+            self.show_facet_counts(counts)
+        self.show_papers(paper_ids)
+
+    def paper_values(self, paper):
+        return (paper["title"], paper["authors"], paper["year"], ", ".join(paper["tags"]))
+
+    @instrumented("list.refresh")
+    def show_papers(self, paper_ids, ranked=False):
+        self.paper_list.set_rows(paper_ids, ranked)
+
+    def row_values(self, paper_id):
+        return self.paper_values(self.store.get(paper_id))
+
+    def sort_key(self, column):
+        """Return a key function ordering paper IDs by the given list column."""
+        field = column.lower()
+
+        def key(paper_id):
+            value = self.store.get(paper_id)[field]
+            if field == "year":
+                return (0, int(value), "") if value.isdigit() else (1, 0, value)
+            if field == "tags":
+                return ", ".join(value).lower()
+            return value.lower()
+
+        return key
+
+    def on_store_change(self, event, paper_id, old, new):
+        self._last_filter = None
+        if self._text_index_job is None and self.text_index.pending():
+            self._text_index_job = self.master.after(TEXT_INDEX_DELAY_MS, self.index_texts)
+        if event == "clear":
+            self.paper_list.set_rows([])
+        elif event == "delete":
+            self.paper_list.discard(paper_id)
+        elif event == "update":
+            self.paper_list.render()
+        self.request_filter()
+
+    def index_texts(self):
+        """Index the summaries and notes left unread by a load, a chunk per callback.
+
+        Loads leave them on disk (see TextIndex), so the list shows up
+        before the texts are indexed; a search made in the meantime indexes
+        the rest itself.
+        """
+        self._text_index_job = None
+        if self.text_index.index_pending(TEXT_INDEX_BATCH):
+            self._text_index_job = self.master.after(TEXT_INDEX_DELAY_MS, self.index_texts)
+
+    def update_statistics(self, force=False):
+        """Refresh the Statistics tab text, deferred until the tab is visible and the stats changed.
+
+        The co-authorship and tag analytics are computed on a worker thread
+        and kept until the library changes; until they are ready the tab
+        shows the plain statistics. force redraws after the analytics
+        options changed.
+        """
+        if self.notebook.index(self.notebook.select()) != self.notebook.index(self.statistics_tab):
+            return
+        if self._stats_version == self.stats.version and not force:
+            return
+        self._stats_version = self.stats.version
+
+        with self.instruments.measure("statistics"):
+            text = self.stats.summary_text()
+            if self._analytics_version == self.stats.version:
+                analytics = self._analytics.summary_text(self.trend_window(), self.collaborator_entry.get().strip())
+                if analytics:
+                    text += "\n\n" + analytics
+            elif len(self.store):
+                text += "\n\nComputing co-authorship and tag analytics..."
+                self.compute_analytics()
             self.stats_text.delete("1.0", tk.END)
-            self.stats_text.insert(tk.END, "No papers available.")
+            self.stats_text.insert(tk.END, text)
+
+    def trend_window(self):
+        try:
+            return max(1, int(self.trend_window_spinbox.get()))
+        except ValueError:
+            return TREND_WINDOW
+
+    def compute_analytics(self):
+        """Build LibraryAnalytics for the current papers on a worker thread, then redraw the Statistics tab."""
+        if self._analytics_task is not None or self._load_task is not None:
+            # A running job redraws when done, and a finished load redraws the tab
             return
+        papers = self.store.papers()
+        version = self.stats.version
 
-        years = [int(paper['year']) for paper in self.papers]
-        year_counter = Counter(years)
+        def job(task):
+            with self.instruments.measure("analytics"):
+                analytics = LibraryAnalytics(papers)
+                analytics.precompute()
+            return analytics
 
-        categories = [cat for paper in self.papers for cat in paper['categories']]
-        category_counter = Counter(categories)
+        def done(analytics):
+            self._analytics_task = None
+            self._analytics, self._analytics_version = analytics, version
+            # Redraw; if the library changed meanwhile, this starts another job
+            self.update_statistics(force=True)
 
-        tags = [tag for paper in self.papers for tag in paper['tags']]
-        tag_counter = Counter(tags)
+        def failed(error):
+            self._analytics_task = None
+            messagebox.showerror("Error", f"Failed to compute analytics: {str(error)}")
 
-        stats_summary = (
-            f"Total Papers: {len(self.papers)}\n"
-            f"Year Distribution:\n"
-            + "\n".join([f"{year}: {count}" for year, count in year_counter.items()]) + "\n\n"
-            f"Category Distribution:\n"
-            + "\n".join([f"{category}: {count}" for category, count in category_counter.items()]) + "\n\n"
-            f"Tag Distribution:\n"
-            + "\n".join([f"{tag}: {count}" for tag, count in tag_counter.items()])
-        )
+        def cancelled():
+            self._analytics_task = None
 
-        self.stats_text.delete("1.0", tk.END)
-        self.stats_text.insert(tk.END, stats_summary)
+        self._analytics_task = self.tasks.submit(job, on_done=done, on_error=failed, on_cancel=cancelled)
 
     def update_category_filter(self):
-        categories = sorted(set(cat for paper in self.papers for cat in paper['categories']))
-        self.category_combobox['values'] = [""] + categories
+        if self._category_values_version != self.stats.values_version:
+            self._category_values_version = self.stats.values_version
+            self.category_combobox['values'] = [""] + self.stats.categories()
 
     def update_tag_filter(self):
-        tags = sorted(set(tag for paper in self.papers for tag in paper['tags']))
-        self.tag_combobox['values'] = [""] + tags
+        if self._tag_values_version != self.stats.values_version:
+            self._tag_values_version = self.stats.values_version
+            self.tag_combobox['values'] = [""] + self.stats.tags()
 
     def export_csv(self):
-        if not self.papers:
+        self.export_papers("csv")
+
+    def export_papers(self, file_format):
+        """Export the library, or just the papers currently listed, on a worker thread."""
+        if self.library_loading():
+            return
+        if not self.store:
             messagebox.showerror("Error", "No papers to export!")
             return
 
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        paper_ids = self.paper_list.paper_ids
+        if len(paper_ids) < len(self.store):
+            answer = messagebox.askyesnocancel(
+                "Export", f"Export only the {len(paper_ids)} papers currently shown?\n(No exports the whole library.)")
+            if answer is None:
+                return
+            if not answer:
+                paper_ids = self.store.ids()
+        else:
+            paper_ids = list(paper_ids)
+
+        extension, description = {
+            "csv": (".csv", "CSV files"), "latex": (".tex", "LaTeX files"), "docx": (".docx", "Word documents")
+        }[file_format]
+        file_path = filedialog.asksaveasfilename(defaultextension=extension, filetypes=[(description, f"*{extension}")])
         if not file_path:
             return
 
-        try:
-            with open(file_path, "w", newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=["title", "authors", "year", "doi", "categories", "tags", "summary", "notes"])
-                writer.writeheader()
-                for paper in self.papers:
-                    paper_copy = paper.copy()
-                    paper_copy["categories"] = ", ".join(paper_copy["categories"])
-                    paper_copy["tags"] = ", ".join(paper_copy["tags"])
-                    writer.writerow(paper_copy)
+        from exporters import export_papers
+
+        def job(task):
+            # Papers are fetched from the store as they are written instead of copied up front
+            papers = (self.store.get(paper_id) for paper_id in paper_ids)
+            with self.instruments.measure("export"):
+                return export_papers(papers, file_path, file_format, total=len(paper_ids),
+                                     progress=lambda done, total: task.progress(done / total), cancel=task.cancel_event)
+
+        def done(written):
+            window.destroy()
             messagebox.showinfo("Success", f"Papers exported to {file_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export papers: {str(e)}")
 
+        def failed(error):
+            window.destroy()
+            messagebox.showerror("Error", f"Failed to export papers: {str(error)}")
+
+        task = self.tasks.submit(job, on_done=done, on_error=failed, on_cancel=lambda: window.destroy(),
+                                 on_progress=lambda value: bar.config(value=value))
+        window, label, bar = self.show_progress("Exporting", f"Exporting {len(paper_ids)} papers...", task)
+
+    def show_progress(self, title, text, task):
+        """Open a small progress window whose Cancel button cancels task; returns (window, label, progress bar)."""
+        window = tk.Toplevel(self.master)
+        window.title(title)
+        label = tk.Label(window, text=text)
+        label.pack(padx=10, pady=5)
+        bar = ttk.Progressbar(window, length=300, maximum=1.0)
+        bar.pack(padx=10, pady=5)
+
+        ttk.Button(window, text="Cancel", command=task.cancel).pack(pady=5)
+        return window, label, bar
+
+    @instrumented("undo")
     def undo(self):
-        if self.undo_stack:
-            last_action = self.undo_stack.pop()
-            self.redo_stack.append((self.papers.copy(), last_action[1]))
-            self.papers = last_action[0]
-            self.tree.delete(*self.tree.get_children())
-            for paper in self.papers:
-                self.tree.insert("", tk.END, values=(paper["title"], paper["authors"], paper["year"], ", ".join(paper["tags"])))
+        if self.history.undo() is not None:
             self.update_statistics()
             self.update_category_filter()
             self.update_tag_filter()
 
+    @instrumented("redo")
     def redo(self):
-        if self.redo_stack:
-            next_action = self.redo_stack.pop()
-            self.undo_stack.append((self.papers.copy(), next_action[1]))
-            self.papers = next_action[0]
-            self.tree.delete(*self.tree.get_children())
-            for paper in self.papers:
-                self.tree.insert("", tk.END, values=(paper["title"], paper["authors"], paper["year"], ", ".join(paper["tags"])))
+        if self.history.redo() is not None:
             self.update_statistics()
             self.update_category_filter()
             self.update_tag_filter()
 
+    def find_duplicates(self):
+        """List groups of likely duplicate papers, found on a worker thread, and merge them on request."""
+        window = tk.Toplevel(self.master)
+        window.title("Find Duplicates")
+        window.geometry("700x400")
+
+        tree = ttk.Treeview(window, columns=("Year", "Authors", "DOI"))
+        tree.heading("#0", text="Title")
+        for column in ("Year", "Authors", "DOI"):
+            tree.heading(column, text=column)
+        tree.column("Year", width=60)
+        tree.pack(expand=True, fill="both", padx=10, pady=5)
+        label = tk.Label(window)
+        label.pack(pady=5)
+        groups = []
+
+        def refresh():
+            label.config(text="Looking for duplicates...")
+            doi_groups, buckets, papers = self.duplicates.candidates()
+            self.tasks.submit(
+                lambda task: group_duplicates(doi_groups, buckets, papers, self.duplicates.threshold),
+                on_done=show, on_error=lambda e: messagebox.showerror("Error", f"Failed to find duplicates: {str(e)}"),
+            )
+
+        def show(found):
+            if not window.winfo_exists():
+                return
+            # Leave out papers deleted while the groups were computed
+            found = ([paper_id for paper_id in paper_ids if paper_id in self.store] for paper_ids in found)
+            groups[:] = [paper_ids for paper_ids in found if len(paper_ids) > 1]
+            tree.delete(*tree.get_children())
+            for position, paper_ids in enumerate(groups):
+                first = self.store.get(paper_ids[0])
+                group_item = tree.insert("", "end", iid=f"group{position}", open=True,
+                                         text=f"{first['title']} ({len(paper_ids)} papers)")
+                for paper_id in paper_ids:
+                    paper = self.store.get(paper_id)
+                    tree.insert(group_item, "end", text=paper["title"],
+                                values=(paper["year"], paper["authors"], paper["doi"]))
+            label.config(text=f"{len(groups)} groups of duplicates found. "
+                              f"Merging keeps the oldest paper and fills it in from the others.")
+
+        def merge(selected_groups):
+            if not selected_groups:
+                return
+            with self.history.action("Merge Duplicates"):
+                for paper_ids in selected_groups:
+                    self.store.update_paper(paper_ids[0], merge_papers([self.store.get(paper_id) for paper_id in paper_ids]))
+                    for paper_id in paper_ids[1:]:
+                        self.store.delete_paper(paper_id)
+            self.update_statistics()
+            self.update_category_filter()
+            self.update_tag_filter()
+            refresh()
+
+        def selected_groups():
+            positions = set()
+            for item in tree.selection():
+                group_item = tree.parent(item) or item
+                positions.add(int(group_item[len("group"):]))
+            return [groups[position] for position in sorted(positions)]
+
+        buttons = tk.Frame(window)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="Merge Selected", command=lambda: merge(selected_groups())).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Merge All", command=lambda: merge(list(groups))).pack(side=tk.LEFT, padx=5)
+        refresh()
+
+    def show_diagnostics(self):
+        """Show the recorded operation timings, with cProfile capture of a single run."""
+        window = tk.Toplevel(self.master)
+        window.title("Diagnostics")
+        window.geometry("700x400")
+
+        enabled_var = tk.BooleanVar(value=self.instruments.enabled)
+        tk.Checkbutton(window, text="Record timings", variable=enabled_var,
+                       command=lambda: setattr(self.instruments, "enabled", enabled_var.get())).pack(anchor="w", padx=10)
+
+        columns = ("Count", "Total ms", "Mean ms", "p50 ms", "p95 ms", "Max ms")
+        tree = ttk.Treeview(window, columns=columns)
+        tree.heading("#0", text="Operation")
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=80, anchor="e")
+        tree.pack(expand=True, fill="both", padx=10, pady=5)
+
+        profile_frame = tk.Frame(window)
+        profile_frame.pack(pady=5)
+        operation_var = tk.StringVar(value=INSTRUMENTED_OPERATIONS[0])
+        ttk.Combobox(profile_frame, textvariable=operation_var, values=INSTRUMENTED_OPERATIONS,
+                     state="readonly", width=18).pack(side=tk.LEFT, padx=5)
+        tk.Button(profile_frame, text="Profile Next Run",
+                  command=lambda: self.instruments.capture_next(operation_var.get())).pack(side=tk.LEFT, padx=5)
+        tk.Button(profile_frame, text="Show Profile",
+                  command=lambda: self.show_profile(operation_var.get())).pack(side=tk.LEFT, padx=5)
+        status = tk.Label(window)
+        status.pack()
+
+        def save_report():
+            file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+            if not file_path:
+                return
+            try:
+                self.instruments.dump(file_path)
+                messagebox.showinfo("Success", f"Diagnostics saved to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save diagnostics: {str(e)}")
+
+        buttons = tk.Frame(window)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="Save Report...", command=save_report).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Reset", command=self.instruments.reset).pack(side=tk.LEFT, padx=5)
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for row in self.instruments.report():
+                tree.insert("", "end", text=row["operation"], values=(
+                    row["count"], row["total_ms"], row["mean_ms"], row["p50_ms"], row["p95_ms"], row["max_ms"]))
+            pending = self.instruments.capture_pending()
+            status.config(text=f"Profiling the next run of {pending}..." if pending else "")
+            window.after(DIAGNOSTICS_REFRESH_MS, refresh)
+
+        refresh()
+
+    def show_profile(self, operation):
+        report = self.instruments.profiles.get(operation)
+        if report is None:
+            messagebox.showinfo("Profile", f"No profile captured for {operation} yet. Use Profile Next Run first.")
+            return
+        window = tk.Toplevel(self.master)
+        window.title(f"Profile: {operation}")
+        text = tk.Text(window, wrap="none", width=110, height=30)
+        text.pack(expand=True, fill="both")
+        text.insert(tk.END, report)
+        text.config(state="disabled")
+
     def set_reminder(self):
         reminder_time = simpledialog.askstring("Set Reminder", "Enter reminder time (e.g., '2024-08-29 10:00')")
-        if reminder_time:
-            messagebox.showinfo("Reminder Set", f"Reminder set for {reminder_time}")
+        if not reminder_time:
+            return
+        try:
+            when = parse_time(reminder_time)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter the time as YYYY-MM-DD HH:MM.")
+            return
+
+        # Remind about the selected paper, if any
+        selected = self.paper_list.selection()
+        paper_id = selected[0] if selected else None
+        default = f"Read \"{self.store.get(paper_id)['title']}\"" if paper_id is not None else ""
+        message = simpledialog.askstring("Set Reminder", "Remind me to:", initialvalue=default)
+        if message is None:
+            return
+
+        self.reminders.add(when, message or "Reminder", paper_id)
+        messagebox.showinfo("Reminder Set", f"Reminder set for {when.strftime('%Y-%m-%d %H:%M')}")
+
+    def show_reminder(self, reminder):
+        paper_id = reminder.get("paper_id")
+        if paper_id in self.store:
+            self.paper_list.see(paper_id)
+        messagebox.showinfo("Reminder", f"{reminder['time']}: {reminder['message']}")
 
     def toggle_dark_mode(self):
         if not self.dark_mode:
@@ -482,59 +1065,275 @@ class LiteratureReviewApp:
             self.stats_text.config(bg="SystemButtonFace", fg="black")
             self.dark_mode = False
 
+    def quit(self):
+        """Close the library, then the window; used by Exit, Ctrl+Q and the window's close button."""
+        self.auto_save()
+        atexit.unregister(self.auto_save)
+        self.master.destroy()
+
     def auto_save(self):
-        with open("autosave.json", "w") as f:
-            json.dump(self.papers, f, indent=2)
+        # Every change has already been written to the database or the journal. Files are closed
+        # first: when atexit runs this, Tk may be destroyed and the timer calls below fail.
+        self.tasks.shutdown()
+        self.related.save()
+        if self.backend is not None:
+            self.backend.close()
+        if self.journal is not None:
+            self.journal.close()
+        try:
+            self.reminders.stop()
+            for job in (self._filter_job, self._text_index_job):
+                if job is not None:
+                    self.master.after_cancel(job)
+        except tk.TclError:
+            # Tk is gone, and its timers with it
+            pass
 
     def auto_load(self):
+        if os.path.exists(LIBRARY_DB):
+            self.use_database(LIBRARY_DB)
+            return
+        self.journal = Journal("autosave.json")
+        self.related.use_path(index_path("autosave.json"))
+        self.load_in_background(self.journal)
+
+    def load_in_background(self, journal):
+        """Read the journal's library on a worker and add it to the store in batches.
+
+        The list fills in as batches arrive. The journal starts logging once
+        the files are read, so loaded papers can be edited while the rest
+        arrive; adding or replacing papers waits until the load is done (see
+        library_loading), which keeps the loaded IDs free.
+        """
+        title = self.master.title()
+
+        def job(task):
+            with self.instruments.measure("load.autosave"):
+                items = journal.read()
+            for start in range(0, len(items), LOAD_BATCH):
+                task.emit((items[start:start + LOAD_BATCH], min(start + LOAD_BATCH, len(items)), len(items)))
+
+        def insert(batch):
+            items, loaded, total = batch
+            if not state["attached"]:
+                journal.attach(self.store, loading=True)
+                state["attached"] = True
+            with self.instruments.measure("load.store"):
+                journal.add_loaded(items)
+            self.master.title(f"{title} - Loading {loaded * 100 // total}%")
+
+        def finish():
+            self._load_task = None
+            self.master.title(title)
+            if not state["attached"]:
+                journal.attach(self.store)
+            journal.finish_loading()
+            self.update_statistics(force=True)
+
+        def failed(error):
+            self._load_task = None
+            self.master.title(title)
+            # Don't log new changes on top of a library that couldn't be read
+            self.journal = None
+            messagebox.showerror("Error", f"Failed to load the library: {str(error)}")
+
+        state = {"attached": False}
+        self._load_task = self.tasks.submit(job, on_item=insert, on_done=lambda result: finish(),
+                                            on_cancel=finish, on_error=failed)
+
+    def library_loading(self):
+        """Return True, after telling the user to wait, while the library is still loading."""
+        if self._load_task is None:
+            return False
+        messagebox.showinfo("Loading", "Please wait until the library has finished loading.")
+        return True
+
+    @instrumented("load.database")
+    def use_database(self, file_path, import_current=False):
+        """Switch to a SQLite library, either loading it or filling it with the current papers."""
+        from sqlite_backend import SQLiteBackend
+
+        if self.backend is not None:
+            self.backend.close()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.backend = SQLiteBackend(file_path)
+        self.related.save()
+        self.related.use_path(index_path(file_path))
+        if import_current:
+            self.backend.import_store(self.store)
+        else:
+            self.backend.attach(self.store)
+        self.update_statistics()
+        self.update_category_filter()
+        self.update_tag_filter()
+
+    def open_database(self):
+        if self.library_loading():
+            return
+        file_path = filedialog.askopenfilename(filetypes=[("SQLite databases", "*.db")])
+        if not file_path:
+            return
         try:
-            with open("autosave.json", "r") as f:
-                self.papers = json.load(f)
-                for paper in self.papers:
-                    self.tree.insert("", tk.END, values=(paper["title"], paper["authors"], paper["year"], ", ".join(paper["tags"])))
-                self.update_statistics()
-                self.update_category_filter()
-                self.update_tag_filter()
-        except FileNotFoundError:
-            pass
+            self.use_database(file_path)
+            messagebox.showinfo("Success", f"Papers loaded from {file_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open database: {str(e)}")
+
+    def save_as_database(self):
+        if self.library_loading():
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".db", filetypes=[("SQLite databases", "*.db")])
+        if not file_path:
+            return
+        try:
+            self.use_database(file_path, import_current=True)
+            messagebox.showinfo("Success", f"Papers saved to {file_path}. Changes are now saved automatically.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save database: {str(e)}")
+
+    def import_papers(self):
+        """Bulk import a CSV, BibTeX or RIS file, parsing it on a worker thread."""
+        if self.library_loading():
+            return
+        file_path = filedialog.askopenfilename(filetypes=[
+            ("Reference files", "*.csv *.bib *.ris"), ("CSV files", "*.csv"),
+            ("BibTeX files", "*.bib"), ("RIS files", "*.ris")
+        ])
+        if not file_path:
+            return
+
+        from importers import read_batches
+
+        totals = {"imported": 0, "errors": 0}
+
+        def job(task):
+            for batch in read_batches(file_path, cancel=task.cancel_event):
+                # Waits while a few batches are still waiting to be inserted
+                task.emit(batch)
+
+        def insert(batch):
+            papers, errors, done = batch
+            with self.store.batch():
+                for paper in papers:
+                    self.store.add_paper(paper)
+            totals["imported"] += len(papers)
+            totals["errors"] += errors
+            progress_bar.config(value=done)
+            progress_label.config(text=f"Imported {totals['imported']} papers...")
+
+        def finish():
+            progress_window.destroy()
+            self.update_statistics()
+            self.update_category_filter()
+            self.update_tag_filter()
+
+        def done(result):
+            finish()
+            messagebox.showinfo("Success", f"Imported {totals['imported']} papers ({totals['errors']} skipped).")
+
+        def cancelled():
+            finish()
+            messagebox.showinfo("Import Cancelled", f"Imported {totals['imported']} papers before cancelling.")
+
+        def failed(error):
+            finish()
+            messagebox.showerror("Error", f"Failed to import papers: {str(error)}")
+
+        task = self.tasks.submit(job, on_item=insert, on_done=done, on_cancel=cancelled, on_error=failed)
+        progress_window, progress_label, progress_bar = self.show_progress(
+            "Importing", f"Importing {os.path.basename(file_path)}...", task)
+
+    def merge_library(self):
+        """Merge another library file into this one, comparing content digests on a worker thread.
+
+        With a common base (e.g. the backup both copies started from) the
+        merge is three-way: changes made on only one side win and edits on
+        both sides are merged field by field. Conflicts keep this library's
+        version. The merge is a single undoable action.
+        """
+        if self.library_loading():
+            return
+        filetypes = [("Libraries", "*.json *.db"), ("JSON files", "*.json"), ("SQLite databases", "*.db")]
+        file_path = filedialog.askopenfilename(title="Library to merge", filetypes=filetypes)
+        if not file_path:
+            return
+        base_path = None
+        if messagebox.askyesno("Merge Library", "Choose the library both copies started from (e.g. a backup) "
+                                                "for a three-way merge?\n(No compares the two libraries directly.)"):
+            base_path = filedialog.askopenfilename(title="Common base", filetypes=filetypes)
+            if not base_path:
+                return
+
+        from sync import apply_changes, changes, count_changes, index_library, merge, read_items
+
+        items = self.store.items()
+
+        def job(task):
+            with self.instruments.measure("merge"):
+                ours = index_library(items)
+                theirs = index_library(read_items(file_path))
+                base = None if base_path is None else index_library(read_items(base_path))
+                merged, conflicts = merge(ours, theirs, base)
+                return changes(ours, merged), conflicts
+
+        def done(result):
+            window.destroy()
+            paper_changes, conflicts = result
+            # Papers edited or deleted while the merge ran keep those edits
+            current = dict(items)
+            paper_changes = [change for change in paper_changes
+                             if change[0] == "add" or self.store.get(change[1]) is current[change[1]]]
+            with self.history.action("Merge Library"):
+                apply_changes(self.store, paper_changes)
+            self.update_statistics()
+            self.update_category_filter()
+            self.update_tag_filter()
+
+            counts = count_changes(paper_changes)
+            message = f"{counts['add']} papers added, {counts['update']} updated, {counts['delete']} deleted."
+            if conflicts:
+                message += f"\n\n{len(conflicts)} conflicts kept this library's version:"
+                for key, reason, fields in conflicts[:10]:
+                    message += f"\n{key.split(':', 1)[1]}: {reason}" + (f" ({', '.join(fields)})" if fields else "")
+                if len(conflicts) > 10:
+                    message += f"\n...and {len(conflicts) - 10} more"
+            messagebox.showinfo("Merge Library", message)
+
+        def failed(error):
+            window.destroy()
+            messagebox.showerror("Error", f"Failed to merge library: {str(error)}")
+
+        task = self.tasks.submit(job, on_done=done, on_error=failed, on_cancel=lambda: window.destroy())
+        window, label, bar = self.show_progress("Merge Library", f"Comparing with {os.path.basename(file_path)}...",
+                                                task)
 
     # Missing Methods Implementation
 
     def backup_data(self):
         """Create a backup of the current data."""
+        if self.library_loading():
+            return
         file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if not file_path:
             return
-        try:
-            with open(file_path, "w") as f:
-                json.dump(self.papers, f, indent=2)
-            messagebox.showinfo("Success", "Backup created successfully.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create backup: {str(e)}")
+        self.write_json(file_path, "Backup created successfully.", "Failed to create backup")
 
     def restore_data(self):
         """Restore data from a backup."""
+        if self.library_loading():
+            return
         file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
         if not file_path:
             return
-        try:
-            with open(file_path, "r") as f:
-                self.papers = json.load(f)
-                self.tree.delete(*self.tree.get_children())
-                for paper in self.papers:
-                    self.tree.insert("", tk.END, values=(paper["title"], paper["authors"], paper["year"], ", ".join(paper["tags"])))
-                self.update_statistics()
-                self.update_category_filter()
-                self.update_tag_filter()
-                messagebox.showinfo("Success", "Data restored successfully.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to restore data: {str(e)}")
+        self.read_json(file_path, "Data restored successfully.", "Failed to restore data")
 
     def setup_advanced_search(self):
         """Setup and perform an advanced search."""
         search_window = tk.Toplevel(self.master)
         search_window.title("Advanced Search")
-        search_window.geometry("400x300")
+        search_window.geometry("400x380")
 
         # Add search fields
         tk.Label(search_window, text="Title:").grid(row=0, column=0, sticky="e", padx=5, pady=5)
@@ -561,11 +1360,21 @@ class LiteratureReviewApp:
             title_entry.get(), authors_entry.get(), year_entry.get(), category_entry.get(), tag_entry.get()
         )).grid(row=5, column=1, pady=10)
 
+        # Ranked search over every text field, with field filters
+        tk.Label(search_window, text="Query:").grid(row=6, column=0, sticky="e", padx=5, pady=5)
+        query_entry = tk.Entry(search_window, width=30)
+        query_entry.grid(row=6, column=1, padx=5, pady=5)
+        tk.Label(search_window, text="e.g. graph neural year:2019..2023 tag:nlp title:survey").grid(
+            row=7, column=0, columnspan=2, padx=5)
+        tk.Button(search_window, text="Ranked Search", command=lambda: self.perform_ranked_search(
+            query_entry.get()
+        )).grid(row=8, column=1, pady=10)
+
+    @instrumented("search.advanced")
     def perform_advanced_search(self, title, authors, year, category, tag):
         """Perform advanced search with given parameters."""
-        self.tree.delete(*self.tree.get_children())
-
-        for paper in self.papers:
+        matches = []
+        for paper_id, paper in self.store.items():
             if all([
                 title.lower() in paper["title"].lower(),
                 authors.lower() in paper["authors"].lower(),
@@ -573,5 +1382,20 @@ class LiteratureReviewApp:
                 category.lower() in (', '.join(paper['categories'])).lower(),
                 tag.lower() in (', '.join(paper['tags'])).lower()
             ]):
-                self.tree.insert("", tk.END, values=(paper["title"], paper["authors"], paper["year"], ", ".join(paper["tags"])))
+                matches.append(paper_id)
+
+        self._last_filter = None
+        self.show_papers(matches)
+
+    @instrumented("search.ranked")
+    def perform_ranked_search(self, query):
+        """Show the best matches for query by relevance across all text fields."""
+        self.master.config(cursor="watch")
+        self.master.update_idletasks()
+        try:
+            matches = self.ranked_index.search(query, RANKED_RESULTS)
+        finally:
+            self.master.config(cursor="")
+        self._last_filter = None
+        self.show_papers(matches, ranked=True)
 
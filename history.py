@@ -0,0 +1,133 @@
+import sys
+from contextlib import contextmanager
+
+from records import PaperRecord
+
+DEFAULT_MAX_DEPTH = 500
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def paper_size(paper):
+    """Rough number of bytes held by a paper dict."""
+    if paper is None:
+        return 0
+    size = sys.getsizeof(paper)
+    # Stored values, so texts still on disk are not read in
+    for value in paper.stored_values() if isinstance(paper, PaperRecord) else paper.values():
+        size += sys.getsizeof(value)
+        if isinstance(value, (list, tuple)):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class History:
+    """Undo/redo for a PaperStore based on inverse operations.
+
+    Each action records only the papers it touched as (paper_id, old, new)
+    triples, where old is None for an add and new is None for a delete.
+    Unchanged papers are shared with the store, so an entry costs O(change)
+    rather than a copy of the library. Undoing applies the inverse changes
+    to the store, whose listeners then update indexes and views
+    incrementally. The stack is capped both by depth and by an estimate of
+    the memory held by old paper versions.
+    """
+
+    def __init__(self, store, max_depth=DEFAULT_MAX_DEPTH, max_bytes=DEFAULT_MAX_BYTES):
+        self.store = store
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.undo_stack = []
+        self.redo_stack = []
+        self._bytes = 0
+        self._recording = None
+        self._replaying = False
+        store.subscribe(self.on_change)
+
+    @contextmanager
+    def action(self, label):
+        """Record the store changes made inside the block as one undoable action."""
+        self._recording = []
+        try:
+            with self.store.batch():
+                yield
+        finally:
+            changes, self._recording = self._recording, None
+            if changes:
+                self._push(self.undo_stack, (label, changes, self._changes_size(changes)))
+                self._clear_stack(self.redo_stack)
+                self._trim()
+
+    def on_change(self, event, paper_id, old, new):
+        if self._replaying or event in ("begin", "commit"):
+            return
+        if event == "clear":
+            # Wholesale replacements are not undoable; forget the history instead
+            self._recording = None
+            self.clear()
+        elif self._recording is not None:
+            self._recording.append((paper_id, old, new))
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        """Revert the last action and return its label, or None if there is nothing to undo."""
+        if not self.undo_stack:
+            return None
+        label, changes, size = self._pop(self.undo_stack)
+        self._replay((paper_id, new, old) for paper_id, old, new in reversed(changes))
+        self._push(self.redo_stack, (label, changes, size))
+        return label
+
+    def redo(self):
+        """Re-apply the last undone action and return its label, or None."""
+        if not self.redo_stack:
+            return None
+        label, changes, size = self._pop(self.redo_stack)
+        self._replay(changes)
+        self._push(self.undo_stack, (label, changes, size))
+        return label
+
+    def clear(self):
+        self._clear_stack(self.undo_stack)
+        self._clear_stack(self.redo_stack)
+
+    def _replay(self, changes):
+        self._replaying = True
+        try:
+            with self.store.batch():
+                for paper_id, current, target in changes:
+                    if target is None:
+                        self.store.delete_paper(paper_id)
+                    elif current is None:
+                        self.store.add_paper(target, paper_id)
+                    else:
+                        self.store.update_paper(paper_id, target)
+        finally:
+            self._replaying = False
+
+    def _changes_size(self, changes):
+        return sum(paper_size(old) + paper_size(new) for _, old, new in changes)
+
+    def _push(self, stack, entry):
+        stack.append(entry)
+        self._bytes += entry[2]
+
+    def _pop(self, stack):
+        entry = stack.pop()
+        self._bytes -= entry[2]
+        return entry
+
+    def _clear_stack(self, stack):
+        self._bytes -= sum(entry[2] for entry in stack)
+        stack.clear()
+
+    def _trim(self):
+        # Drop the oldest actions first
+        excess = len(self.undo_stack) - self.max_depth
+        while self.undo_stack and (excess > 0 or self._bytes > self.max_bytes):
+            self._bytes -= self.undo_stack.pop(0)[2]
+            excess -= 1
@@ -0,0 +1,232 @@
+import csv
+import os
+import re
+
+from names import imported_authors
+from records import split_list
+
+BATCH_SIZE = 1000
+
+YEAR_RE = re.compile(r"\d{4}")
+BIBTEX_ENTRY_RE = re.compile(r"@\s*(\w+)\s*[{(]")
+BIBTEX_FIELD_RE = re.compile(r"\s*(\w[\w-]*)\s*=\s*")
+BIBTEX_BARE_RE = re.compile(r"[^,}#\s]+")
+BIBTEX_CONCAT_RE = re.compile(r"\s*#\s*")
+BIBTEX_COMMA_RE = re.compile(r"\s*,")
+
+
+def make_paper(title, authors, year, doi="", categories=None, tags=None, summary="", notes=""):
+    """Build a paper dict, raising ValueError when a required field is missing."""
+    title, authors, year = title.strip(), authors.strip(), str(year).strip()
+    if not all([title, authors, year]):
+        raise ValueError("Title, Authors, and Year are required")
+    return {
+        "title": title,
+        "authors": authors,
+        "year": year,
+        "doi": doi.strip(),
+        "categories": categories or [],
+        "tags": tags or [],
+        "summary": summary.strip(),
+        "notes": notes.strip()
+    }
+
+
+class _LineCounter:
+    """Iterate over the lines of a text file while counting the characters read."""
+
+    def __init__(self, f):
+        self.f = f
+        self.consumed = 0
+
+    def __iter__(self):
+        for line in self.f:
+            self.consumed += len(line)
+            yield line
+
+
+# CSV, in the same layout export_csv writes; records are read with csv.DictReader
+
+def paper_from_csv(row):
+    return make_paper(
+        row.get("title") or "", row.get("authors") or "", row.get("year") or "", row.get("doi") or "",
+        split_list(row.get("categories") or ""), split_list(row.get("tags") or ""),
+        row.get("summary") or "", row.get("notes") or ""
+    )
+
+
+# BibTeX
+
+def iter_bibtex(lines):
+    """Yield (entry_type, fields) for each entry, reading one entry at a time."""
+    buffer = []
+    depth = 0
+    opened = False
+    for line in lines:
+        if not buffer:
+            start = line.find("@")
+            if start < 0:
+                continue
+            line = line[start:]
+        buffer.append(line)
+        depth += line.count("{") - line.count("}")
+        opened = opened or "{" in line
+        if opened and depth <= 0:
+            entry = "".join(buffer)
+            buffer, depth, opened = [], 0, False
+            parsed = _parse_bibtex_entry(entry)
+            if parsed is not None:
+                yield parsed
+
+
+def _parse_bibtex_entry(text):
+    match = BIBTEX_ENTRY_RE.match(text)
+    if match is None:
+        return None
+    entry_type = match.group(1).lower()
+    if entry_type in ("comment", "preamble", "string"):
+        return None
+
+    body = text[match.end():]
+    # Skip the citation key
+    comma = body.find(",")
+    if comma < 0:
+        return None
+    position = comma + 1
+
+    fields = {}
+    while True:
+        match = BIBTEX_FIELD_RE.match(body, position)
+        if match is None:
+            break
+        name = match.group(1).lower()
+        value, position = _read_bibtex_value(body, match.end())
+        fields[name] = " ".join(value.split())
+        match = BIBTEX_COMMA_RE.match(body, position)
+        if match is None:
+            break
+        position = match.end()
+    return entry_type, fields
+
+
+def _read_bibtex_value(body, position):
+    parts = []
+    while position < len(body):
+        char = body[position]
+        if char == "{":
+            depth, start = 1, position + 1
+            position += 1
+            while position < len(body) and depth:
+                depth += {"{": 1, "}": -1}.get(body[position], 0)
+                position += 1
+            parts.append(body[start:position - 1].replace("{", "").replace("}", ""))
+        elif char == '"':
+            end = body.find('"', position + 1)
+            end = len(body) if end < 0 else end
+            parts.append(body[position + 1:end].replace("{", "").replace("}", ""))
+            position = end + 1
+        else:
+            match = BIBTEX_BARE_RE.match(body, position)
+            if match is None:
+                break
+            parts.append(match.group(0))
+            position = match.end()
+
+        # Values may be concatenated with #
+        match = BIBTEX_CONCAT_RE.match(body, position)
+        if match is None:
+            break
+        position = match.end()
+    return "".join(parts), position
+
+
+def paper_from_bibtex(entry):
+    entry_type, fields = entry
+    year = YEAR_RE.search(fields.get("year", "") or fields.get("date", ""))
+    return make_paper(
+        fields.get("title", ""), imported_authors(fields.get("author", "") or fields.get("editor", "")),
+        year.group(0) if year else "", fields.get("doi", ""),
+        split_list(fields.get("categories", "")), split_list(fields.get("keywords", "")),
+        fields.get("abstract", ""), fields.get("note", "") or fields.get("annote", "")
+    )
+
+
+# RIS
+
+RIS_LINE_RE = re.compile(r"^([A-Z][A-Z0-9])  -(?: (.*))?$")
+
+
+def iter_ris(lines):
+    record = {}
+    for line in lines:
+        match = RIS_LINE_RE.match(line.rstrip("\r\n"))
+        if match is None:
+            continue
+        tag, value = match.group(1), (match.group(2) or "").strip()
+        if tag == "TY":
+            record = {}
+        elif tag == "ER":
+            yield record
+            record = {}
+        else:
+            record.setdefault(tag, []).append(value)
+
+
+def paper_from_ris(record):
+    first = lambda *tags: next((record[tag][0] for tag in tags if record.get(tag)), "")
+    year = YEAR_RE.search(first("PY", "Y1", "DA"))
+    return make_paper(
+        first("TI", "T1", "CT", "BT"), imported_authors(" and ".join(record.get("AU", []) or record.get("A1", []))),
+        year.group(0) if year else "", first("DO"),
+        [], record.get("KW", []), first("AB", "N2"), "\n".join(record.get("N1", []))
+    )
+
+
+# File extension -> (record reader, record -> paper converter)
+PARSERS = {
+    ".csv": (csv.DictReader, paper_from_csv),
+    ".bib": (iter_bibtex, paper_from_bibtex),
+    ".ris": (iter_ris, paper_from_ris),
+}
+
+
+def read_batches(path, batch_size=BATCH_SIZE, cancel=None):
+    """Stream papers from a CSV, BibTeX or RIS file in batches.
+
+    Yields (papers, errors, fraction_done) for each batch, where errors
+    counts the records that failed validation. Stops early once the
+    optional cancel event is set. Safe to run on a worker thread.
+    """
+    parser = PARSERS.get(os.path.splitext(path)[1].lower())
+    if parser is None:
+        raise ValueError(f"Unsupported file type: {path}")
+    read_records, to_paper = parser
+
+    total = max(1, os.path.getsize(path))
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        lines = _LineCounter(f)
+        papers, errors = [], 0
+        for record in read_records(lines):
+            if cancel is not None and cancel.is_set():
+                return
+            try:
+                papers.append(to_paper(record))
+            except ValueError:
+                errors += 1
+                continue
+            if len(papers) >= batch_size:
+                yield papers, errors, min(1.0, lines.consumed / total)
+                papers, errors = [], 0
+        yield papers, errors, 1.0
+
+
+def import_file(path, store, batch_size=BATCH_SIZE):
+    """Synchronously import a file into store and return (imported, errors)."""
+    imported = errors = 0
+    for papers, batch_errors, _ in read_batches(path, batch_size):
+        with store.batch():
+            for paper in papers:
+                store.add_paper(paper)
+        imported += len(papers)
+        errors += batch_errors
+    return imported, errors
@@ -0,0 +1,142 @@
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+ENV_VAR = "LITT_INSTRUMENT"  # Set to 1 to record timings from startup
+RECENT_SAMPLES = 200  # Durations kept per operation for percentiles
+PROFILE_LINES = 40  # Functions listed in a captured profile report
+
+_NULL = nullcontext()
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-percent * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+class Instrumentation:
+    """Opt-in timings of named operations, plus a cProfile capture of a single run.
+
+    Operations are wrapped in measure(name) (or the instrumented decorator).
+    Each keeps a count, total and maximum and its most recent durations for
+    percentiles. capture_next(name) profiles the next run of one operation,
+    on whichever thread it runs. While disabled and with no capture armed,
+    measure() hands back a shared no-op context manager, so instrumented
+    code pays one method call.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = os.environ.get(ENV_VAR) == "1" if enabled is None else enabled
+        self.profiles = {}
+        self._timings = {}
+        self._capture = None
+        self._lock = threading.Lock()
+
+    def measure(self, name):
+        if not self.enabled and self._capture is None:
+            return _NULL
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name):
+        profiler = self._start_profile(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._store_profile(name, profiler)
+            if self.enabled:
+                self.record(name, elapsed)
+
+    def record(self, name, seconds):
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = {"count": 0, "total": 0.0, "max": 0.0,
+                                                "recent": deque(maxlen=RECENT_SAMPLES)}
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+            timing["recent"].append(seconds)
+
+    def capture_next(self, name):
+        """Profile the next run of the named operation; its report then appears in profiles."""
+        self._capture = name
+
+    def capture_pending(self):
+        return self._capture
+
+    def report(self):
+        """Return one dict of counts and millisecond timings per operation, by name."""
+        with self._lock:
+            timings = {name: (dict(timing), sorted(timing["recent"])) for name, timing in self._timings.items()}
+        rows = []
+        for name in sorted(timings):
+            timing, recent = timings[name]
+            rows.append({
+                "operation": name,
+                "count": timing["count"],
+                "total_ms": round(timing["total"] * 1000, 3),
+                "mean_ms": round(timing["total"] * 1000 / timing["count"], 3),
+                "p50_ms": round(percentile(recent, 50) * 1000, 3),
+                "p95_ms": round(percentile(recent, 95) * 1000, 3),
+                "max_ms": round(timing["max"] * 1000, 3),
+            })
+        return rows
+
+    def dump(self, path):
+        """Write the timings and captured profile reports to a JSON file."""
+        with open(path, "w") as f:
+            json.dump({
+                "enabled": self.enabled,
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "operations": self.report(),
+                "profiles": dict(self.profiles),
+            }, f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+        self.profiles.clear()
+
+    def _start_profile(self, name):
+        with self._lock:
+            if self._capture != name:
+                return None
+            self._capture = None
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return None
+        return profiler
+
+    def _store_profile(self, name, profiler):
+        import pstats
+
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        self.profiles[name] = out.getvalue()
+
+
+def instrumented(name):
+    """Decorate a method so its runs are measured as name by self.instruments."""
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instruments.measure(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
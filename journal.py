@@ -0,0 +1,259 @@
+import json
+import os
+import threading
+import time
+
+from textstore import TextStore, unpack_papers, write_texts
+
+SNAPSHOT_VERSION = 2
+COMPACT_THRESHOLD = 4 * 1024 * 1024  # Journal size in bytes that triggers a compaction
+
+
+def texts_path(path, name):
+    return os.path.join(os.path.dirname(path), name)
+
+
+def _load_snapshot(path):
+    """Return the (id, paper) pairs of a snapshot and the name of its text file, if any."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return [], None
+    if isinstance(data, list):
+        return list(enumerate(data, start=1)), None
+    papers, name = data["papers"], data.get("texts")
+    if name is not None:
+        papers = unpack_papers(papers, TextStore(texts_path(path, name)))
+    return list(zip(data["ids"], papers)), name
+
+
+def read_snapshot(path):
+    """Return the (id, paper) pairs of a snapshot file, or [] if it doesn't exist.
+
+    Summaries and notes are read from the snapshot's text file when first
+    accessed (see PaperRecord). Plain JSON lists of papers (the format written
+    by Save and Backup) and version 1 snapshots are accepted too; the former
+    get sequential IDs.
+    """
+    return _load_snapshot(path)[0]
+
+
+def write_snapshot(path, items):
+    """Atomically replace path with a snapshot of the given (id, paper) pairs.
+
+    Summaries and notes go to a new text file next to it, so papers loaded
+    from the previous snapshot can still read theirs. Returns that file's name.
+    """
+    name = "%s.%x.text" % (os.path.basename(path), time.time_ns())
+    papers = write_texts(texts_path(path, name), [paper for _, paper in items])
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump({
+            "version": SNAPSHOT_VERSION,
+            "ids": [paper_id for paper_id, _ in items],
+            "papers": papers,
+            "texts": name
+        }, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return name
+
+
+def remove_stale_texts(path, keep):
+    """Delete text files left behind by earlier snapshots of path."""
+    directory = os.path.dirname(path) or "."
+    prefix = os.path.basename(path) + "."
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(".text") and name != keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                # Still open elsewhere (e.g. on Windows); retried on the next load
+                pass
+
+
+def replay(path, papers):
+    """Apply the records of a journal file to papers, a dict of ID to paper.
+
+    Records are full-state upserts and deletes, so replaying one that is
+    already reflected in the snapshot is harmless. A torn last line left by
+    a crash is ignored. Returns the length in bytes of the valid part.
+    """
+    valid = 0
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return valid
+    with f:
+        for line in f:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete record")
+                record = json.loads(line)
+            except ValueError:
+                break
+            valid += len(line)
+            op = record["op"]
+            if op == "clear":
+                papers.clear()
+            elif op in ("add", "update"):
+                papers[record["id"]] = record["paper"]
+            elif op == "delete":
+                papers.pop(record["id"], None)
+    return valid
+
+
+def read_library(snapshot_path, journal_path=None):
+    """Return the (id, paper) pairs of a library in ID order without opening it for writing."""
+    journal_path = journal_path or snapshot_path + ".journal"
+    papers = dict(read_snapshot(snapshot_path))
+    replay(journal_path + ".old", papers)
+    replay(journal_path, papers)
+    return sorted(papers.items())
+
+
+class Journal:
+    """Append-only change log for a PaperStore with background compaction.
+
+    Every add/edit/delete is appended to the journal as one JSON line and
+    fsynced, so a write costs O(change) and a crash loses at most the edit in
+    flight. load() rebuilds the library from the last snapshot plus the
+    journal; read(), attach() and add_loaded() do the same in steps, so a
+    GUI can parse on a worker thread and add the papers in batches. Once the journal grows past the threshold it is rotated and the
+    full snapshot is rewritten on a background thread.
+    """
+
+    def __init__(self, snapshot_path="autosave.json", journal_path=None, threshold=COMPACT_THRESHOLD):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path + ".journal"
+        self.rotated_path = self.journal_path + ".old"
+        self.threshold = threshold
+        self._file = None
+        self._store = None
+        self._in_batch = False
+        self._compaction = None
+        self._texts_name = None
+        self._loading = False
+        self._paused = False
+
+    def read(self):
+        """Return the library's (id, paper) pairs in ID order, repairing the files after a crash.
+
+        Only touches files, so it may run on a worker thread before attach().
+        """
+        items, self._texts_name = _load_snapshot(self.snapshot_path)
+        papers = dict(items)
+        # A rotated journal only survives if a compaction was interrupted
+        replay(self.rotated_path, papers)
+        valid = replay(self.journal_path, papers)
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > valid:
+            # Drop a torn record so new ones don't get appended to it
+            os.truncate(self.journal_path, valid)
+
+        items = sorted(papers.items())
+        if os.path.exists(self.rotated_path):
+            # Finish the interrupted compaction before logging anything new
+            self._texts_name = write_snapshot(self.snapshot_path, items)
+            open(self.journal_path, "w").close()
+            os.remove(self.rotated_path)
+        remove_stale_texts(self.snapshot_path, self._texts_name)
+        return items
+
+    def load(self, store):
+        """Load the snapshot and journal into store and start logging its changes."""
+        items = self.read()
+        store.load([paper for _, paper in items], [paper_id for paper_id, _ in items])
+        self.attach(store)
+
+    def attach(self, store, loading=False):
+        """Start logging the changes of store.
+
+        With loading=True the papers returned by read() are still being added
+        with add_loaded(); compaction waits for finish_loading() so it never
+        snapshots a partly loaded library.
+        """
+        self._loading = loading
+        self._open()
+        store.subscribe(self.on_change)
+        self._store = store
+
+    def add_loaded(self, items):
+        """Add (id, paper) pairs returned by read() to the store without logging them again."""
+        self._paused = True
+        try:
+            with self._store.batch():
+                for paper_id, paper in items:
+                    self._store.add_paper(paper, paper_id)
+        finally:
+            self._paused = False
+
+    def finish_loading(self):
+        self._loading = False
+        if self._file is not None and self._file.tell() > self.threshold:
+            self.compact()
+
+    def close(self):
+        if self._store is not None:
+            self._store.unsubscribe(self.on_change)
+            self._store = None
+        if self._compaction is not None:
+            self._compaction.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def on_change(self, event, paper_id, old, new):
+        if self._paused:
+            return
+        if event == "begin":
+            self._in_batch = True
+            return
+        if event == "commit":
+            self._in_batch = False
+            self._sync()
+            return
+
+        if event == "clear":
+            record = {"op": "clear"}
+        elif event == "delete":
+            record = {"op": "delete", "id": paper_id}
+        else:
+            record = {"op": event, "id": paper_id, "paper": new}
+        self._file.write(json.dumps(record, default=dict) + "\n")
+        if not self._in_batch:
+            self._sync()
+
+    def compact(self, wait=False):
+        """Fold the journal into a fresh snapshot, writing it on a background thread."""
+        # Still loading, still running, or a failed run left its rotated journal behind
+        if self._loading or os.path.exists(self.rotated_path):
+            return
+        # Papers are replaced rather than mutated by the store, so this list of
+        # references stays consistent while the worker serializes it.
+        items = self._store.items()
+
+        self._file.close()
+        os.replace(self.journal_path, self.rotated_path)
+        self._open()
+
+        self._compaction = threading.Thread(target=self._write_snapshot, args=(items,), daemon=True)
+        self._compaction.start()
+        if wait:
+            self._compaction.join()
+
+    def _write_snapshot(self, items):
+        self._texts_name = write_snapshot(self.snapshot_path, items)
+        os.remove(self.rotated_path)
+        # Loaded papers may still read the previous text file, which POSIX keeps readable after deletion
+        remove_stale_texts(self.snapshot_path, self._texts_name)
+
+    def _open(self):
+        self._file = open(self.journal_path, "a")
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self._file.tell() > self.threshold:
+            self.compact()
@@ -1,8 +1,15 @@
-import tkinter as tk
-from gui import LiteratureReviewApp
 import os
+import sys
 
 def main():
+    # Any arguments select the headless command-line interface
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main())
+
+    import tkinter as tk
+    from gui import LiteratureReviewApp
+
     root = tk.Tk()
 
     # Load the icon
@@ -17,4 +24,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,66 @@
+import re
+import unicodedata
+
+_AND_RE = re.compile(r"\s+and\s+|\s*&\s*")
+_INITIALS_RE = re.compile(r"^(?:[A-Z]\.?[\s-]*)+$")
+_ET_AL_RE = re.compile(r"\s*\bet\.?\s+al\.?$", re.IGNORECASE)
+_SURNAME_RE = re.compile(r"^(?:[a-z]+\s+)*\S+$")  # "Lee" or "van der Berg", but not "Ann Lee"
+_INITIAL_RE = re.compile(r"(?:^|[\s.-])[A-Z](?:\.|$|(?=[\s-]))")
+
+
+def _flip(name):
+    # "Lee, Ann" -> "Ann Lee"
+    last, _, first = name.partition(",")
+    return f"{first.strip()} {last.strip()}".strip()
+
+
+def parse_authors(authors):
+    """Split an authors field into names.
+
+    Accepts the "Ann Lee, Bob Smith" form typed in Add Paper, the
+    "Lee, Ann and Smith, Bob" form of BibTeX and RIS imports, ";"-separated
+    lists and "Lee, A., Smith, B." lists of surnames with initials. Two
+    comma-separated parts are one "Last, First" name only when the first is
+    a surname and the second has initials ("Lee, A. B."), or the surname
+    starts with particles ("van der Berg, Jan"); "Lee, Ann" could be two
+    people, so importers store a lone name as "Ann Lee" (see
+    imported_authors()).
+    """
+    if type(authors) is tuple:
+        authors = ", ".join(authors)
+    authors = authors.strip()
+    # Substring checks first; most fields need none of the regular expressions
+    if "al" in authors:
+        authors = _ET_AL_RE.sub("", authors)
+    if not authors:
+        return []
+    if ";" in authors or (("and" in authors or "&" in authors) and _AND_RE.search(authors)):
+        parts = [part for part in re.split(r"\s*;\s*", authors) for part in _AND_RE.split(part)]
+        return [_flip(part) if "," in part else part.strip() for part in parts if part.strip()]
+    parts = [part.strip() for part in authors.split(",") if part.strip()]
+    if len(parts) == 2 and _SURNAME_RE.match(parts[0]) and (" " in parts[0] or _INITIAL_RE.search(parts[1])):
+        # "Lee, A." or "van der Berg, Jan" rather than two people; "Lee, Smith" stays two
+        return [_flip(authors)]
+    if len(parts) % 2 == 0 and all(_INITIALS_RE.match(part) for part in parts[1::2]):
+        return [f"{first} {last}" for last, first in zip(parts[::2], parts[1::2])]
+    return parts
+
+
+def imported_authors(authors):
+    """Return the authors of a BibTeX or RIS record the way parse_authors() reads them.
+
+    Those join "Last, First" names with "and", which is kept, but a single
+    "Lee, Ann" on its own is stored as "Ann Lee".
+    """
+    authors = authors.strip()
+    if authors.count(",") == 1 and not _AND_RE.search(authors):
+        return _flip(authors)
+    return authors
+
+
+def name_key(name):
+    """Normalize a name for matching: no accents, dots or case, single spaces."""
+    if not name.isascii():
+        name = unicodedata.normalize("NFKD", name)
+        name = "".join(char for char in name if not unicodedata.combining(char))
+    return " ".join(name.replace(".", " ").casefold().split())
@@ -0,0 +1,166 @@
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+HEADER_HEIGHT = 25
+
+
+class VirtualPaperList(ttk.Frame):
+    """Paper list that only materializes the rows currently visible.
+
+    The full result is kept as a list of paper IDs; the Treeview holds just
+    enough items to fill the window and is refilled on scroll. Sorting by a
+    column reorders the ID list on the data side, so neither memory nor
+    render time grows with the size of the library.
+    """
+
+    def __init__(self, master, columns, row_values, sort_key):
+        super().__init__(master)
+        self.columns = columns
+        self.row_values = row_values
+        self.sort_key = sort_key
+
+        self.paper_ids = []
+        self.offset = 0
+        self.visible_rows = 1
+        self.sort_column = None
+        self.sort_reverse = False
+        self._selected = set()
+        self._rendering = False
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=1)
+        for column in columns:
+            self.tree.heading(column, text=column, command=lambda column=column: self.sort_by(column))
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", expand=True, fill="both")
+
+        self.row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Up>", lambda event: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda event: self._on_arrow(1))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.scroll(self.visible_rows))
+
+    def set_rows(self, paper_ids, ranked=False):
+        """Show paper_ids, keeping the current sort order and scroll position where possible.
+
+        ranked=True shows the rows in the given order, e.g. by relevance,
+        from the top until a column is sorted again.
+        """
+        self.paper_ids = list(paper_ids)
+        if ranked:
+            self.sort_column = None
+            self.offset = 0
+        elif self.sort_column is not None:
+            self._apply_sort()
+        self._selected.intersection_update(self.paper_ids)
+        self.render()
+
+    def discard(self, paper_id):
+        """Drop a single row, e.g. after its paper was deleted."""
+        if paper_id in self._selected:
+            self._selected.discard(paper_id)
+        try:
+            self.paper_ids.remove(paper_id)
+        except ValueError:
+            return
+        self.render()
+
+    def selection(self):
+        """Return the IDs of the selected papers, including ones scrolled out of view."""
+        return [paper_id for paper_id in self.paper_ids if paper_id in self._selected]
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self._apply_sort()
+        self.offset = 0
+        self.render()
+
+    def scroll(self, rows):
+        self.offset += rows
+        self.render()
+        return "break"
+
+    def see(self, paper_id):
+        """Scroll so paper_id is visible."""
+        if paper_id not in self.paper_ids:
+            return
+        position = self.paper_ids.index(paper_id)
+        if not self.offset <= position < self.offset + self.visible_rows:
+            self.offset = position
+            self.render()
+
+    def render(self):
+        """Refill the Treeview with the rows of the current window."""
+        max_offset = max(0, len(self.paper_ids) - self.visible_rows)
+        self.offset = min(max(0, self.offset), max_offset)
+        window = self.paper_ids[self.offset:self.offset + self.visible_rows]
+
+        # Selection events fired while rebuilding must not clear the tracked selection
+        self._rendering = True
+        try:
+            self.tree.delete(*self.tree.get_children())
+            for paper_id in window:
+                self.tree.insert("", tk.END, iid=str(paper_id), values=self.row_values(paper_id))
+            visible_selection = [str(paper_id) for paper_id in window if paper_id in self._selected]
+            if visible_selection:
+                self.tree.selection_set(visible_selection)
+        finally:
+            self._rendering = False
+
+        if self.paper_ids:
+            self.scrollbar.set(self.offset / len(self.paper_ids), (self.offset + len(window)) / len(self.paper_ids))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _apply_sort(self):
+        key = self.sort_key(self.sort_column)
+        self.paper_ids.sort(key=key, reverse=self.sort_reverse)
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.offset = int(float(args[0]) * len(self.paper_ids))
+            self.render()
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            self.scroll(amount * self.visible_rows if unit == "pages" else amount)
+
+    def _on_resize(self, event):
+        rows = max(1, (event.height - HEADER_HEIGHT) // self.row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    def _on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_select(self, event):
+        if self._rendering:
+            return
+        window = self.paper_ids[self.offset:self.offset + self.visible_rows]
+        self._selected.difference_update(window)
+        self._selected.update(int(item) for item in self.tree.selection())
+
+    def _on_arrow(self, step):
+        # Let the Treeview move the selection inside the window; scroll only at its edges
+        focus = self.tree.focus()
+        if not focus:
+            return None
+        position = self.paper_ids.index(int(focus)) + step
+        if 0 <= position < len(self.paper_ids) and not self.offset <= position < self.offset + self.visible_rows:
+            self._selected = {self.paper_ids[position]}
+            self.scroll(step)
+            self.tree.focus(str(self.paper_ids[position]))
+            return "break"
+        return None
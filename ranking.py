@@ -0,0 +1,200 @@
+import heapq
+import math
+import re
+from collections import Counter
+from operator import itemgetter
+
+from records import with_texts
+from stats import year_key
+from text_index import tokenize
+
+# Integer boosts keep the weighted term frequencies small ints, which Python shares
+FIELD_BOOSTS = {"title": 3, "authors": 2, "categories": 2, "tags": 2, "summary": 1, "notes": 1}
+FIELD_ALIASES = {"author": "authors", "category": "categories", "tag": "tags", "abstract": "summary", "note": "notes"}
+K1 = 1.2
+B = 0.75
+DEFAULT_LIMIT = 50
+
+QUERY_RE = re.compile(r'(?:(\w+):)?("[^"]*"|\S+)')
+YEAR_FILTER_RE = re.compile(r"\d*\.\.\d*|\d+")
+
+
+def field_text(paper, field):
+    value = paper.get(field, "")
+    return " ".join(value) if isinstance(value, list) else str(value)
+
+
+def parse_query(query):
+    """Split a query into free terms, field-restricted terms and filters.
+
+    Supported filters are year:2019, year:2019..2023 (either end may be
+    left open), category:, tag: and doi:, whose values may be quoted.
+    title:, authors:, summary: and notes: restrict a word to that field.
+    Returns (terms, field_terms, filters) with field_terms as (field, token)
+    pairs and filters as a dict.
+    """
+    terms, field_terms, filters = [], [], {}
+    for match in QUERY_RE.finditer(query):
+        name, value = match.group(1), match.group(2).strip('"')
+        field = FIELD_ALIASES.get(name.lower(), name.lower()) if name else None
+        if field == "year" and YEAR_FILTER_RE.fullmatch(value):
+            low, dots, high = value.partition("..")
+            bounds = (year_key(low) if low else None, year_key(high) if high else None)
+            filters["year"] = bounds if dots else (bounds[0], bounds[0])
+        elif field in ("categories", "tags", "doi"):
+            filters[field] = value
+        elif field in FIELD_BOOSTS:
+            for token in tokenize(value):
+                terms.append(token)
+                field_terms.append((field, token))
+        else:
+            terms.extend(tokenize(match.group(0)))
+    return terms, field_terms, filters
+
+
+class RankedIndex:
+    """BM25 relevance ranking over the text fields of a PaperStore.
+
+    Each token maps to {paper_id: weighted term frequency}, where a field's
+    occurrences count as often as its boost, so a title match outweighs a
+    match in the notes; document lengths are weighted the same way. Only
+    the papers containing a query term are scored and the best hits are
+    picked with a heap rather than by sorting every match.
+
+    Like DuplicateIndex, the postings are built on the first search and
+    then kept up to date from store changes.
+    """
+
+    def __init__(self, boosts=FIELD_BOOSTS):
+        self.boosts = boosts
+        self.store = None
+        self._built = False
+        self._postings = {}
+        self._lengths = {}
+        self._total_length = 0
+
+    def attach(self, store):
+        self.store = store
+        self._reset()
+        store.subscribe(self.on_change)
+
+    def on_change(self, event, paper_id, old, new):
+        if not self._built or event in ("begin", "commit"):
+            return
+        if event == "clear":
+            self._reset()
+            return
+        if old is not None:
+            self.remove(paper_id, old)
+        if new is not None:
+            self.add(paper_id, new)
+
+    def term_frequencies(self, paper):
+        # Repeating a field's tokens boost times lets Counter do the weighting in C
+        tokens = []
+        for field, boost in self.boosts.items():
+            tokens += tokenize(field_text(paper, field)) * boost
+        return Counter(tokens)
+
+    def add(self, paper_id, paper):
+        frequencies = self.term_frequencies(paper)
+        postings = self._postings
+        for token, frequency in frequencies.items():
+            token_postings = postings.get(token)
+            if token_postings is None:
+                postings[token] = {paper_id: frequency}
+            else:
+                token_postings[paper_id] = frequency
+        length = sum(frequencies.values())
+        self._lengths[paper_id] = length
+        self._total_length += length
+
+    def remove(self, paper_id, paper):
+        for token in self.term_frequencies(paper):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(paper_id, None)
+            if not postings:
+                del self._postings[token]
+        self._total_length -= self._lengths.pop(paper_id, 0)
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Return up to limit paper IDs matching query, best first.
+
+        Papers match if they pass every filter and contain at least one
+        term. A query with filters only returns the matches in insertion
+        order; limit=None returns every match.
+        """
+        self._ensure_built()
+        terms, field_terms, filters = parse_query(query)
+        allowed = self._filter(filters)
+        if not terms:
+            paper_ids = self.store.ids() if allowed is None else sorted(allowed)
+            return paper_ids if limit is None else paper_ids[:limit]
+
+        scores = self._scores(set(terms), allowed)
+        if not field_terms:
+            if limit is None:
+                ranked = sorted(scores.items(), key=itemgetter(1), reverse=True)
+            else:
+                ranked = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            return [paper_id for paper_id, _ in ranked]
+
+        # Field restrictions need the paper's text, so check hits best first until enough pass
+        heap = [(-score, paper_id) for paper_id, score in scores.items()]
+        heapq.heapify(heap)
+        results = []
+        while heap and (limit is None or len(results) < limit):
+            paper_id = heapq.heappop(heap)[1]
+            paper = self.store.get(paper_id)
+            if all(token in tokenize(field_text(paper, field)) for field, token in field_terms):
+                results.append(paper_id)
+        return results
+
+    def _scores(self, terms, allowed):
+        count = len(self._lengths)
+        average_length = self._total_length / count if count else 1.0
+        lengths = self._lengths
+        scores = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for paper_id, frequency in postings.items():
+                if allowed is not None and paper_id not in allowed:
+                    continue
+                norm = K1 * (1 - B + B * lengths[paper_id] / average_length)
+                scores[paper_id] = scores.get(paper_id, 0.0) + idf * frequency * (K1 + 1) / (frequency + norm)
+        return scores
+
+    def _filter(self, filters):
+        """Return the set of IDs passing the filters, or None if there are none."""
+        if not filters:
+            return None
+        allowed = None
+        if "year" in filters:
+            low, high = filters["year"]
+            allowed = set()
+            for year in self.store.years():
+                key = year_key(year)
+                if isinstance(key, int) and (low is None or low <= key) and (high is None or key <= high):
+                    allowed |= self.store.ids_for_year(year)
+        if "doi" in filters:
+            doi_ids = self.store.ids_for_doi(filters["doi"])
+            allowed = doi_ids if allowed is None else allowed & doi_ids
+        return set(self.store.filter(category=filters.get("categories"), tag=filters.get("tags"), within=allowed))
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        for paper_id, paper in with_texts(self.store.items()):
+            self.add(paper_id, paper)
+        self._built = True
+
+    def _reset(self):
+        self._built = False
+        self._postings = {}
+        self._lengths = {}
+        self._total_length = 0
@@ -0,0 +1,209 @@
+import hashlib
+import sys
+from collections import ChainMap
+from collections.abc import Mapping
+from itertools import islice
+
+FIELDS = ["title", "authors", "year", "doi", "categories", "tags", "summary", "notes"]
+LIST_FIELDS = ("categories", "tags")
+TEXT_FIELDS = ("summary", "notes")
+TEXT_CHUNK = 1000  # Papers whose lazy texts with_texts() reads in one go
+_FIELD_SET = frozenset(FIELDS)
+
+_MISSING = object()
+_years = {}
+
+
+def split_list(value):
+    """Split a comma-separated string such as "ml, nlp" into its stripped, non-empty items."""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _intern_year(year):
+    # Canonical numeric years are kept as one shared int each, anything else as an interned string
+    year = str(year).strip()
+    if year.isdigit() and str(int(year)) == year:
+        return _years.setdefault(year, int(year))
+    return sys.intern(year)
+
+
+def _intern_authors(authors):
+    # "A, B" becomes a tuple of interned names, so each author is stored once per library
+    if type(authors) is not str:
+        return authors
+    names = authors.split(", ")
+    return sys.intern(authors) if len(names) == 1 else tuple(map(sys.intern, names))
+
+
+def _digest(values):
+    # Surrounding whitespace is ignored, as the store's indexes do for years and DOIs
+    parts = []
+    for value in values:
+        if value is _MISSING:
+            value = ""
+        parts.append("\x1e".join(value) if type(value) in (list, tuple) else str(value).strip())
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+
+
+def paper_digest(paper):
+    """Return a 16-byte digest of a paper's fields; equal papers have equal digests in any library."""
+    if type(paper) is PaperRecord:
+        return paper.digest()
+    return _digest([paper.get(field, "") for field in FIELDS])
+
+
+def _intern_list(values):
+    # A "ml, nlp" string (e.g. hand-edited JSON) is split like the importers do, not into characters
+    if isinstance(values, str):
+        values = split_list(values)
+    return tuple(sys.intern(value) if type(value) is str else value for value in values) if values else ()
+
+
+class PaperRecord(Mapping):
+    """Compact, read-only paper that behaves like the paper dict it was made from.
+
+    The fields live in slots instead of a per-paper dict, categories, tags
+    and the names in an "A, B" authors string are tuples of interned
+    strings shared across the library and numeric years are shared ints.
+    Summary and notes may be TextRefs into a snapshot's text file, read when
+    accessed (see textstore). Reading a field returns what the dict held:
+    years come back as strings, authors as the original string and lists as
+    fresh lists, so callers may modify them freely.
+
+    Code that scans many papers can read the stored values with raw(), e.g.
+    record.raw("year", "") (an int when numeric) and record.raw("tags", ())
+    (a tuple), skipping those conversions. The attributes themselves hold a
+    sentinel for missing fields, so don't read them directly.
+    """
+
+    __slots__ = tuple(FIELDS) + ("_extra", "_digest")
+
+    def __init__(self, paper):
+        # Summary and notes are taken unresolved from dicts made by textstore.unpack_papers
+        get = paper.get
+        self.title = get("title", _MISSING)
+        self.authors = _intern_authors(get("authors", _MISSING))
+        year = get("year", _MISSING)
+        self.year = year if year is _MISSING else _intern_year(year)
+        self.doi = get("doi", _MISSING)
+        categories = get("categories", _MISSING)
+        self.categories = categories if categories is _MISSING else _intern_list(categories)
+        tags = get("tags", _MISSING)
+        self.tags = tags if tags is _MISSING else _intern_list(tags)
+        self.summary = get("summary", _MISSING)
+        self.notes = get("notes", _MISSING)
+        self._extra = {key: paper[key] for key in paper if key not in _FIELD_SET} or None
+        self._digest = None
+
+    def raw(self, key, default=None):
+        """Return a field as stored (int years, tuples, unresolved TextRefs)."""
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        return self._extra.get(key, default) if self._extra else default
+
+    def stored_values(self):
+        return [self.raw(key) for key in self]
+
+    def digest(self):
+        """Return paper_digest() of the record, computed on first use since records never change."""
+        if self._digest is None:
+            authors = self.authors
+            self._digest = _digest([
+                self.title, ", ".join(authors) if type(authors) is tuple else authors, self.year, self.doi,
+                self.categories, self.tags, self._text(self.summary), self._text(self.notes),
+            ])
+        return self._digest
+
+    def _text(self, value):
+        return value.resolve() if type(value) is not str and hasattr(value, "resolve") else value
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is _MISSING:
+                raise KeyError(key)
+            if key == "year":
+                return value if type(value) is str else str(value)
+            if key == "authors":
+                return value if type(value) is not tuple else ", ".join(value)
+            if key in LIST_FIELDS:
+                return list(value)
+            if key in TEXT_FIELDS and type(value) is not str and hasattr(value, "resolve"):
+                return value.resolve()
+            return value
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not _MISSING
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self):
+        for key in FIELDS:
+            if getattr(self, key) is not _MISSING:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def __repr__(self):
+        return f"PaperRecord({dict(self.items())!r})"
+
+
+def with_texts(items, chunk_size=TEXT_CHUNK):
+    """Yield the (id, paper) pairs of items with their lazy summaries and notes read in bulk.
+
+    Meant for indexes that scan every paper: the texts of a chunk that live
+    in the same file or database are read with one read_many() call on
+    their source (TextStore, RowTexts) instead of one lookup per field;
+    other lazy values are resolved one by one.
+    Papers with lazy texts come back as read-only views holding the texts,
+    so keep the originals rather than the views.
+    """
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        texts = [{} for _ in chunk]
+        sources = {}
+        for position, (_, paper) in enumerate(chunk):
+            for field in TEXT_FIELDS:
+                value = paper.raw(field, "") if type(paper) is PaperRecord else paper.get(field, "")
+                if type(value) is str or not hasattr(value, "resolve"):
+                    continue
+                source = getattr(value, "texts", None)
+                if hasattr(source, "read_many"):
+                    sources.setdefault(source, []).append((position, field, value))
+                else:
+                    texts[position][field] = value.resolve()
+        for source, refs in sources.items():
+            for (position, field, _), text in zip(refs, source.read_many([ref for _, _, ref in refs])):
+                texts[position][field] = text
+        for (paper_id, paper), resolved in zip(chunk, texts):
+            yield paper_id, ChainMap(resolved, paper) if resolved else paper
+
+
+def compact(paper):
+    """Return paper as a PaperRecord, reusing it if it already is one."""
+    return paper if type(paper) is PaperRecord else PaperRecord(paper)
@@ -0,0 +1,323 @@
+import heapq
+import json
+import math
+import os
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from records import with_texts
+from text_index import tokenize
+
+INDEX_VERSION = 2
+NUM_FEATURES = 1 << 20  # Tokens are hashed into this many vector dimensions
+MAX_TERMS = 24  # Strongest features kept per paper
+FIELD_WEIGHTS = {"title": 2, "tags": 2, "summary": 1}
+DEFAULT_LIMIT = 10
+
+# Arrays stored in an index file after its JSON header line, in this order
+_ARRAYS = [
+    ("df_features", "I"), ("df_counts", "I"), ("ids", "I"), ("fingerprints", "I"), ("offsets", "I"),
+    ("features", "I"), ("weights", "f"), ("keys", "I"), ("key_offsets", "I"), ("posting_ids", "I"),
+    ("posting_weights", "f"),
+]
+
+
+def index_path(library_path):
+    """Return where the related-papers index of a library file is kept."""
+    return os.path.splitext(library_path)[0] + ".related"
+
+
+class _FeatureCache(dict):
+    """Token -> feature number, hashing each distinct token only once."""
+
+    def __missing__(self, token):
+        # crc32 rather than hash(), which is salted per process, so saved vectors stay valid
+        value = self[token] = zlib.crc32(token.encode("utf-8")) & (NUM_FEATURES - 1)
+        return value
+
+
+_features = _FeatureCache()
+
+
+def feature_counts(paper):
+    tokens = []
+    for field, weight in FIELD_WEIGHTS.items():
+        value = paper.get(field, "")
+        tokens += tokenize(" ".join(value) if isinstance(value, list) else value) * weight
+    return Counter(map(_features.__getitem__, tokens))
+
+
+_logs = [0.0]
+
+
+def log_table(size):
+    """Return a list whose item i is log(i) for 1 <= i <= size."""
+    if len(_logs) <= size:
+        _logs.extend(math.log(i) for i in range(len(_logs), size + 1))
+    return _logs
+
+
+def fingerprint(paper):
+    text = "\x1f".join([paper.get("title", ""), paper.get("summary", ""), "\x1e".join(paper.get("tags", []))])
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class RelatedIndex:
+    """Find papers similar to a given one using hashed TF-IDF vectors.
+
+    Each paper becomes a sparse vector over hashed title, tag and summary
+    tokens, pruned to its MAX_TERMS strongest features and normalized, so a
+    lookup only visits papers sharing one of those features and scores
+    them by cosine similarity.
+
+    The index is saved as flat arrays (vectors by paper and postings by
+    feature) that load without any per-paper work. Changes made since then
+    are kept in small dicts on top and the arrays' stale entries are masked
+    out; save() merges both again. On first use the saved vectors are
+    checked against a fingerprint of each paper and only papers that
+    changed, e.g. from the command line, are recomputed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.store = None
+        self._reset()
+
+    def attach(self, store):
+        self.store = store
+        store.subscribe(self.on_change)
+
+    def use_path(self, path):
+        """Switch to another library's index file; it is loaded on next use."""
+        self.path = path
+        self._reset()
+
+    def on_change(self, event, paper_id, old, new):
+        if not self._built or event in ("begin", "commit"):
+            return
+        if event == "clear":
+            self._reset()
+            return
+        if old is not None:
+            self._remove(paper_id, feature_counts(old))
+        if new is not None:
+            self._add(paper_id, new)
+
+    def related(self, paper_id, limit=DEFAULT_LIMIT):
+        """Return up to limit (paper_id, similarity) pairs for the papers most similar to paper_id."""
+        self._ensure_built()
+        vector = self._vector(paper_id)
+        if vector is None:
+            return []
+        features, weights = vector
+        dead = self._dead
+        scores = {}
+        for feature_id, weight in zip(features, weights):
+            position = bisect_left(self._base["keys"], feature_id)
+            if position < len(self._base["keys"]) and self._base["keys"][position] == feature_id:
+                start, end = self._base["key_offsets"][position], self._base["key_offsets"][position + 1]
+                for other, other_weight in zip(self._base["posting_ids"][start:end],
+                                               self._base["posting_weights"][start:end]):
+                    if other not in dead:
+                        scores[other] = scores.get(other, 0.0) + weight * other_weight
+            for other, other_weight in self._postings.get(feature_id, {}).items():
+                scores[other] = scores.get(other, 0.0) + weight * other_weight
+        scores.pop(paper_id, None)
+        return [(other, round(score, 4)) for other, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1])]
+
+    def save(self):
+        """Write the index to its file if it changed since it was loaded."""
+        if not self._built or not self._dirty or self.path is None:
+            return
+        ids, fingerprints, offsets, features, weights = array("I"), array("I"), array("I", [0]), array("I"), array("f")
+        postings = {}
+        for paper_id in sorted(self._live_ids()):
+            paper_features, paper_weights = self._vector(paper_id)
+            ids.append(paper_id)
+            fingerprints.append(self._fingerprint(paper_id))
+            features.extend(paper_features)
+            weights.extend(paper_weights)
+            offsets.append(len(features))
+            for feature_id, weight in zip(paper_features, paper_weights):
+                postings.setdefault(feature_id, []).append((paper_id, weight))
+        keys, key_offsets, posting_ids, posting_weights = array("I"), array("I", [0]), array("I"), array("f")
+        for feature_id in sorted(postings):
+            keys.append(feature_id)
+            for paper_id, weight in postings[feature_id]:
+                posting_ids.append(paper_id)
+                posting_weights.append(weight)
+            key_offsets.append(len(posting_ids))
+
+        # Document frequencies are sparse: only features found in some paper are written
+        df_features = array("I", sorted(self._df))
+        df_counts = array("I", map(self._df.__getitem__, df_features))
+        arrays = {
+            "df_features": df_features, "df_counts": df_counts, "ids": ids, "fingerprints": fingerprints,
+            "offsets": offsets, "features": features, "weights": weights, "keys": keys, "key_offsets": key_offsets,
+            "posting_ids": posting_ids, "posting_weights": posting_weights,
+        }
+        header = {
+            "version": INDEX_VERSION, "byteorder": sys.byteorder, "features": NUM_FEATURES,
+            "count": self._count, "lengths": [len(arrays[name]) for name, _ in _ARRAYS],
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for name, _ in _ARRAYS:
+                arrays[name].tofile(f)
+        os.replace(temp_path, self.path)
+        self._base = arrays
+        self._base_positions = None
+        self._dead = set()
+        self._vectors = {}
+        self._postings = {}
+        self._fingerprints = {}
+        self._dirty = False
+
+    def _reset(self):
+        self._built = False
+        self._dirty = False
+        self._df = {}  # Feature -> number of papers having it, for the features of at least one paper
+        self._count = 0
+        self._base = {name: array(typecode) for name, typecode in _ARRAYS}
+        self._base["offsets"].append(0)
+        self._base["key_offsets"].append(0)
+        self._base_positions = None
+        self._dead = set()
+        self._vectors = {}
+        self._postings = {}
+        self._fingerprints = {}
+
+    def _load(self):
+        """Load the saved arrays; returns False if there is no usable index file."""
+        if self.path is None:
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                if (header.get("version") != INDEX_VERSION or header.get("byteorder") != sys.byteorder
+                        or header.get("features") != NUM_FEATURES):
+                    return False
+                arrays = {}
+                for (name, typecode), length in zip(_ARRAYS, header["lengths"]):
+                    values = array(typecode)
+                    values.fromfile(f, length)
+                    arrays[name] = values
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+        self._df = dict(zip(arrays["df_features"], arrays["df_counts"]))
+        self._count = header["count"]
+        self._base = arrays
+        self._base_positions = None
+        return True
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        if not self._load():
+            self._reset()
+        # Reconcile the saved vectors with the store's current papers
+        base_ids = self._base["ids"]
+        base_fingerprints = dict(zip(base_ids, self._base["fingerprints"]))
+        stale = [paper_id for paper_id in base_ids if paper_id not in self.store]
+        changed = []
+        for paper_id, paper in with_texts(self.store.items()):
+            saved = base_fingerprints.get(paper_id)
+            if saved is None:
+                changed.append((paper_id, paper))
+            elif saved != fingerprint(paper):
+                stale.append(paper_id)
+                changed.append((paper_id, paper))
+        # Only the pruned features of papers changed elsewhere are known, so their document frequencies are approximate
+        for paper_id in stale:
+            features, _ = self._vector(paper_id)
+            self._remove(paper_id, dict.fromkeys(features, 1))
+        counts = {}
+        for paper_id, paper in changed:
+            counts[paper_id] = feature_counts(paper)
+            self._count_features(counts[paper_id], 1)
+        for paper_id, paper in changed:
+            self._store_vector(paper_id, paper, counts[paper_id])
+        self._built = True
+        self._dirty = self._dirty or bool(stale or changed)
+
+    def _live_ids(self):
+        return [paper_id for paper_id in self._base["ids"] if paper_id not in self._dead] + list(self._vectors)
+
+    def _base_position(self, paper_id):
+        if self._base_positions is None:
+            self._base_positions = {paper_id: position for position, paper_id in enumerate(self._base["ids"])}
+        return self._base_positions.get(paper_id)
+
+    def _vector(self, paper_id):
+        if paper_id in self._vectors:
+            return self._vectors[paper_id]
+        if paper_id in self._dead:
+            return None
+        position = self._base_position(paper_id)
+        if position is None:
+            return None
+        start, end = self._base["offsets"][position], self._base["offsets"][position + 1]
+        return self._base["features"][start:end], self._base["weights"][start:end]
+
+    def _fingerprint(self, paper_id):
+        if paper_id in self._fingerprints:
+            return self._fingerprints[paper_id]
+        return self._base["fingerprints"][self._base_position(paper_id)]
+
+    def _count_features(self, counts, delta):
+        df = self._df
+        if delta > 0:
+            for feature_id in counts:
+                df[feature_id] = df.get(feature_id, 0) + 1
+        else:
+            for feature_id in counts:
+                count = df.get(feature_id, 0)
+                if count > 1:
+                    df[feature_id] = count - 1
+                elif count:
+                    del df[feature_id]
+        self._count = max(0, self._count + delta)
+
+    def _add(self, paper_id, paper):
+        counts = feature_counts(paper)
+        self._count_features(counts, 1)
+        self._store_vector(paper_id, paper, counts)
+
+    def _store_vector(self, paper_id, paper, counts):
+        # (1 + log tf) * (log(N + 1) - log(df + 1) + 1), with the logarithms looked up in a table
+        logs = log_table(max(self._count + 1, max(counts.values(), default=1)))
+        df = self._df
+        top = logs[self._count + 1] + 1
+        weighted = heapq.nlargest(MAX_TERMS, [
+            ((1 + logs[count]) * (top - logs[df.get(feature_id, 0) + 1]), feature_id)
+            for feature_id, count in counts.items()
+        ])
+        norm = math.sqrt(sum(weight * weight for weight, _ in weighted)) or 1.0
+        features = tuple(feature_id for _, feature_id in weighted)
+        weights = tuple(weight / norm for weight, _ in weighted)
+        self._vectors[paper_id] = (features, weights)
+        self._fingerprints[paper_id] = fingerprint(paper)
+        for feature_id, weight in zip(features, weights):
+            self._postings.setdefault(feature_id, {})[paper_id] = weight
+        self._dirty = True
+
+    def _remove(self, paper_id, counts):
+        vector = self._vectors.pop(paper_id, None)
+        if vector is not None:
+            for feature_id in vector[0]:
+                postings = self._postings.get(feature_id)
+                if postings is not None:
+                    postings.pop(paper_id, None)
+                    if not postings:
+                        del self._postings[feature_id]
+            self._fingerprints.pop(paper_id, None)
+        elif self._base_position(paper_id) is not None and paper_id not in self._dead:
+            self._dead.add(paper_id)
+        else:
+            return
+        self._count_features(counts, -1)
+        self._dirty = True
@@ -0,0 +1,84 @@
+import heapq
+import itertools
+import json
+import os
+from datetime import datetime
+
+REMINDERS_FILE = "reminders.json"
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+MAX_WAIT_MS = 60 * 60 * 1000  # Tk timers are re-armed at least hourly, so very long waits stay in range
+
+
+def parse_time(text):
+    """Parse a reminder time such as '2024-08-29 10:00', raising ValueError otherwise."""
+    return datetime.strptime(text.strip(), TIME_FORMAT)
+
+
+class ReminderScheduler:
+    """Persistent reminders that fire at their time via a single Tk timer.
+
+    Reminders are kept in a heap ordered by due time and saved to a JSON
+    file, so they survive restarts; ones that came due while the app was
+    closed fire right after start(). Only the earliest reminder has a timer
+    armed, so nothing is polled while waiting.
+    """
+
+    def __init__(self, master, on_due, path=REMINDERS_FILE):
+        self.master = master
+        self.on_due = on_due
+        self.path = path
+        self._heap = []
+        self._counter = itertools.count()
+        self._timer = None
+
+    def start(self):
+        """Load the saved reminders and arm the timer for the next one."""
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            saved = []
+        for reminder in saved:
+            heapq.heappush(self._heap, (reminder["time"], next(self._counter), reminder))
+        self._arm()
+
+    def stop(self):
+        if self._timer is not None:
+            self.master.after_cancel(self._timer)
+            self._timer = None
+
+    def add(self, when, message, paper_id=None):
+        reminder = {"time": when.strftime(TIME_FORMAT), "message": message, "paper_id": paper_id}
+        heapq.heappush(self._heap, (reminder["time"], next(self._counter), reminder))
+        self._save()
+        self._arm()
+        return reminder
+
+    def pending(self):
+        return [reminder for _, _, reminder in sorted(self._heap)]
+
+    def _arm(self):
+        self.stop()
+        if not self._heap:
+            return
+        delay = (parse_time(self._heap[0][0]) - datetime.now()).total_seconds() * 1000
+        self._timer = self.master.after(int(min(max(delay, 0), MAX_WAIT_MS)), self._fire)
+
+    def _fire(self):
+        self._timer = None
+        now = datetime.now().strftime(TIME_FORMAT)
+        due = []
+        # TIME_FORMAT sorts chronologically as text
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        if due:
+            self._save()
+        self._arm()
+        for reminder in due:
+            self.on_due(reminder)
+
+    def _save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.pending(), f, indent=2)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,221 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from importers import make_paper
+from records import split_list
+from stats import LibraryStats
+from text_index import TextIndex
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+MAX_BODY_SIZE = 1024 * 1024
+
+REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+TEXT_FIELDS = ("title", "authors", "doi", "summary", "notes")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def paper_from_json(data, current=None):
+    """Build a paper from a JSON object, filling missing fields from current."""
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Expected a JSON object")
+    fields = dict(current or {})
+    fields.update(data)
+    fields.pop("id", None)
+    for name in TEXT_FIELDS:
+        if not isinstance(fields.get(name, ""), str):
+            raise HTTPError(400, f"{name} must be a string")
+    year = fields.get("year", "")
+    if type(year) is not int and not isinstance(year, str):
+        raise HTTPError(400, "year must be a string or an integer")
+    lists = {}
+    for name in ("categories", "tags"):
+        value = fields.get(name, [])
+        if isinstance(value, str):
+            lists[name] = split_list(value)
+        elif isinstance(value, list) and all(isinstance(item, str) for item in value):
+            lists[name] = value
+        else:
+            raise HTTPError(400, f"{name} must be a list of strings or a comma-separated string")
+    try:
+        return make_paper(
+            fields.get("title", ""), fields.get("authors", ""), year, fields.get("doi", ""),
+            lists["categories"], lists["tags"], fields.get("summary", ""), fields.get("notes", "")
+        )
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+
+
+class LibraryServer:
+    """Answer search, filter, stats and CRUD requests for a PaperStore over HTTP/JSON.
+
+    The store and its indexes are loaded once and shared by every client.
+    Requests are handled on the event loop thread one at a time, so no
+    locking is needed; each one costs only index lookups plus a page of
+    results. Changes go through the store, so an attached Journal or
+    SQLiteBackend persists them as it does for the GUI.
+
+        GET    /papers?q=&year=&category=&tag=&offset=&limit=
+        POST   /papers
+        GET    /papers/<id>
+        PUT    /papers/<id>     (fields left out keep their current values)
+        DELETE /papers/<id>
+        GET    /stats
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.text_index = TextIndex()
+        self.text_index.attach(store)
+        self.stats = LibraryStats()
+        self.stats.attach(store)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, close=True)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                length = headers.get("content-length", "0")
+                if not length.isdigit():
+                    await self._respond(writer, 400, {"error": "Invalid Content-Length"}, close=True)
+                    break
+                length = int(length)
+                try:
+                    if length > MAX_BODY_SIZE:
+                        raise HTTPError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                    # An unread body would be parsed as the next request
+                    close = close or e.status == 413
+                except Exception as e:
+                    # A bug in one request shouldn't drop the connection without a reply
+                    status, payload, close = 500, {"error": f"Internal error: {str(e)}"}, True
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, close=False):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    def dispatch(self, method, target, body):
+        """Route a request and return (status, JSON-serializable payload)."""
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [unquote(part) for part in url.path.split("/") if part]
+
+        if parts == ["papers"]:
+            if method == "GET":
+                return 200, self.list_papers(params)
+            if method == "POST":
+                paper_id = self.store.add_paper(paper_from_json(self._json(body)))
+                return 201, self._paper(paper_id)
+        elif len(parts) == 2 and parts[0] == "papers":
+            paper_id = self._paper_id(parts[1])
+            if method == "GET":
+                return 200, self._paper(paper_id)
+            if method == "PUT":
+                self.store.update_paper(paper_id, paper_from_json(self._json(body), self.store.get(paper_id)))
+                return 200, self._paper(paper_id)
+            if method == "DELETE":
+                self.store.delete_paper(paper_id)
+                return 200, {"id": paper_id}
+        elif parts == ["stats"]:
+            if method == "GET":
+                return 200, self.stats_summary()
+        else:
+            raise HTTPError(404, f"No such resource: {url.path}")
+        raise HTTPError(405, f"{method} is not supported on {url.path}")
+
+    def list_papers(self, params):
+        offset = self._int_param(params, "offset", 0)
+        limit = min(self._int_param(params, "limit", DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        hits = self.text_index.search(params.get("q", ""))
+        paper_ids = self.store.filter(params.get("year"), params.get("category"), params.get("tag"), within=hits)
+        return {
+            "total": len(paper_ids),
+            "offset": offset,
+            "limit": limit,
+            "papers": [self._paper(paper_id) for paper_id in paper_ids[offset:offset + limit]],
+        }
+
+    def stats_summary(self):
+        return {
+            "total": self.stats.total,
+            "years": self.stats.year_distribution(),
+            "categories": self.stats.category_distribution(),
+            "tags": self.stats.tag_distribution(),
+        }
+
+    def _paper(self, paper_id):
+        return dict(self.store.get(paper_id), id=paper_id)
+
+    def _paper_id(self, text):
+        if not text.isdigit() or int(text) not in self.store:
+            raise HTTPError(404, f"No paper with ID {text}")
+        return int(text)
+
+    def _int_param(self, params, name, default):
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an integer")
+        if value < 0:
+            raise HTTPError(400, f"{name} must not be negative")
+        return value
+
+    def _json(self, body):
+        try:
+            return json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            raise HTTPError(400, "Request body is not valid JSON")
+
+
+async def serve(store, host=DEFAULT_HOST, port=DEFAULT_PORT, started=None):
+    """Serve store until cancelled; started(server) is called once listening."""
+    library_server = LibraryServer(store)
+    server = await asyncio.start_server(library_server.handle_connection, host, port)
+    async with server:
+        if started is not None:
+            started(server)
+        await server.serve_forever()
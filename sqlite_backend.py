@@ -0,0 +1,351 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from records import TEXT_FIELDS
+from text_index import tokenize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    year TEXT NOT NULL,
+    doi TEXT NOT NULL DEFAULT '',
+    categories TEXT NOT NULL DEFAULT '[]',
+    tags TEXT NOT NULL DEFAULT '[]',
+    summary TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS papers_year ON papers (year);
+CREATE INDEX IF NOT EXISTS papers_doi ON papers (doi);
+CREATE TABLE IF NOT EXISTS paper_categories (
+    paper_id INTEGER NOT NULL REFERENCES papers (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    PRIMARY KEY (category, paper_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS paper_tags (
+    paper_id INTEGER NOT NULL REFERENCES papers (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS paper_categories_paper ON paper_categories (paper_id);
+CREATE INDEX IF NOT EXISTS paper_tags_paper ON paper_tags (paper_id);
+"""
+
+# External-content FTS5 table kept in sync with papers by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5 (
+    title, authors, year, summary, notes, content='papers', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts (rowid, title, authors, year, summary, notes)
+    VALUES (new.id, new.title, new.authors, new.year, new.summary, new.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, authors, year, summary, notes)
+    VALUES ('delete', old.id, old.title, old.authors, old.year, old.summary, old.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, authors, year, summary, notes)
+    VALUES ('delete', old.id, old.title, old.authors, old.year, old.summary, old.notes);
+    INSERT INTO papers_fts (rowid, title, authors, year, summary, notes)
+    VALUES (new.id, new.title, new.authors, new.year, new.summary, new.notes);
+END;
+"""
+
+COLUMNS = ["id", "title", "authors", "year", "doi", "categories", "tags", "summary", "notes"]
+LIST_COLUMNS = COLUMNS[:7]  # Read by attach(); summaries and notes are read when accessed
+READ_CHUNK = 500  # Row IDs per query when texts are read in bulk
+
+
+class RowTexts:
+    """Summaries and notes read from a database's papers table on demand.
+
+    Uses its own connection, guarded by a lock, so worker threads such as
+    exports can read texts too. freeze() reads every text into memory
+    before the rows are replaced; they are freed with the last RowTextRef.
+    """
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._frozen = None
+
+    def read(self, paper_id, column):
+        with self._lock:
+            if self._frozen is not None:
+                return self._frozen.get((paper_id, column), "")
+            row = self._connection.execute(f"SELECT {column} FROM papers WHERE id = ?", (paper_id,)).fetchone()
+        return row[0] if row is not None else ""
+
+    def read_many(self, refs):
+        """Return the texts of refs, reading their rows with a few IN queries."""
+        wanted = sorted({ref.paper_id for ref in refs if ref.text is None})
+        rows = {}
+        with self._lock:
+            if self._frozen is None:
+                for start in range(0, len(wanted), READ_CHUNK):
+                    ids = wanted[start:start + READ_CHUNK]
+                    cursor = self._connection.execute(
+                        f"SELECT id, summary, notes FROM papers WHERE id IN ({', '.join('?' * len(ids))})", ids)
+                    rows.update((paper_id, {"summary": summary, "notes": notes})
+                                for paper_id, summary, notes in cursor)
+            frozen = self._frozen
+        texts = []
+        for ref in refs:
+            if ref.text is not None:
+                texts.append(ref.text)
+            elif frozen is not None:
+                texts.append(frozen.get((ref.paper_id, ref.column), ""))
+            else:
+                texts.append(rows.get(ref.paper_id, {}).get(ref.column, ""))
+        return texts
+
+    def freeze(self):
+        with self._lock:
+            if self._frozen is not None:
+                return
+            frozen = {}
+            for paper_id, summary, notes in self._connection.execute("SELECT id, summary, notes FROM papers"):
+                frozen[(paper_id, "summary")] = summary
+                frozen[(paper_id, "notes")] = notes
+            self._frozen = frozen
+            self._connection.close()
+
+
+class RowTextRef:
+    """Summary or notes of one database row, read when resolved.
+
+    The row may change later, so the backend pins the text of a paper it
+    is about to update or delete; papers held in undo history keep theirs.
+    """
+
+    __slots__ = ("texts", "paper_id", "column", "text")
+
+    def __init__(self, texts, paper_id, column):
+        self.texts = texts
+        self.paper_id = paper_id
+        self.column = column
+        self.text = None
+
+    def resolve(self):
+        text = self.text
+        return self.texts.read(self.paper_id, self.column) if text is None else text
+
+    def pin(self):
+        if self.text is None:
+            self.text = self.texts.read(self.paper_id, self.column)
+
+
+class SQLiteBackend:
+    """Single-file SQLite persistence for a PaperStore.
+
+    The database runs in WAL mode. Once attached, every add/edit/delete on
+    the store is written as its own small transaction, and bulk changes made
+    in a store batch share one transaction. Search and filtering can also be
+    answered directly in SQL (FTS5 for the text fields when the SQLite build
+    has it) without loading the library. Papers loaded by attach() read
+    their summaries and notes from the database when accessed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Autocommit mode; transactions are opened explicitly around each change or batch
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+        try:
+            self.connection.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self._store = None
+        self._in_batch = False
+        self._texts = None
+
+    def close(self):
+        # Papers loaded from the database keep reading their texts through RowTexts' own connection
+        if self._store is not None:
+            self._store.unsubscribe(self.on_change)
+            self._store = None
+        self.connection.close()
+
+    def attach(self, store):
+        """Load the database into store and write every later change of store back.
+
+        Only the listed columns are read; summaries and notes become
+        RowTextRefs, so the text of a large library stays on disk.
+        """
+        texts = self._texts = RowTexts(self.path)
+        paper_ids, papers = [], []
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(LIST_COLUMNS)}, summary != '', notes != '' FROM papers ORDER BY id")
+        for row in cursor:
+            paper_id = row[0]
+            paper = self._paper_from_row(row)
+            for index, column in ((7, "summary"), (8, "notes")):
+                paper[column] = RowTextRef(texts, paper_id, column) if row[index] else ""
+            paper_ids.append(paper_id)
+            papers.append(paper)
+        store.load(papers, paper_ids)
+        store.subscribe(self.on_change)
+        self._store = store
+
+    def import_store(self, store):
+        """Replace the database contents with store and keep it in sync from then on."""
+        with self.transaction():
+            self._delete_all()
+            for paper_id, paper in store.items():
+                self._insert(paper_id, paper)
+        store.subscribe(self.on_change)
+        self._store = store
+
+    @contextmanager
+    def transaction(self):
+        if self._in_batch:
+            yield
+            return
+        self.connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def on_change(self, event, paper_id, old, new):
+        if event == "begin":
+            self.connection.execute("BEGIN")
+            self._in_batch = True
+            return
+        if event == "commit":
+            self._in_batch = False
+            self.connection.execute("COMMIT")
+            return
+
+        if event == "clear" and self._texts is not None:
+            self._texts.freeze()
+            self._texts = None
+        elif old is not None:
+            self._pin(old)
+        with self.transaction():
+            if event == "clear":
+                self._delete_all()
+            elif event == "add":
+                self._insert(paper_id, new)
+            elif event == "update":
+                self._update(paper_id, new)
+            elif event == "delete":
+                self.connection.execute("DELETE FROM papers WHERE id = ?", (paper_id,))
+
+    def iter_papers(self, paper_ids=None):
+        """Yield (id, paper) pairs in ID order, streaming from the database."""
+        if paper_ids is None:
+            cursor = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM papers ORDER BY id")
+            for row in cursor:
+                yield row[0], self._paper_from_row(row)
+            return
+        for paper_id in paper_ids:
+            row = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM papers WHERE id = ?", (paper_id,)).fetchone()
+            if row is not None:
+                yield row[0], self._paper_from_row(row)
+
+    def get(self, paper_id):
+        for _, paper in self.iter_papers([paper_id]):
+            return paper
+        return None
+
+    def count(self, query="", year=None, category=None, tag=None):
+        where, params = self._where(query, year, category, tag)
+        return self.connection.execute(f"SELECT COUNT(*) FROM papers{where}", params).fetchone()[0]
+
+    def filter(self, query="", year=None, category=None, tag=None, limit=None, offset=0):
+        """Return the matching (id, paper) pairs in ID order, evaluated entirely in SQL."""
+        where, params = self._where(query, year, category, tag)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM papers{where} ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return [(row[0], self._paper_from_row(row)) for row in self.connection.execute(sql, params)]
+
+    def _where(self, query, year, category, tag):
+        clauses, params = [], []
+        terms = tokenize(query)
+        if terms and self.has_fts:
+            # Every term matches as a prefix, like the in-memory TextIndex
+            clauses.append("id IN (SELECT rowid FROM papers_fts WHERE papers_fts MATCH ?)")
+            params.append(" ".join(f'"{term}"*' for term in terms))
+        else:
+            for term in terms:
+                clauses.append("(title LIKE ? OR authors LIKE ? OR year LIKE ? OR summary LIKE ? OR notes LIKE ?)")
+                params += [f"%{term}%"] * 5
+        if year:
+            clauses.append("year = ?")
+            params.append(str(year))
+        if category:
+            clauses.append("id IN (SELECT paper_id FROM paper_categories WHERE category = ?)")
+            params.append(category)
+        if tag:
+            clauses.append("id IN (SELECT paper_id FROM paper_tags WHERE tag = ?)")
+            params.append(tag)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _insert(self, paper_id, paper):
+        self.connection.execute(
+            f"INSERT INTO papers ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [paper_id] + self._row_values(paper)
+        )
+        self._insert_links(paper_id, paper)
+
+    def _update(self, paper_id, paper):
+        self.connection.execute(
+            f"UPDATE papers SET {', '.join(f'{column} = ?' for column in COLUMNS[1:])} WHERE id = ?",
+            self._row_values(paper) + [paper_id]
+        )
+        self.connection.execute("DELETE FROM paper_categories WHERE paper_id = ?", (paper_id,))
+        self.connection.execute("DELETE FROM paper_tags WHERE paper_id = ?", (paper_id,))
+        self._insert_links(paper_id, paper)
+
+    def _insert_links(self, paper_id, paper):
+        self.connection.executemany(
+            "INSERT INTO paper_categories (paper_id, category) VALUES (?, ?)",
+            [(paper_id, category) for category in set(paper.get("categories", [])) if category]
+        )
+        self.connection.executemany(
+            "INSERT INTO paper_tags (paper_id, tag) VALUES (?, ?)",
+            [(paper_id, tag) for tag in set(paper.get("tags", [])) if tag]
+        )
+
+    def _pin(self, paper):
+        for key in TEXT_FIELDS:
+            value = paper.raw(key)
+            if type(value) is RowTextRef:
+                value.pin()
+
+    def _delete_all(self):
+        self.connection.execute("DELETE FROM paper_categories")
+        self.connection.execute("DELETE FROM paper_tags")
+        self.connection.execute("DELETE FROM papers")
+
+    def _row_values(self, paper):
+        return [
+            paper["title"], paper["authors"], str(paper["year"]), paper.get("doi", ""),
+            json.dumps(paper.get("categories", [])), json.dumps(paper.get("tags", [])),
+            paper.get("summary", ""), paper.get("notes", "")
+        ]
+
+    def _paper_from_row(self, row):
+        return {
+            "title": row[1],
+            "authors": row[2],
+            "year": row[3],
+            "doi": row[4],
+            "categories": json.loads(row[5]),
+            "tags": json.loads(row[6]),
+            "summary": row[7],
+            "notes": row[8]
+        }
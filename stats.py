@@ -0,0 +1,122 @@
+from bisect import bisect_left, insort
+from collections import Counter
+
+
+def year_key(year):
+    """Return the year as an int when possible so years count and sort numerically."""
+    if type(year) is int:
+        return year
+    year = str(year).strip()
+    return int(year) if year.isdigit() else year
+
+
+class LibraryStats:
+    """Year, category and tag aggregates of a PaperStore, maintained incrementally.
+
+    Each change costs O(categories + tags) of the papers involved. Sorted
+    lists of the distinct categories and tags are kept alongside the
+    counters for the filter comboboxes, with a version number that only
+    changes when a value appears or disappears.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.year_counts = Counter()
+        self.category_counts = Counter()
+        self.tag_counts = Counter()
+        self._categories = []
+        self._tags = []
+        self.version = 0
+        self.values_version = 0
+
+    def attach(self, store):
+        self.clear()
+        for paper in store.papers():
+            self.add(paper)
+        store.subscribe(self.on_change)
+
+    def on_change(self, event, paper_id, old, new):
+        if event == "clear":
+            self.clear()
+            return
+        if old is not None:
+            self.remove(old)
+        if new is not None:
+            self.add(new)
+
+    def clear(self):
+        self.total = 0
+        self.year_counts.clear()
+        self.category_counts.clear()
+        self.tag_counts.clear()
+        self._categories = []
+        self._tags = []
+        self.version += 1
+        self.values_version += 1
+
+    # Papers come from the store as PaperRecords, whose stored int years and tuples need no conversion
+    def add(self, paper):
+        self.total += 1
+        self.year_counts[year_key(paper.raw("year", ""))] += 1
+        for category in set(paper.raw("categories", ())):
+            self._increment(self.category_counts, self._categories, category)
+        for tag in set(paper.raw("tags", ())):
+            self._increment(self.tag_counts, self._tags, tag)
+        self.version += 1
+
+    def remove(self, paper):
+        self.total -= 1
+        self._decrement(self.year_counts, None, year_key(paper.raw("year", "")))
+        for category in set(paper.raw("categories", ())):
+            self._decrement(self.category_counts, self._categories, category)
+        for tag in set(paper.raw("tags", ())):
+            self._decrement(self.tag_counts, self._tags, tag)
+        self.version += 1
+
+    def categories(self):
+        return list(self._categories)
+
+    def tags(self):
+        return list(self._tags)
+
+    def year_distribution(self):
+        """Return (year, count) pairs, numeric years first in ascending order."""
+        return sorted(self.year_counts.items(), key=lambda item: (isinstance(item[0], str), item[0]))
+
+    def category_distribution(self):
+        return [(category, self.category_counts[category]) for category in self._categories]
+
+    def tag_distribution(self):
+        return [(tag, self.tag_counts[tag]) for tag in self._tags]
+
+    def summary_text(self):
+        """Return the text shown in the Statistics tab."""
+        if not self.total:
+            return "No papers available."
+        return (
+            f"Total Papers: {self.total}\n"
+            f"Year Distribution:\n"
+            + "\n".join([f"{year}: {count}" for year, count in self.year_distribution()]) + "\n\n"
+            f"Category Distribution:\n"
+            + "\n".join([f"{category}: {count}" for category, count in self.category_distribution()]) + "\n\n"
+            f"Tag Distribution:\n"
+            + "\n".join([f"{tag}: {count}" for tag, count in self.tag_distribution()])
+        )
+
+    def _increment(self, counter, values, value):
+        if not value:
+            return
+        counter[value] += 1
+        if counter[value] == 1:
+            insort(values, value)
+            self.values_version += 1
+
+    def _decrement(self, counter, values, value):
+        if value not in counter:
+            return
+        counter[value] -= 1
+        if counter[value] == 0:
+            del counter[value]
+            if values is not None:
+                del values[bisect_left(values, value)]
+                self.values_version += 1
@@ -0,0 +1,192 @@
+from collections import defaultdict
+from contextlib import contextmanager
+
+from records import compact
+
+
+class PaperStore:
+    """GUI-independent paper collection with stable IDs and secondary indexes.
+
+    Papers are keyed by an integer ID that never changes for the lifetime
+    of the store and kept as compact PaperRecords, which read like the
+    dicts they were made from. IDs are handed out in increasing order, so
+    sorting by ID gives insertion order. The year, category, tag and DOI indexes are
+    kept up to date by add_paper/update_paper/delete_paper, so lookups only
+    touch the matching papers.
+
+    Other components (search indexes, views, persistence) can subscribe to
+    changes; listeners are called as listener(event, paper_id, old, new) with
+    event one of "add", "update", "delete" or "clear". Bulk changes made
+    inside batch() are bracketed by "begin" and "commit" events so listeners
+    can group them, e.g. into a single transaction or view refresh.
+    """
+
+    def __init__(self):
+        self._papers = {}
+        self._next_id = 1
+        self._by_year = defaultdict(set)
+        self._by_category = defaultdict(set)
+        self._by_tag = defaultdict(set)
+        self._by_doi = defaultdict(set)
+        self._listeners = []
+        self._batch_depth = 0
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def _notify(self, event, paper_id=None, old=None, new=None):
+        for listener in list(self._listeners):
+            listener(event, paper_id, old, new)
+
+    @contextmanager
+    def batch(self):
+        """Group the changes made inside the block; batches may be nested."""
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self._notify("begin")
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._notify("commit")
+
+    def __len__(self):
+        return len(self._papers)
+
+    def __contains__(self, paper_id):
+        return paper_id in self._papers
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def get(self, paper_id):
+        return self._papers.get(paper_id)
+
+    def ids(self):
+        return sorted(self._papers)
+
+    def papers(self):
+        return [self._papers[paper_id] for paper_id in self.ids()]
+
+    def items(self):
+        return [(paper_id, self._papers[paper_id]) for paper_id in self.ids()]
+
+    def add_paper(self, paper, paper_id=None):
+        """Add a paper and return its ID. An explicit ID may be given to restore a paper."""
+        if paper_id is None:
+            paper_id = self._next_id
+        elif paper_id in self._papers:
+            raise KeyError(f"Paper {paper_id} already exists")
+        self._next_id = max(self._next_id, paper_id + 1)
+
+        paper = compact(paper)
+        self._papers[paper_id] = paper
+        self._index(paper_id, paper)
+        self._notify("add", paper_id, None, paper)
+        return paper_id
+
+    def update_paper(self, paper_id, paper):
+        """Replace a paper with a new dict and return the previous one."""
+        old = self._papers[paper_id]
+        self._unindex(paper_id, old)
+        paper = compact(paper)
+        self._papers[paper_id] = paper
+        self._index(paper_id, paper)
+        self._notify("update", paper_id, old, paper)
+        return old
+
+    def delete_paper(self, paper_id):
+        """Remove a paper and return it."""
+        old = self._papers.pop(paper_id)
+        self._unindex(paper_id, old)
+        self._notify("delete", paper_id, old, None)
+        return old
+
+    def load(self, papers, paper_ids=None):
+        """Replace the whole collection and return the new IDs.
+
+        paper_ids optionally gives the ID of each paper, e.g. when loading from a database.
+        """
+        with self.batch():
+            self.clear()
+            if paper_ids is None:
+                return [self.add_paper(paper) for paper in papers]
+            return [self.add_paper(paper, paper_id) for paper, paper_id in zip(papers, paper_ids)]
+
+    def clear(self):
+        self._papers.clear()
+        for index in (self._by_year, self._by_category, self._by_tag, self._by_doi):
+            index.clear()
+        self._notify("clear")
+
+    def ids_for_year(self, year):
+        return set(self._by_year.get(str(year), ()))
+
+    def ids_for_category(self, category):
+        return set(self._by_category.get(category, ()))
+
+    def ids_for_tag(self, tag):
+        return set(self._by_tag.get(tag, ()))
+
+    def ids_for_doi(self, doi):
+        return set(self._by_doi.get(doi.strip().lower(), ()))
+
+    def filter(self, year=None, category=None, tag=None, within=None):
+        """Return the sorted IDs matching every given value, intersecting the smallest sets first.
+
+        within optionally restricts the result to a set of IDs, e.g. the hits of a text search.
+        """
+        candidates = [] if within is None else [within]
+        if year:
+            candidates.append(self._by_year.get(str(year), set()))
+        if category:
+            candidates.append(self._by_category.get(category, set()))
+        if tag:
+            candidates.append(self._by_tag.get(tag, set()))
+        if not candidates:
+            return self.ids()
+
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            result &= ids
+        return sorted(result)
+
+    def years(self):
+        return sorted(self._by_year)
+
+    def categories(self):
+        return sorted(self._by_category)
+
+    def tags(self):
+        return sorted(self._by_tag)
+
+    def _index(self, paper_id, paper):
+        for index, values in self._index_values(paper):
+            for value in values:
+                index[value].add(paper_id)
+
+    def _unindex(self, paper_id, paper):
+        for index, values in self._index_values(paper):
+            for value in values:
+                ids = index.get(value)
+                if ids is None:
+                    continue
+                ids.discard(paper_id)
+                if not ids:
+                    del index[value]
+
+    def _index_values(self, paper):
+        # Stored values skip the copies PaperRecord makes for dict-style access
+        year = str(paper.raw("year", "")).strip()
+        doi = paper.raw("doi", "").strip().lower()
+        return [
+            (self._by_year, [year] if year else []),
+            (self._by_category, {cat for cat in paper.raw("categories", ()) if cat}),
+            (self._by_tag, {tag for tag in paper.raw("tags", ()) if tag}),
+            (self._by_doi, [doi] if doi else []),
+        ]
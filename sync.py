@@ -0,0 +1,188 @@
+import re
+
+from doi_resolver import normalize_doi
+from journal import read_library
+from records import FIELDS, LIST_FIELDS, paper_digest
+
+_WORD_RE = re.compile(r"\w+")
+
+PREFERENCES = ("ours", "theirs")
+
+
+def record_key(paper):
+    """Return an ID for a paper that is the same in every library holding it.
+
+    Papers with a DOI are identified by it, others by their normalized
+    title and year, so copies of a library agree on keys without sharing
+    store IDs.
+    """
+    doi = paper.get("doi", "")
+    if doi.strip():
+        return "doi:" + normalize_doi(doi)
+    title = " ".join(_WORD_RE.findall(paper.get("title", "").lower()))
+    return f"title:{title}|{str(paper.get('year', '')).strip()}"
+
+
+def index_library(items):
+    """Map record keys to (paper_id, paper, digest) for (id, paper) pairs.
+
+    A key shared by several papers of one library (e.g. duplicates not yet
+    merged) gets a "#2", "#3"... suffix in ID order.
+    """
+    index = {}
+    for paper_id, paper in items:
+        key = unique = record_key(paper)
+        count = 1
+        while unique in index:
+            count += 1
+            unique = f"{key}#{count}"
+        index[unique] = (paper_id, paper, paper_digest(paper))
+    return index
+
+
+def read_items(path):
+    """Return the (id, paper) pairs of a library file: a .db database, an autosave or a saved JSON list."""
+    if not path.endswith(".db"):
+        return read_library(path)
+    from sqlite_backend import SQLiteBackend
+
+    backend = SQLiteBackend(path)
+    try:
+        return list(backend.iter_papers())
+    finally:
+        backend.close()
+
+
+def is_json_list(path):
+    """Return True for a plain JSON list of papers, as written by Save and Backup, rather than an autosave."""
+    with open(path, "r") as f:
+        return f.read(64).lstrip().startswith("[")
+
+
+def diff(old, new):
+    """Return the keys (added, removed, changed) going from index old to index new."""
+    added = [key for key in new if key not in old]
+    removed = [key for key in old if key not in new]
+    changed = [key for key, entry in new.items() if key in old and old[key][2] != entry[2]]
+    return added, removed, changed
+
+
+def merge_fields(base, ours, theirs):
+    """Three-way merge of one paper; returns (merged paper, names of the fields both sides changed differently).
+
+    A field changed on one side only takes that side's value. Categories
+    and tags are merged as sets, keeping what either side added and
+    dropping what either side removed, so they never conflict. Conflicting
+    fields keep our value.
+    """
+    merged = dict(ours)
+    conflicts = []
+    for field in FIELDS:
+        old, mine, other = base.get(field), ours.get(field), theirs.get(field)
+        if mine == other or other == old:
+            continue
+        if mine == old:
+            merged[field] = other
+        elif field in LIST_FIELDS:
+            removed = set(old or ()) - set(mine or ()) | set(old or ()) - set(other or ())
+            kept = [value for value in mine or () if value not in removed]
+            merged[field] = kept + [value for value in other or () if value not in removed and value not in kept]
+        else:
+            conflicts.append(field)
+    return merged, conflicts
+
+
+def merge(ours, theirs, base=None, prefer="ours"):
+    """Merge two library indexes and return (merged, conflicts).
+
+    merged maps the key of every paper whose merged version differs from
+    ours or theirs to that version, or to None where the merge deletes it.
+    With a base (the index of the library both started from) a change on
+    one side wins over the other side's unchanged copy, deletions included,
+    and edits on both sides are merged field by field. Without one, papers
+    found on only one side are kept and papers that differ conflict as a
+    whole. Conflicts are (key, reason, fields) triples; they are resolved
+    to our version, or theirs with prefer="theirs".
+
+    Unchanged papers are skipped by comparing digests, so the cost is linear
+    in the library size plus the size of the changes.
+    """
+    if prefer not in PREFERENCES:
+        raise ValueError(f"prefer must be one of {', '.join(PREFERENCES)}")
+    merged = {}
+    conflicts = []
+    keys = dict.fromkeys(ours)
+    keys.update(dict.fromkeys(theirs))
+    if base is not None:
+        keys.update(dict.fromkeys(base))
+
+    for key in keys:
+        mine, other = ours.get(key), theirs.get(key)
+        mine_digest, other_digest = mine and mine[2], other and other[2]
+        if mine_digest == other_digest:
+            continue
+        if base is None:
+            if mine is None:
+                merged[key] = other[1]
+            elif other is not None:
+                conflicts.append((key, "different in the two libraries", []))
+                if prefer == "theirs":
+                    merged[key] = other[1]
+            else:
+                merged[key] = mine[1]
+            continue
+
+        old = base.get(key)
+        old_digest = old and old[2]
+        if other_digest == old_digest:
+            # Only we changed it; theirs needs our version
+            merged[key] = None if mine is None else mine[1]
+        elif mine_digest == old_digest:
+            merged[key] = None if other is None else other[1]
+        elif mine is None or other is None:
+            conflicts.append((key, "deleted in one library and edited in the other", []))
+            winner = mine if prefer == "ours" else other
+            merged[key] = None if winner is None else winner[1]
+        else:
+            paper, fields = merge_fields({} if old is None else old[1], mine[1], other[1])
+            if fields:
+                conflicts.append((key, "edited differently in both libraries", fields))
+                if prefer == "theirs":
+                    paper.update((field, other[1].get(field)) for field in fields)
+            merged[key] = paper
+    return merged, conflicts
+
+
+def changes(index, merged):
+    """Return the (op, paper_id, paper) changes that bring the library of index to the merged versions."""
+    result = []
+    for key, paper in merged.items():
+        entry = index.get(key)
+        if paper is None:
+            if entry is not None:
+                result.append(("delete", entry[0], None))
+        elif entry is None:
+            result.append(("add", None, paper))
+        elif paper_digest(paper) != entry[2]:
+            result.append(("update", entry[0], paper))
+    return result
+
+
+def count_changes(changes):
+    """Return how many of changes are adds, updates and deletes, as a dict."""
+    counts = {"add": 0, "update": 0, "delete": 0}
+    for op, _, _ in changes:
+        counts[op] += 1
+    return counts
+
+
+def apply_changes(store, changes):
+    """Apply changes from changes() to a store as one batch, so only those papers are written."""
+    with store.batch():
+        for op, paper_id, paper in changes:
+            if op == "add":
+                store.add_paper(paper)
+            elif op == "update":
+                store.update_paper(paper_id, paper)
+            else:
+                store.delete_paper(paper_id)
@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+POLL_MS = 50
+POLL_BUDGET = 0.03  # Seconds of callbacks run per poll before the Tk loop gets control back
+MAX_PENDING_ITEMS = 4  # Items a task may emit ahead of the Tk thread consuming them
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    """Handle for a job running on a TaskRunner.
+
+    The job function gets the task as its first argument and uses it to
+    report progress, emit intermediate items (e.g. batches to insert on the
+    Tk thread) and check for cancellation. cancel_event can be passed to
+    functions such as export_papers that take a threading.Event.
+    """
+
+    def __init__(self, runner, on_done=None, on_error=None, on_progress=None, on_item=None, on_cancel=None):
+        self.runner = runner
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_item = on_item
+        self.on_cancel = on_cancel
+        self.cancel_event = threading.Event()
+        self._slots = threading.Semaphore(MAX_PENDING_ITEMS)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+
+    def progress(self, value):
+        """Report progress from the worker; on_progress(value) runs on the Tk thread."""
+        self.runner._post(self, "progress", value)
+
+    def emit(self, item):
+        """Hand an item to on_item on the Tk thread, waiting while too many are still pending."""
+        while not self._slots.acquire(timeout=0.1):
+            self.check_cancelled()
+        self.runner._post(self, "item", item)
+
+
+class TaskRunner:
+    """Run jobs on a thread pool and deliver their results on the Tk thread.
+
+    Workers never touch Tk: they post messages to a queue that is drained
+    with after() while any task is active, so all callbacks (on_done,
+    on_error, on_progress, on_item, on_cancel) run on the Tk thread and may
+    update widgets and the store. Threads rather than processes are used
+    so jobs can read the in-memory store without copying it; the Tk loop
+    still gets its share of the GIL, so the UI stays responsive.
+    """
+
+    def __init__(self, master, max_workers=MAX_WORKERS):
+        self.master = master
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self.active = set()
+        self._messages = queue.Queue()
+        self._poll_job = None
+
+    def submit(self, job, *args, **callbacks):
+        """Run job(task, *args) on a worker and return the Task.
+
+        on_done(result) is called with the return value, on_error(exception)
+        if it raised and on_cancel() if it was cancelled.
+        """
+        task = Task(self, **callbacks)
+        self.active.add(task)
+        self.executor.submit(self._run, task, job, args)
+        if self._poll_job is None:
+            self._poll_job = self.master.after(POLL_MS, self._poll)
+        return task
+
+    def shutdown(self):
+        for task in self.active:
+            task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task, job, args):
+        try:
+            result = job(task, *args)
+        except TaskCancelled:
+            self._post(task, "cancelled", None)
+        except Exception as e:
+            self._post(task, "cancelled" if task.cancelled() else "error", e)
+        else:
+            self._post(task, "cancelled" if task.cancelled() else "done", result)
+
+    def _post(self, task, kind, value):
+        self._messages.put((task, kind, value))
+
+    def _poll(self):
+        self._poll_job = None
+        # Yield back to Tk after a while even if busy workers keep the queue filled
+        deadline = time.monotonic() + POLL_BUDGET
+        try:
+            while time.monotonic() < deadline:
+                task, kind, value = self._messages.get_nowait()
+                self._dispatch(task, kind, value)
+        except queue.Empty:
+            pass
+        finally:
+            if self.active:
+                self._poll_job = self.master.after(POLL_MS, self._poll)
+
+    def _dispatch(self, task, kind, value):
+        if kind == "item":
+            task._slots.release()
+            # Items still queued when a task is cancelled are dropped
+            if task.on_item is not None and not task.cancelled():
+                task.on_item(value)
+            return
+        if kind == "progress":
+            if task.on_progress is not None and not task.cancelled():
+                task.on_progress(value)
+            return
+
+        self.active.discard(task)
+        callback = {"done": task.on_done, "error": task.on_error, "cancelled": task.on_cancel}[kind]
+        if callback is not None:
+            if kind == "cancelled":
+                callback()
+            else:
+                callback(value)
+        elif kind == "error":
+            raise value
@@ -0,0 +1,52 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+# The modules live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make(title="A Paper", authors="Ann Lee", year="2020", **fields):
+    paper = {
+        "title": title, "authors": authors, "year": year, "doi": "",
+        "categories": [], "tags": [], "summary": "", "notes": "",
+    }
+    paper.update(fields)
+    return paper
+
+
+@pytest.fixture
+def events():
+    """A listener that records (event, paper_id) pairs."""
+    recorded = []
+
+    def listener(event, paper_id, old, new):
+        recorded.append((event, paper_id))
+
+    listener.recorded = recorded
+    return listener
+
+
+class FakeMaster:
+    """Stands in for a Tk root: after() callbacks run when the test calls run()."""
+
+    def __init__(self):
+        self.timers = {}
+        self._ids = itertools.count()
+
+    def after(self, ms, callback):
+        timer = f"after#{next(self._ids)}"
+        self.timers[timer] = (ms, callback)
+        return timer
+
+    def after_cancel(self, timer):
+        self.timers.pop(timer, None)
+
+    def run(self):
+        """Run the callbacks scheduled so far, whatever their delay; returns how many ran."""
+        timers, self.timers = self.timers, {}
+        for _, callback in timers.values():
+            callback()
+        return len(timers)
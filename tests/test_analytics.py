@@ -0,0 +1,48 @@
+from analytics import Cooccurrence, LibraryAnalytics
+from conftest import make
+from records import compact
+
+
+def test_cooccurrence_is_symmetric_and_sparse():
+    matrix = Cooccurrence()
+    matrix.add(["b", "a", "c"])
+    matrix.add(["a", "b"])
+    matrix.add(["a", "d"], pairs=False)
+    assert matrix.counts["a"] == 3 and len(matrix.pairs) == 3
+    assert matrix.weight("b", "a") == matrix.weight("a", "b") == 2
+    assert matrix.top("a") == [("b", 2), ("c", 1)]
+    assert matrix.strongest(1) == [("a", "b", 2)]
+
+
+def test_clusters_need_repeated_links():
+    matrix = Cooccurrence()
+    for labels in (["a", "b"], ["a", "b"], ["b", "c"], ["b", "c"], ["x", "y"], ["p", "q"], ["p", "q"]):
+        matrix.add(labels)
+    assert matrix.clusters() == [["b", "a", "c"], ["p", "q"]]
+
+
+def test_coauthors_are_matched_by_name():
+    analytics = LibraryAnalytics([
+        make(authors="Ann Lee and Bob Smith"),
+        compact(make(authors="Lee, Ann and Cy Ray")),
+        make(authors="ann  LEE and Bob Smith"),
+    ])
+    assert analytics.top_authors(1) == [("Ann Lee", 3)]
+    assert analytics.top_collaborators("ann lee") == [("Bob Smith", 2), ("Cy Ray", 1)]
+    assert analytics.author_clusters() == [["Ann Lee", "Bob Smith"]]
+
+
+def test_large_author_lists_add_no_pairs():
+    authors = " and ".join(f"Author {i}" for i in range(5))
+    analytics = LibraryAnalytics([make(authors=authors)], max_coauthors=3)
+    assert len(analytics.top_authors()) == 5 and analytics.strongest_collaborations() == []
+
+
+def test_topics_and_trending_tags():
+    papers = [make(year="2012", tags=["old"], categories=["ml"]) for _ in range(3)]
+    papers += [make(year="2019", tags=["new", "old"], categories=["ml"]), make(year="2020", tags=["new"])]
+    analytics = LibraryAnalytics(papers)
+    assert analytics.related_topics("category", "ml") == [(("tag", "old"), 4), (("tag", "new"), 1)]
+    assert analytics.trending_tags(window=5) == [("new", 2, 0)]
+    assert "Trending Tags (2016-2020 vs 2011-2015):" in analytics.summary_text()
+    assert LibraryAnalytics([]).summary_text() == ""
@@ -0,0 +1,53 @@
+from bench import BENCHMARKS, Context, MIN_COMPARED_SECONDS, compare, generate_papers, measure
+
+
+def results(**metrics):
+    return {"results": {"1000": {"filter": dict({"samples": 20}, **metrics)}}}
+
+
+def regressions(current, baseline):
+    return [line for line, regressed in compare(current, baseline) if regressed]
+
+
+def test_generated_libraries_depend_only_on_the_seed():
+    assert generate_papers(50, seed=3) == generate_papers(50, seed=3)
+    assert generate_papers(50, seed=3) != generate_papers(50, seed=4)
+    assert generate_papers(10, seed=3) == generate_papers(50, seed=3)[:10]
+
+
+def test_measure_reports_percentiles_and_the_fastest_run():
+    result = measure(lambda: None, 5)
+    assert result["samples"] == 5
+    assert result["min"] <= result["p50"] <= result["p99"] <= result["max"]
+
+
+def test_slower_runs_are_regressions():
+    slow = 10 * MIN_COMPARED_SECONDS
+    assert regressions(results(p50=2 * slow, min=2 * slow), results(p50=slow, min=slow))
+    assert regressions(results(peak_kib=200), results(peak_kib=100))
+    assert not regressions(results(p50=slow, min=slow), results(p50=2 * slow, min=2 * slow))
+
+
+def test_noise_is_not_a_regression():
+    fast = MIN_COMPARED_SECONDS / 10
+    assert not regressions(results(p50=2 * fast, min=2 * fast), results(p50=fast, min=fast))
+
+    slow = 10 * MIN_COMPARED_SECONDS
+    # A busy machine moves the median, but not the fastest run
+    assert not regressions(results(p50=2 * slow, min=slow), results(p50=slow, min=slow))
+    few = {"1000": {"filter": {"samples": 2, "p50": 2 * slow, "min": 2 * slow}}}
+    assert not regressions({"results": few}, results(p50=slow, min=slow))
+
+
+def test_baselines_without_min_still_compare():
+    slow = 10 * MIN_COMPARED_SECONDS
+    assert regressions(results(p50=2 * slow, min=2 * slow), results(p50=slow))
+
+
+def test_statistics_benchmark_leaves_the_library_alone(tmp_path):
+    context = Context(generate_papers(30), 0, str(tmp_path))
+    before = context.stats.summary_text()
+    run = BENCHMARKS["statistics"](context)
+    for _ in range(5):
+        run()
+    assert context.stats.summary_text() == before
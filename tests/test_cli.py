@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from cli import main
+from conftest import make
+from journal import Journal
+from sqlite_backend import SQLiteBackend
+from store import PaperStore
+
+PAPERS = [
+    make("Graph Networks", year="2019", tags=["graphs"]),
+    make("Deep Learning", year="2021", categories=["ml"], tags=["nlp"]),
+    make("Graph  networks", year="2019", doi="10.1/ab"),
+]
+
+
+@pytest.fixture(params=["autosave.json", "library.db"])
+def library(request, tmp_path):
+    path = str(tmp_path / request.param)
+    store = PaperStore()
+    persistence = SQLiteBackend(path) if path.endswith(".db") else Journal(path)
+    if path.endswith(".db"):
+        persistence.import_store(store)
+    else:
+        persistence.load(store)
+    store.load(PAPERS)
+    persistence.close()
+    return path
+
+
+def run(capsys, *argv):
+    status = main(list(argv))
+    return status, capsys.readouterr().out
+
+
+def test_search_with_filters(library, capsys):
+    status, out = run(capsys, "--library", library, "search", "graph", "--json")
+    assert status == 0 and [json.loads(line)["id"] for line in out.splitlines()] == [1, 3]
+    _, out = run(capsys, "--library", library, "search", "--tag", "nlp")
+    assert out.split("\t")[:3] == ["2", "2021", "Deep Learning"]
+    _, out = run(capsys, "--library", library, "search", "graph", "--ranked", "--limit", "1")
+    assert len(out.splitlines()) == 1
+
+
+def test_stats_and_export(library, tmp_path, capsys):
+    _, out = run(capsys, "--library", library, "stats")
+    assert out.startswith("Total Papers: 3")
+    target = tmp_path / "graphs.tex"
+    _, out = run(capsys, "--library", library, "export", str(target), "graph")
+    assert out.startswith("Exported 2 papers") and target.read_text().count("\\section*") == 2
+
+
+def test_dedupe_apply_merges_groups(library, capsys):
+    _, out = run(capsys, "--library", library, "dedupe")
+    assert out.splitlines() == ["1, 3\tGraph Networks", "1 duplicate groups found"]
+    _, out = run(capsys, "--library", library, "dedupe", "--apply")
+    assert out.splitlines()[-1] == "Merged 1 duplicates"
+    _, out = run(capsys, "--library", library, "search", "--json")
+    papers = [json.loads(line) for line in out.splitlines()]
+    assert [paper["id"] for paper in papers] == [1, 2] and papers[0]["doi"] == "10.1/ab"
+
+
+def test_errors_exit_with_status_1(library, capsys):
+    assert main(["--library", library, "related", "99"]) == 1
+    assert capsys.readouterr().err == "Error: No paper with ID 99\n"
@@ -0,0 +1,68 @@
+import random
+from itertools import combinations
+
+from conftest import make
+from dedupe import DuplicateIndex, jaccard, merge_papers, similar_titles, title_tokens
+from store import PaperStore
+
+
+def index(*papers):
+    store = PaperStore()
+    store.load(papers)
+    duplicates = DuplicateIndex()
+    duplicates.attach(store)
+    return store, duplicates
+
+
+def test_groups_need_a_shared_doi_or_a_similar_title_and_year():
+    store, duplicates = index(
+        make("Deep Learning for Graphs", doi="10.1/a"), make("Something else", doi="10.1/A "),
+        make("Deep learning for graphs!"), make("Deep Learning for Graphs", year="2019"),
+        make("Deep Learning for Graphs", doi="10.1/b"), make("Unrelated"),
+    )
+    assert duplicates.find_groups() == [[1, 2, 3, 5]]
+    assert duplicates.duplicates_of(make("Deep Learning for  Graphs")) == [1, 3, 5]
+
+
+def test_papers_with_different_dois_only_match_through_another_paper():
+    store, duplicates = index(make("Same Title", doi="10.1/a"), make("Same Title", doi="10.1/b"))
+    assert duplicates.find_groups() == []
+    store.add_paper(make("Same Title"))
+    assert duplicates.find_groups() == [[1, 2, 3]]
+
+
+def test_many_equal_titles_form_one_group_per_year():
+    store, duplicates = index(*[make("Editorial", year=str(2000 + i % 2)) for i in range(2000)])
+    groups = duplicates.find_groups()
+    assert [len(group) for group in groups] == [1000, 1000]
+    assert groups[0] == list(range(1, 2001, 2))
+
+
+def test_groups_follow_store_changes():
+    store, duplicates = index(make("Graph Networks"), make("Graph Networks"))
+    assert duplicates.find_groups() == [[1, 2]]
+    store.update_paper(2, make("Graph Transformers"))
+    assert duplicates.find_groups() == []
+
+
+def test_similar_titles_finds_every_similar_pair():
+    rng = random.Random(3)
+    words = [f"w{i}" for i in range(12)]
+    titles = list({frozenset(rng.sample(words, rng.randint(1, 6))) for _ in range(300)})
+    for threshold in (0.5, 0.8, 1.0):
+        found = {frozenset(pair) for pair in similar_titles(titles, threshold)}
+        expected = {frozenset(pair) for pair in combinations(titles, 2) if jaccard(*pair) >= threshold}
+        assert found == expected
+
+
+def test_merge_papers_fills_in_and_combines():
+    merged = merge_papers([
+        make("Graph Networks", doi="", tags=["gnn"], notes="Mine"),
+        make("Graph networks", doi="10.1/a", tags=["gnn", "survey"], notes="Theirs", summary="Text"),
+    ])
+    assert (merged["title"], merged["doi"], merged["summary"]) == ("Graph Networks", "10.1/a", "Text")
+    assert merged["tags"] == ["gnn", "survey"] and merged["notes"] == "Mine\n\nTheirs"
+
+
+def test_title_tokens_ignore_case_and_punctuation():
+    assert title_tokens("Deep, deep LEARNING!") == frozenset({"deep", "learning"})
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import threading
+from collections import Counter
+from urllib.parse import unquote
+
+import pytest
+
+from doi_resolver import DOIResolver, MetadataCache, normalize_doi, parse_work
+
+WORK = {"message": {
+    "title": ["Deep <i>Learning</i>"],
+    "author": [{"given": "Ann", "family": "Lee"}, {"name": "The Consortium"}],
+    "issued": {"date-parts": [[2020, 5]]},
+    "DOI": "10.1/AB",
+    "subject": ["Machine Learning"],
+    "abstract": "<jats:p>An &amp; abstract</jats:p>",
+}}
+
+
+class StubServer:
+    """A metadata endpoint on its own thread answering each DOI from a script of (status, headers, body)."""
+
+    def __init__(self):
+        self.script = {}
+        self.requests = Counter()
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        doi = unquote(request.split()[1].decode()[len("/works/"):])
+        self.requests[doi] += 1
+        responses = self.script.get(doi, [(404, {}, b"")])
+        status, headers, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        head = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(f"HTTP/1.0 {status} Status\r\n{head}\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.port}/works/"
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+@pytest.fixture
+def server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def resolver(server, tmp_path):
+    return DOIResolver(server.endpoint, str(tmp_path / "cache.db"), retries=2, backoff=0.01, timeout=5)
+
+
+def test_normalize_doi():
+    assert normalize_doi(" https://doi.org/10.1/AB ") == "10.1/ab"
+    assert normalize_doi("doi:10.1/ab") == normalize_doi("10.1/AB") == "10.1/ab"
+
+
+def test_parse_work_cleans_crossref_fields():
+    assert parse_work(WORK) == {
+        "title": "Deep Learning", "authors": "Ann Lee, The Consortium", "year": "2020",
+        "doi": "10.1/AB", "categories": ["Machine Learning"], "summary": "An & abstract",
+    }
+    assert parse_work({"title": "CSL record"}) == {"title": "CSL record"}
+    with pytest.raises(ValueError):
+        parse_work([])
+
+
+def test_transient_errors_are_retried(server, resolver):
+    ok = (200, {}, json.dumps(WORK).encode())
+    server.script["10.1/ab"] = [(503, {}, b""), (429, {"Retry-After": "0"}, b""), ok]
+    server.script["10.1/down"] = [(503, {}, b"")]
+    results, errors = resolver.resolve_many(["10.1/AB", "10.1/down"])
+    assert results == {"10.1/ab": parse_work(WORK)}
+    assert server.requests == {"10.1/ab": 3, "10.1/down": 3}
+    assert errors["10.1/down"].startswith("HTTP 503")
+
+
+def test_lookups_including_not_found_are_cached(server, resolver):
+    server.script["10.1/ab"] = [(200, {}, json.dumps(WORK).encode())]
+    assert resolver.resolve_many(["10.1/ab", "10.1/missing"]) == ({"10.1/ab": parse_work(WORK),
+                                                                   "10.1/missing": None}, {})
+    assert resolver.resolve("10.1/missing") is None
+    assert resolver.resolve("https://doi.org/10.1/AB")["title"] == "Deep Learning"
+    assert server.requests == {"10.1/ab": 1, "10.1/missing": 1}
+    with MetadataCache(resolver.cache_path) as cache:
+        assert len(cache) == 2
+
+
+def test_expired_lookups_are_used_while_the_endpoint_fails(server, resolver):
+    with MetadataCache(resolver.cache_path) as cache:
+        cache.store("10.1/ab", {"title": "Cached"})
+    resolver.ttl = 0
+    server.script["10.1/ab"] = [(500, {}, b"")]
+    assert resolver.resolve("10.1/ab") == {"title": "Cached"}
+    assert server.requests["10.1/ab"] == 3
@@ -0,0 +1,47 @@
+import csv
+import threading
+import zipfile
+
+import pytest
+
+from conftest import make
+from exporters import ExportCancelled, export_papers
+
+
+@pytest.fixture
+def papers():
+    return [make(f"Paper {i}", tags=["a", "b"], summary="Line one\nLine <two>") for i in range(5)] + [None]
+
+
+def test_csv_export_writes_every_paper(tmp_path, papers):
+    path = str(tmp_path / "out.csv")
+    progress = []
+    assert export_papers(papers, path, "csv", total=5, progress=lambda *args: progress.append(args),
+                         chunk_size=2) == 5
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][0] == "title" and len(rows) == 6
+    assert (rows[1][5], rows[1][6]) == ("a, b", "Line one\nLine <two>")
+
+
+def test_latex_and_docx_exports(tmp_path, papers):
+    latex = tmp_path / "out.tex"
+    export_papers(papers, str(latex), "latex")
+    text = latex.read_text(encoding="utf-8")
+    assert text.count("\\section*{") == 5 and text.endswith("\\end{document}")
+
+    docx = tmp_path / "out.docx"
+    export_papers(papers, str(docx), "docx")
+    with zipfile.ZipFile(docx) as package:
+        document = package.read("word/document.xml").decode("utf-8")
+    assert document.count("Paper ") == 5 and "Line &lt;two&gt;" in document
+
+
+def test_cancelled_export_leaves_no_file(tmp_path, papers):
+    path = tmp_path / "out.csv"
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ExportCancelled):
+        export_papers(papers, str(path), "csv", cancel=cancel, chunk_size=2)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,67 @@
+import facets
+from conftest import make
+from facets import FacetIndex, bitmap_to_ids, ids_to_bitmap
+from importers import import_file, make_paper
+from store import PaperStore
+from test_importers import BIBTEX
+
+
+def index(*papers):
+    store = PaperStore()
+    store.load(papers)
+    facet_index = FacetIndex()
+    facet_index.attach(store)
+    return store, facet_index
+
+
+def test_bitmaps_round_trip():
+    assert bitmap_to_ids(ids_to_bitmap({0, 3, 64})) == [0, 3, 64]
+    assert ids_to_bitmap(set()) == 0
+
+
+def test_selections_combine_values_within_and_across_facets():
+    store, facet_index = index(
+        make("One", year="2020", tags=["nlp"]), make("Two", year="2021", tags=["nlp", "cv"]),
+        make("Three", year="2021", tags=["cv"]), make("Four", year="2022"),
+    )
+    paper_ids, counts = facet_index.select({"year": {2020, 2021}, "tag": {"cv"}})
+    assert paper_ids == [2, 3]
+    # Each facet is counted under the other facets' selections; selected values are always listed
+    assert dict(counts["year"]) == {2021: 2, 2020: 0}
+    assert dict(counts["tag"]) == {"nlp": 2, "cv": 2}
+    assert facet_index.select({"year": set()})[0] == []
+    assert facet_index.years_between(2021) == [2021, 2022]
+
+
+def test_counts_follow_store_changes():
+    store, facet_index = index(make(tags=["nlp"]), make(tags=["nlp"]))
+    assert dict(facet_index.select({})[1]["tag"]) == {"nlp": 2}
+    store.update_paper(1, make(tags=["cv"]))
+    assert dict(facet_index.select({})[1]["tag"]) == {"nlp": 1, "cv": 1}
+
+
+def test_narrow_selections_count_values_outside_the_common_ones(monkeypatch):
+    monkeypatch.setattr(facets, "CANDIDATES", 2)
+    papers = [make(f"Common {i}", authors=f"Author {i % 3}", tags=[f"tag{i % 3}"]) for i in range(30)]
+    papers += [make(f"Rare {i}", authors="Rare Person, Ann Lee", tags=["raretag"], year="1999") for i in range(3)]
+    store, facet_index = index(*papers)
+    paper_ids, counts = facet_index.select({"year": {1999}})
+    assert paper_ids == [31, 32, 33]
+    assert dict(counts["author"]) == {"Rare Person": 3, "Ann Lee": 3}
+    assert dict(counts["tag"]) == {"raretag": 3}
+
+    _, counts = facet_index.select({"tag": {"raretag"}}, within={31})
+    assert dict(counts["year"]) == {1999: 1} and dict(counts["tag"])["raretag"] == 1
+
+
+def test_author_facets_count_imported_people(tmp_path):
+    path = tmp_path / "library.bib"
+    path.write_text(BIBTEX)
+    store = PaperStore()
+    import_file(str(path), store)
+    store.add_paper(make_paper("Typed in", "Ann Lee, Cy Ray", "2021"))
+    facet_index = FacetIndex()
+    facet_index.attach(store)
+    assert sorted(facet_index.values("author")) == ["Ann Lee", "Bob Smith", "Cy Ray"]
+    _, counts = facet_index.select({})
+    assert dict(counts["author"])["Ann Lee"] == 2
@@ -0,0 +1,96 @@
+from conftest import make
+from history import History
+from store import PaperStore
+
+
+def snapshot(store):
+    return {paper_id: dict(paper) for paper_id, paper in store.items()}
+
+
+def test_undo_and_redo_restore_each_state():
+    store = PaperStore()
+    history = History(store)
+    with history.action("Add"):
+        paper_id = store.add_paper(make("One"))
+    added = snapshot(store)
+    with history.action("Edit"):
+        store.update_paper(paper_id, make("One edited"))
+    edited = snapshot(store)
+    with history.action("Delete"):
+        store.delete_paper(paper_id)
+
+    assert history.undo() == "Delete"
+    assert snapshot(store) == edited
+    assert history.undo() == "Edit"
+    assert snapshot(store) == added
+    assert history.undo() == "Add"
+    assert snapshot(store) == {}
+    assert history.undo() is None
+
+    assert history.redo() == "Add"
+    assert history.redo() == "Edit"
+    assert snapshot(store) == edited
+    assert history.redo() == "Delete"
+    assert snapshot(store) == {}
+    assert history.redo() is None
+
+
+def test_an_action_groups_its_changes():
+    store = PaperStore()
+    history = History(store)
+    with history.action("Import"):
+        for title in ("One", "Two", "Three"):
+            store.add_paper(make(title))
+    history.undo()
+    assert len(store) == 0
+    history.redo()
+    assert [paper["title"] for paper in store.papers()] == ["One", "Two", "Three"]
+
+
+def test_undo_keeps_paper_ids():
+    store = PaperStore()
+    history = History(store)
+    first = store.add_paper(make("One"))
+    store.add_paper(make("Two"))
+    with history.action("Delete"):
+        store.delete_paper(first)
+    history.undo()
+    assert store.get(first)["title"] == "One"
+
+
+def test_a_new_action_clears_redo():
+    store = PaperStore()
+    history = History(store)
+    with history.action("Add"):
+        store.add_paper(make("One"))
+    history.undo()
+    with history.action("Add"):
+        store.add_paper(make("Two"))
+    assert not history.can_redo()
+
+
+def test_changes_outside_actions_are_not_recorded():
+    store = PaperStore()
+    history = History(store)
+    store.add_paper(make())
+    assert not history.can_undo()
+
+
+def test_replacing_the_library_forgets_history():
+    store = PaperStore()
+    history = History(store)
+    with history.action("Add"):
+        store.add_paper(make("One"))
+    store.load([make("Two")])
+    assert not history.can_undo() and not history.can_redo()
+
+
+def test_depth_is_capped():
+    store = PaperStore()
+    history = History(store, max_depth=2)
+    for title in ("One", "Two", "Three"):
+        with history.action(title):
+            store.add_paper(make(title))
+    assert history.undo() == "Three"
+    assert history.undo() == "Two"
+    assert history.undo() is None
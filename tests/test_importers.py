@@ -0,0 +1,94 @@
+import pytest
+
+from importers import import_file, iter_bibtex, iter_ris, make_paper, paper_from_bibtex, paper_from_ris, read_batches
+from store import PaperStore
+
+BIBTEX = """
+@comment{ignored}
+@string{jml = "Journal of ML"}
+
+@Article{lee2020,
+  title = {Deep {Learning} for
+           Everyone},
+  author = "Lee, Ann and Smith, Bob",
+  year = 2020,
+  doi = {10.1/ab},
+  keywords = {nlp, survey},
+  abstract = "An " # "abstract",
+  note = {Read twice}
+}
+
+@book{ray2019, title={Only a Title}}
+
+@misc{nobody,
+  title = {Edited volume},
+  editor = {Ray, Cy},
+  date = {2019-05-01}
+}
+"""
+
+RIS = """TY  - JOUR
+TI  - Graph Networks
+AU  - Lee, Ann
+AU  - Smith, Bob
+PY  - 2021/03/01
+DO  - 10.1/cd
+KW  - graphs
+KW  - survey
+AB  - An abstract
+N1  - First note
+N1  - Second note
+ER  -
+TY  - JOUR
+AU  - Ray, Cy
+PY  - 2021
+ER  -
+"""
+
+
+def test_bibtex_entries():
+    entries = list(iter_bibtex(BIBTEX.splitlines(keepends=True)))
+    assert [entry_type for entry_type, _ in entries] == ["article", "book", "misc"]
+    paper = paper_from_bibtex(entries[0])
+    assert paper == make_paper(
+        "Deep Learning for Everyone", "Lee, Ann and Smith, Bob", "2020", "10.1/ab",
+        [], ["nlp", "survey"], "An abstract", "Read twice"
+    )
+    with pytest.raises(ValueError):
+        paper_from_bibtex(entries[1])
+    edited = paper_from_bibtex(entries[2])
+    assert (edited["authors"], edited["year"]) == ("Cy Ray", "2019")
+
+
+def test_ris_records():
+    records = list(iter_ris(RIS.splitlines(keepends=True)))
+    paper = paper_from_ris(records[0])
+    assert paper == make_paper(
+        "Graph Networks", "Lee, Ann and Smith, Bob", "2021", "10.1/cd",
+        [], ["graphs", "survey"], "An abstract", "First note\nSecond note"
+    )
+    with pytest.raises(ValueError):
+        paper_from_ris(records[1])
+
+
+@pytest.mark.parametrize("suffix, text", [(".bib", BIBTEX), (".ris", RIS)])
+def test_import_counts_papers_and_errors(tmp_path, suffix, text):
+    path = tmp_path / ("library" + suffix)
+    path.write_text(text)
+    store = PaperStore()
+    imported, errors = import_file(str(path), store)
+    assert (imported, errors) == ((2, 1) if suffix == ".bib" else (1, 1))
+    assert len(store) == imported
+
+
+def test_read_batches_splits_large_files(tmp_path):
+    path = tmp_path / "many.ris"
+    path.write_text("".join(f"TY  - JOUR\nTI  - Paper {i}\nAU  - Lee, Ann\nPY  - 2020\nER  -\n" for i in range(5)))
+    batches = list(read_batches(str(path), batch_size=2))
+    assert [len(papers) for papers, _, _ in batches] == [2, 2, 1]
+    assert batches[-1][2] == 1.0
+
+
+def test_unsupported_files_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        list(read_batches(str(tmp_path / "library.txt")))
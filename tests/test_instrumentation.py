@@ -0,0 +1,54 @@
+import json
+
+from instrumentation import Instrumentation, instrumented, percentile
+
+
+class Worker:
+    def __init__(self, instruments):
+        self.instruments = instruments
+
+    @instrumented("work")
+    def work(self, value):
+        return value * 2
+
+
+def test_percentile_uses_the_nearest_rank():
+    values = [1, 2, 3, 4]
+    assert [percentile(values, percent) for percent in (1, 50, 95, 100)] == [1, 2, 4, 4]
+
+
+def test_disabled_instruments_record_nothing():
+    instruments = Instrumentation(enabled=False)
+    assert instruments.measure("work") is instruments.measure("other")
+    assert Worker(instruments).work(2) == 4
+    assert instruments.report() == []
+
+
+def test_enabled_instruments_report_each_operation():
+    instruments = Instrumentation(enabled=True)
+    worker = Worker(instruments)
+    for value in range(3):
+        worker.work(value)
+    instruments.record("save", 0.002)
+    report = {row["operation"]: row for row in instruments.report()}
+    assert report["work"]["count"] == 3
+    assert report["save"]["p50_ms"] == report["save"]["max_ms"] == 2.0
+
+    instruments.reset()
+    assert instruments.report() == []
+
+
+def test_capture_profiles_only_the_next_run(tmp_path):
+    instruments = Instrumentation(enabled=False)
+    worker = Worker(instruments)
+    instruments.capture_next("work")
+    assert instruments.capture_pending() == "work"
+    worker.work(1)
+    assert instruments.capture_pending() is None
+    assert "function calls" in instruments.profiles["work"]
+    assert instruments.report() == []
+
+    path = tmp_path / "diagnostics.json"
+    instruments.dump(str(path))
+    saved = json.loads(path.read_text())
+    assert saved["enabled"] is False and set(saved["profiles"]) == {"work"}
@@ -0,0 +1,121 @@
+import json
+import os
+
+from conftest import make
+from journal import Journal, read_library, replay, write_snapshot
+from store import PaperStore
+
+
+def open_library(tmp_path, **options):
+    store = PaperStore()
+    journal = Journal(str(tmp_path / "autosave.json"), **options)
+    journal.load(store)
+    return store, journal
+
+
+def titles(items):
+    return {paper_id: paper["title"] for paper_id, paper in items}
+
+
+def test_changes_survive_a_restart(tmp_path):
+    store, journal = open_library(tmp_path)
+    first = store.add_paper(make("One", summary="Long text"))
+    second = store.add_paper(make("Two"))
+    store.update_paper(first, make("One edited", summary="Long text"))
+    store.delete_paper(second)
+    journal.close()
+
+    store, journal = open_library(tmp_path)
+    assert titles(store.items()) == {first: "One edited"}
+    assert store.get(first)["summary"] == "Long text"
+    journal.close()
+
+
+def test_replay_ignores_a_torn_last_record(tmp_path):
+    path = tmp_path / "log"
+    path.write_text(
+        json.dumps({"op": "add", "id": 1, "paper": make("One")}) + "\n"
+        + json.dumps({"op": "add", "id": 2, "paper": make("Two")}) + "\n"
+        + '{"op": "delete", "i'
+    )
+    papers = {}
+    valid = replay(str(path), papers)
+    assert titles(papers.items()) == {1: "One", 2: "Two"}
+    assert valid == len(path.read_bytes()) - len('{"op": "delete", "i')
+
+
+def test_load_truncates_a_torn_record_before_appending(tmp_path):
+    store, journal = open_library(tmp_path)
+    store.add_paper(make("One"))
+    journal.close()
+    with open(journal.journal_path, "a") as f:
+        f.write('{"op": "add", "id": 2, "pa')
+
+    store, journal = open_library(tmp_path)
+    store.add_paper(make("Two"))
+    journal.close()
+    assert titles(read_library(journal.snapshot_path)) == {1: "One", 2: "Two"}
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    store, journal = open_library(tmp_path, threshold=1)
+    store.add_paper(make("One", notes="Notes"))
+    journal.compact(wait=True)
+    store.add_paper(make("Two"))
+    journal.close()
+
+    assert not os.path.exists(journal.rotated_path)
+    with open(journal.snapshot_path) as f:
+        snapshot = json.load(f)
+    assert 1 in snapshot["ids"]
+
+    store, journal = open_library(tmp_path)
+    assert titles(store.items()) == {1: "One", 2: "Two"}
+    assert store.get(1)["notes"] == "Notes"
+    journal.close()
+
+
+def test_papers_from_an_old_snapshot_stay_readable_after_compaction(tmp_path):
+    path = str(tmp_path / "autosave.json")
+    write_snapshot(path, [(1, make("One", summary="First summary"))])
+    store, journal = open_library(tmp_path)
+    held = store.get(1)
+    store.update_paper(1, make("One edited"))
+    journal.compact(wait=True)
+    assert held["summary"] == "First summary"
+    journal.close()
+
+
+def test_an_interrupted_compaction_is_finished_on_load(tmp_path):
+    path = str(tmp_path / "autosave.json")
+    write_snapshot(path, [(1, make("One"))])
+    # Crashed after rotating the journal but before writing the new snapshot
+    with open(path + ".journal.old", "w") as f:
+        f.write(json.dumps({"op": "add", "id": 2, "paper": make("Two")}) + "\n")
+    with open(path + ".journal", "w") as f:
+        f.write(json.dumps({"op": "delete", "id": 1}) + "\n")
+
+    store, journal = open_library(tmp_path)
+    assert titles(store.items()) == {2: "Two"}
+    assert not os.path.exists(path + ".journal.old")
+    assert os.path.getsize(path + ".journal") == 0
+    journal.close()
+    assert titles(read_library(path)) == {2: "Two"}
+
+
+def test_batches_are_logged_and_cleared_libraries_stay_cleared(tmp_path):
+    store, journal = open_library(tmp_path)
+    with store.batch():
+        store.add_paper(make("One"))
+        store.add_paper(make("Two"))
+    store.load([make("Three")])
+    journal.close()
+    assert titles(read_library(journal.snapshot_path)) == {3: "Three"}
+
+
+def test_plain_json_lists_load_with_sequential_ids(tmp_path):
+    path = tmp_path / "autosave.json"
+    path.write_text(json.dumps([make("One"), make("Two")]))
+    store, journal = open_library(tmp_path)
+    assert titles(store.items()) == {1: "One", 2: "Two"}
+    journal.close()
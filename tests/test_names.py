@@ -0,0 +1,36 @@
+import pytest
+
+from names import imported_authors, name_key, parse_authors
+
+
+@pytest.mark.parametrize("authors, names", [
+    ("Ann Lee, Bob Smith", ["Ann Lee", "Bob Smith"]),
+    ("Lee, Ann and Smith, Bob", ["Ann Lee", "Bob Smith"]),
+    ("Lee, A., Smith, B. J.", ["A. Lee", "B. J. Smith"]),
+    ("Lee, Ann; Smith, Bob", ["Ann Lee", "Bob Smith"]),
+    ("Lee, A.", ["A. Lee"]),
+    ("Lee, Ann B.", ["Ann B. Lee"]),
+    ("van der Berg, Jan", ["Jan van der Berg"]),
+    ("Lee, Smith", ["Lee", "Smith"]),
+    ("Ann Lee, Bob", ["Ann Lee", "Bob"]),
+    ("Ann Lee, Madonna", ["Ann Lee", "Madonna"]),
+    ("Ann Lee et al.", ["Ann Lee"]),
+    (("Ann Lee", "Bob Smith"), ["Ann Lee", "Bob Smith"]),
+    ("", []),
+])
+def test_parse_authors(authors, names):
+    assert parse_authors(authors) == names
+
+
+@pytest.mark.parametrize("authors, stored", [
+    ("Ray, Cy", "Cy Ray"),
+    (" Lee, Ann and Smith, Bob", "Lee, Ann and Smith, Bob"),
+    ("Cy Ray", "Cy Ray"),
+])
+def test_imported_authors_keep_a_lone_name_whole(authors, stored):
+    assert imported_authors(authors) == stored
+    assert len(parse_authors(stored)) == (2 if " and " in authors else 1)
+
+
+def test_name_key_ignores_accents_case_and_dots():
+    assert name_key("José  A. Núñez") == name_key("jose a nunez")
@@ -0,0 +1,89 @@
+import pytest
+
+from paper_list import VirtualPaperList
+
+
+class FakeTree:
+    """Records what a ttk.Treeview would show."""
+
+    def __init__(self):
+        self.rows = {}
+        self.selected = ()
+
+    def get_children(self):
+        return list(self.rows)
+
+    def delete(self, *items):
+        for item in items:
+            del self.rows[item]
+        self.selected = tuple(item for item in self.selected if item in self.rows)
+
+    def insert(self, parent, index, iid, values):
+        self.rows[iid] = values
+
+    def selection_set(self, items):
+        self.selected = tuple(items)
+
+    def selection(self):
+        return self.selected
+
+
+class FakeScrollbar:
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+@pytest.fixture
+def paper_list():
+    # Skips the ttk widgets, so the windowing and sorting logic runs without a display
+    titles = {paper_id: f"Paper {paper_id:02d}" for paper_id in range(1, 21)}
+    paper_list = VirtualPaperList.__new__(VirtualPaperList)
+    paper_list.columns = ["Title"]
+    paper_list.row_values = lambda paper_id: [titles[paper_id]]
+    paper_list.sort_key = lambda column: lambda paper_id: -paper_id
+    paper_list.paper_ids = []
+    paper_list.offset = 0
+    paper_list.visible_rows = 5
+    paper_list.sort_column = None
+    paper_list.sort_reverse = False
+    paper_list._selected = set()
+    paper_list._rendering = False
+    paper_list.tree = FakeTree()
+    paper_list.scrollbar = FakeScrollbar()
+    paper_list.set_rows(titles)
+    return paper_list
+
+
+def shown(paper_list):
+    return [int(item) for item in paper_list.tree.get_children()]
+
+
+def test_only_the_visible_window_is_rendered(paper_list):
+    assert shown(paper_list) == [1, 2, 3, 4, 5]
+    paper_list.scroll(17)
+    assert shown(paper_list) == [16, 17, 18, 19, 20]
+    assert paper_list.scrollbar.position == (0.75, 1.0)
+    paper_list.see(3)
+    assert shown(paper_list)[0] == 3
+
+
+def test_sorting_and_ranked_rows(paper_list):
+    paper_list.sort_by("Title")
+    assert shown(paper_list) == [20, 19, 18, 17, 16]
+    paper_list.sort_by("Title")
+    assert shown(paper_list) == [1, 2, 3, 4, 5]
+    paper_list.set_rows([7, 9, 8])
+    assert shown(paper_list) == [7, 8, 9]
+    paper_list.set_rows([7, 9, 8], ranked=True)
+    assert shown(paper_list) == [7, 9, 8]
+
+
+def test_selection_survives_scrolling_and_refreshes(paper_list):
+    paper_list.tree.selection_set(["2", "4"])
+    paper_list._on_select(None)
+    paper_list.scroll(10)
+    assert paper_list.tree.selection() == ()
+    assert paper_list.selection() == [2, 4]
+    paper_list.discard(4)
+    paper_list.set_rows(range(2, 21))
+    assert paper_list.selection() == [2]
@@ -0,0 +1,51 @@
+import pytest
+
+from conftest import make
+from ranking import RankedIndex, parse_query
+from store import PaperStore
+
+
+@pytest.fixture
+def index():
+    store = PaperStore()
+    store.load([
+        make("Graph Networks", year="2019", tags=["graphs"], summary="Learning on graphs"),
+        make("Deep Learning", year="2021", categories=["ml"], summary="Networks with many layers"),
+        make("A Survey", authors="Bo Smith", year="2023", doi="10.1/ab", notes="graph theory"),
+    ])
+    index = RankedIndex()
+    index.attach(store)
+    return index
+
+
+def test_parse_query_separates_terms_fields_and_filters():
+    terms, field_terms, filters = parse_query('deep title:graph year:2019..2021 tag:"graph theory" doi:10.1/ab')
+    assert terms == ["deep", "graph"]
+    assert field_terms == [("title", "graph")]
+    assert filters == {"year": (2019, 2021), "tags": "graph theory", "doi": "10.1/ab"}
+    assert parse_query("year:..2020")[2] == {"year": (None, 2020)}
+    assert parse_query("year:2020")[2] == {"year": (2020, 2020)}
+
+
+def test_title_matches_rank_first(index):
+    assert index.search("graph") == [1, 3]
+    assert index.search("graph", limit=1) == [1]
+    assert index.search("theory") == [3]
+
+
+def test_field_terms_and_filters_restrict_matches(index):
+    assert index.search("author:bo") == [3]
+    assert index.search("graph year:2020..") == [3]
+    assert index.search("category:ml") == [2]
+    assert index.search("doi:10.1/AB") == [3]
+    assert index.search("year:..2021", limit=None) == [1, 2]
+
+
+def test_index_follows_store_changes(index):
+    index.search("warm up")
+    index.store.update_paper(2, make("Graph Learning", year="2021"))
+    assert sorted(index.search("graph")) == [1, 2, 3]
+    index.store.delete_paper(1)
+    assert index.search("graph") == [2, 3]
+    index.store.load([make("Other")])
+    assert index.search("graph") == []
@@ -0,0 +1,17 @@
+from conftest import make
+from records import compact
+
+
+def test_records_read_like_dicts():
+    paper = compact(make(authors="Ann Lee, Bob Smith", year=" 2020", tags=["a", "b"], extra="kept"))
+    assert paper["authors"] == "Ann Lee, Bob Smith"
+    assert paper["year"] == "2020" and paper.raw("year") == 2020
+    assert paper["tags"] == ["a", "b"] and paper.raw("tags") == ("a", "b")
+    assert paper["extra"] == "kept"
+    assert dict(paper) == dict(make(authors="Ann Lee, Bob Smith", year="2020", tags=["a", "b"], extra="kept"))
+
+
+def test_records_split_string_lists():
+    paper = compact({"title": "T", "categories": "ml", "tags": "nlp, survey"})
+    assert paper["categories"] == ["ml"]
+    assert paper["tags"] == ["nlp", "survey"]
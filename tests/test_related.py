@@ -0,0 +1,63 @@
+import os
+
+from conftest import make
+from related import RelatedIndex, index_path
+from store import PaperStore
+
+
+def library(path, *papers):
+    store = PaperStore()
+    store.load(papers)
+    related = RelatedIndex(path)
+    related.attach(store)
+    return store, related
+
+
+PAPERS = [
+    make("Graph neural networks for molecules", tags=["gnn"], summary="Message passing on molecular graphs"),
+    make("Message passing neural networks", tags=["gnn"], summary="Graphs and molecules"),
+    make("Medieval poetry", tags=["history"], summary="Verse from the twelfth century"),
+]
+
+
+def test_related_papers_rank_by_similarity():
+    store, related = library(None, *PAPERS)
+    results = related.related(1)
+    assert [paper_id for paper_id, _ in results] == [2]
+    assert 0 < results[0][1] <= 1
+    assert related.related(99) == []
+
+
+def test_index_follows_store_changes():
+    store, related = library(None, *PAPERS)
+    related.related(1)
+    store.update_paper(3, make("Graph networks for molecules", tags=["gnn"], summary="Molecular graphs"))
+    assert [paper_id for paper_id, _ in related.related(1)][:1] == [3]
+    store.delete_paper(3)
+    assert 3 not in dict(related.related(1))
+
+
+def test_saved_index_is_small_and_reused(tmp_path):
+    path = index_path(str(tmp_path / "autosave.json"))
+    store, related = library(path, *PAPERS)
+    expected = related.related(1)
+    related.save()
+    # Only the document frequencies of features some paper has are written
+    assert os.path.getsize(path) < 10000
+
+    reloaded = RelatedIndex(path)
+    reloaded.attach(store)
+    assert reloaded.related(1) == expected
+    assert not reloaded._dirty
+
+
+def test_papers_changed_elsewhere_are_recomputed(tmp_path):
+    path = index_path(str(tmp_path / "autosave.json"))
+    store, related = library(path, *PAPERS)
+    related.related(1)
+    related.save()
+
+    papers = [dict(paper) for paper in store.papers()]
+    papers[2] = make("Graph neural networks for molecules", tags=["gnn"], summary="Message passing on molecular graphs")
+    store, related = library(path, *papers)
+    assert [paper_id for paper_id, _ in related.related(1)][0] == 3
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import FakeMaster
+from reminders import MAX_WAIT_MS, ReminderScheduler, parse_time
+
+
+def scheduler(tmp_path, fired=None):
+    reminders = ReminderScheduler(FakeMaster(), (fired if fired is not None else []).append,
+                                  path=str(tmp_path / "reminders.json"))
+    reminders.start()
+    return reminders
+
+
+def test_reminders_are_kept_in_time_order_across_restarts(tmp_path):
+    reminders = scheduler(tmp_path)
+    later, sooner = datetime.now() + timedelta(days=2), datetime.now() + timedelta(days=1)
+    reminders.add(later, "Second", paper_id=3)
+    reminders.add(sooner, "First")
+    assert [reminder["message"] for reminder in scheduler(tmp_path).pending()] == ["First", "Second"]
+
+
+def test_only_the_next_reminder_has_a_timer(tmp_path):
+    reminders = scheduler(tmp_path)
+    reminders.add(datetime.now() + timedelta(days=400), "Far")
+    reminders.add(datetime.now() + timedelta(days=300), "Less far")
+    [(delay, _)] = reminders.master.timers.values()
+    assert delay == MAX_WAIT_MS
+    reminders.stop()
+    assert reminders.master.timers == {}
+
+
+def test_due_reminders_fire_and_are_forgotten(tmp_path):
+    fired = []
+    reminders = scheduler(tmp_path, fired)
+    reminders.add(datetime.now() - timedelta(minutes=5), "Overdue")
+    reminders.add(datetime.now() + timedelta(days=1), "Tomorrow")
+    reminders.master.run()
+    assert [reminder["message"] for reminder in fired] == ["Overdue"]
+    assert [reminder["message"] for reminder in scheduler(tmp_path).pending()] == ["Tomorrow"]
+
+
+def test_parse_time_rejects_other_formats():
+    assert parse_time(" 2024-08-29 10:00 ") == datetime(2024, 8, 29, 10, 0)
+    with pytest.raises(ValueError):
+        parse_time("29/08/2024")
@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import make
+from server import HTTPError, LibraryServer
+from store import PaperStore
+
+
+@pytest.fixture
+def server():
+    store = PaperStore()
+    store.load([make("Deep Learning", year="2020", tags=["nlp"]), make("Graph Networks", year="2021")])
+    return LibraryServer(store)
+
+
+def request(server, method, target, body=None):
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    try:
+        return server.dispatch(method, target, data)
+    except HTTPError as e:
+        return e.status, {"error": e.message}
+
+
+def test_list_search_and_filter(server):
+    status, payload = request(server, "GET", "/papers?q=deep")
+    assert status == 200 and [paper["id"] for paper in payload["papers"]] == [1]
+    _, payload = request(server, "GET", "/papers?tag=nlp&year=2020")
+    assert payload["total"] == 1
+    _, payload = request(server, "GET", "/papers?offset=1&limit=1")
+    assert (payload["total"], [paper["id"] for paper in payload["papers"]]) == (2, [2])
+
+
+def test_crud(server):
+    status, created = request(server, "POST", "/papers", {"title": "New", "authors": "Cy Ray", "year": 2022,
+                                                          "tags": "a, b"})
+    assert status == 201 and created["year"] == "2022" and created["tags"] == ["a", "b"]
+    paper_id = created["id"]
+
+    status, updated = request(server, "PUT", f"/papers/{paper_id}", {"notes": "Read"})
+    assert status == 200 and (updated["title"], updated["notes"]) == ("New", "Read")
+    assert request(server, "GET", f"/papers/{paper_id}") == (200, updated)
+
+    assert request(server, "DELETE", f"/papers/{paper_id}") == (200, {"id": paper_id})
+    assert request(server, "GET", f"/papers/{paper_id}")[0] == 404
+
+
+def test_stats(server):
+    status, payload = request(server, "GET", "/stats")
+    assert status == 200 and payload["total"] == 2 and payload["tags"] == [("nlp", 1)]
+
+
+@pytest.mark.parametrize("body, message", [
+    ({"title": "T", "authors": "A", "year": "2020", "tags": 5}, "tags must be"),
+    ({"title": "T", "authors": "A", "year": "2020", "categories": [1]}, "categories must be"),
+    ({"title": None, "authors": "A", "year": "2020"}, "title must be a string"),
+    ({"title": "T", "authors": "A", "year": True}, "year must be"),
+    ({"title": "T", "authors": "", "year": "2020"}, "required"),
+    ([1, 2], "Expected a JSON object"),
+])
+def test_bad_papers_are_rejected(server, body, message):
+    status, payload = request(server, "POST", "/papers", body)
+    assert status == 400 and message in payload["error"]
+    assert len(server.store) == 2
+
+
+@pytest.mark.parametrize("method, target, status", [
+    ("GET", "/nothing", 404),
+    ("GET", "/papers/99", 404),
+    ("GET", "/papers/abc", 404),
+    ("PATCH", "/papers", 405),
+    ("GET", "/papers?limit=x", 400),
+    ("GET", "/papers?offset=-1", 400),
+])
+def test_bad_requests(server, method, target, status):
+    assert request(server, method, target)[0] == status
+
+
+def test_invalid_json_body(server):
+    with pytest.raises(HTTPError) as error:
+        server.dispatch("POST", "/papers", b"{not json")
+    assert error.value.status == 400
+
+
+def exchange(server, raw):
+    async def run():
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return response
+
+    return asyncio.run(run())
+
+
+def test_connection_answers_and_keeps_alive(server):
+    body = json.dumps({"title": "T", "authors": "A", "year": "2020", "tags": 5}).encode()
+    response = exchange(server, (
+        b"POST /papers HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s"
+        b"GET /papers/1 HTTP/1.1\r\nConnection: close\r\n\r\n" % (len(body), body)
+    ))
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
+    assert b"HTTP/1.1 200 OK" in response
+
+
+def test_unexpected_errors_become_500(server, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(server, "dispatch", fail)
+    response = exchange(server, b"GET /papers HTTP/1.1\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 500 Internal Server Error")
+    assert b"boom" in response
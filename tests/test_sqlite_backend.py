@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+
+from conftest import make
+from history import History
+from records import with_texts
+from sqlite_backend import RowTextRef, RowTexts, SQLiteBackend
+from store import PaperStore
+from text_index import TextIndex
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "library.db")
+    store = PaperStore()
+    backend = SQLiteBackend(path)
+    backend.import_store(store)
+    store.add_paper(make("One", tags=["nlp"], summary="First summary"))
+    store.add_paper(make("Two", year="2021", summary="Second summary", notes="Notes"))
+    backend.close()
+    return path
+
+
+def open_library(path):
+    store = PaperStore()
+    backend = SQLiteBackend(path)
+    backend.attach(store)
+    return store, backend
+
+
+def test_changes_are_written_through(path):
+    store, backend = open_library(path)
+    with store.batch():
+        store.update_paper(1, make("One edited"))
+        store.delete_paper(2)
+    store.add_paper(make("Three"))
+    backend.close()
+
+    store, backend = open_library(path)
+    assert [paper["title"] for paper in store.papers()] == ["One edited", "Three"]
+    backend.close()
+
+
+def test_filter_and_count_in_sql(path):
+    backend = SQLiteBackend(path)
+    assert [paper_id for paper_id, _ in backend.filter("second")] == [2]
+    assert backend.count(tag="nlp") == 1
+    assert backend.count(year=2021) == 1
+    backend.close()
+
+
+def test_texts_are_read_when_accessed(path):
+    store, backend = open_library(path)
+    paper = store.get(2)
+    assert type(paper.raw("summary")) is RowTextRef
+    assert paper["summary"] == "Second summary" and paper["notes"] == "Notes"
+    assert store.get(1).raw("notes") == ""
+
+    texts = []
+    worker = threading.Thread(target=lambda: texts.append(store.get(1)["summary"]))
+    worker.start()
+    worker.join()
+    assert texts == ["First summary"]
+    backend.close()
+
+
+def test_undo_restores_texts_of_edited_and_deleted_papers(path):
+    store, backend = open_library(path)
+    history = History(store)
+    with history.action("Edit"):
+        store.update_paper(1, make("One", summary="Changed"))
+    with history.action("Delete"):
+        store.delete_paper(2)
+    history.undo()
+    history.undo()
+    assert store.get(1)["summary"] == "First summary"
+    assert backend.get(1)["summary"] == "First summary"
+    assert backend.get(2)["notes"] == "Notes"
+    backend.close()
+
+
+def test_papers_dropped_by_a_reload_keep_their_texts(path):
+    store, backend = open_library(path)
+    held = store.get(2)
+    store.load([make("Other", summary="Other summary")])
+    assert held["summary"] == "Second summary"
+    backend.close()
+
+
+def test_texts_are_read_in_bulk(path, monkeypatch):
+    store, backend = open_library(path)
+    monkeypatch.setattr(RowTexts, "read", lambda *args: pytest.fail("read one text at a time"))
+    texts = [(paper["summary"], paper["notes"]) for _, paper in with_texts(store.items())]
+    assert texts == [("First summary", ""), ("Second summary", "Notes")]
+
+    backend._texts.freeze()
+    assert [paper["summary"] for _, paper in with_texts(store.items())] == ["First summary", "Second summary"]
+    backend.close()
+
+
+def test_texts_are_indexed_for_search_without_loading_them(path):
+    store = PaperStore()
+    index = TextIndex()
+    index.attach(store)
+    backend = SQLiteBackend(path)
+    backend.attach(store)
+    assert index.pending() == 2
+    assert index.search("second") == {2}
+    backend.close()
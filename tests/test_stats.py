@@ -0,0 +1,34 @@
+from conftest import make
+from stats import LibraryStats
+from store import PaperStore
+
+
+def test_stats_follow_store_changes():
+    store = PaperStore()
+    store.load([make(year="2020", categories=["ml"], tags=["nlp"]), make(year="2021", tags=["nlp", "cv"])])
+    stats = LibraryStats()
+    stats.attach(store)
+    assert stats.tag_distribution() == [("cv", 1), ("nlp", 2)]
+    values_version = stats.values_version
+
+    store.update_paper(2, make(year="2020", tags=["nlp"]))
+    assert stats.year_distribution() == [(2020, 2)]
+    assert stats.tags() == ["nlp"] and stats.values_version != values_version
+    values_version = stats.values_version
+    store.update_paper(2, make(year="2020", tags=["nlp"], notes="edited"))
+    assert stats.values_version == values_version
+
+    store.load([])
+    assert stats.summary_text() == "No papers available."
+
+
+def test_stats_accept_papers_missing_fields():
+    store = PaperStore()
+    stats = LibraryStats()
+    stats.attach(store)
+    paper_id = store.add_paper({"title": "Only a title"})
+    store.add_paper(make(year="2020", categories=["ml"], tags=["nlp"]))
+    assert stats.total == 2
+    assert stats.category_distribution() == [("ml", 1)]
+    store.delete_paper(paper_id)
+    assert stats.year_distribution() == [(2020, 1)]
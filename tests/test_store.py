@@ -0,0 +1,74 @@
+import pytest
+
+from conftest import make
+from store import PaperStore
+
+
+def test_ids_are_stable_and_increasing():
+    store = PaperStore()
+    first = store.add_paper(make("One"))
+    second = store.add_paper(make("Two"))
+    store.delete_paper(first)
+    third = store.add_paper(make("Three"))
+    assert (first, second, third) == (1, 2, 3)
+    assert store.ids() == [2, 3]
+
+
+def test_explicit_id_must_be_free():
+    store = PaperStore()
+    store.add_paper(make(), 5)
+    with pytest.raises(KeyError):
+        store.add_paper(make(), 5)
+    assert store.add_paper(make()) == 6
+
+
+def test_indexes_follow_changes():
+    store = PaperStore()
+    paper_id = store.add_paper(make(year="2020", doi="10.1/AB ", categories=["ml"], tags=["nlp", "survey"]))
+    assert store.ids_for_year(2020) == {paper_id}
+    assert store.ids_for_doi("10.1/ab") == {paper_id}
+    assert store.filter(category="ml", tag="survey") == [paper_id]
+
+    store.update_paper(paper_id, make(year="2021", categories=["cv"], tags=["nlp"]))
+    assert store.ids_for_year("2020") == set()
+    assert store.ids_for_doi("10.1/ab") == set()
+    assert store.filter(category="ml") == []
+    assert store.filter(year="2021", category="cv", tag="nlp") == [paper_id]
+    assert store.years() == ["2021"] and store.tags() == ["nlp"]
+
+    store.delete_paper(paper_id)
+    assert store.categories() == [] and store.tags() == [] and store.years() == []
+
+
+def test_filter_within_restricts_results():
+    store = PaperStore()
+    ids = [store.add_paper(make(tags=["x"])) for _ in range(3)]
+    assert store.filter(tag="x", within={ids[1]}) == [ids[1]]
+    assert store.filter(within={ids[0], ids[2]}) == [ids[0], ids[2]]
+
+
+def test_listener_events(events):
+    store = PaperStore()
+    store.subscribe(events)
+    paper_id = store.add_paper(make())
+    store.update_paper(paper_id, make(title="Changed"))
+    store.delete_paper(paper_id)
+    with store.batch():
+        with store.batch():
+            store.add_paper(make())
+    store.load([make()])
+    assert events.recorded == [
+        ("add", 1), ("update", 1), ("delete", 1),
+        ("begin", None), ("add", 2), ("commit", None),
+        ("begin", None), ("clear", None), ("add", 3), ("commit", None),
+    ]
+
+
+def test_listener_gets_old_and_new_papers():
+    store = PaperStore()
+    seen = []
+    store.subscribe(lambda event, paper_id, old, new: seen.append((old and old["title"], new and new["title"])))
+    paper_id = store.add_paper(make("One"))
+    store.update_paper(paper_id, make("Two"))
+    store.delete_paper(paper_id)
+    assert seen == [(None, "One"), ("One", "Two"), ("Two", None)]
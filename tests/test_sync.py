@@ -0,0 +1,113 @@
+import pytest
+
+from conftest import make
+from store import PaperStore
+from sync import apply_changes, changes, count_changes, diff, index_library, merge, merge_fields, record_key
+
+
+def index(*papers):
+    return index_library(enumerate(papers, start=1))
+
+
+def test_record_keys_match_across_libraries():
+    assert record_key(make(doi="https://doi.org/10.1/AB")) == record_key(make(doi="10.1/ab"))
+    assert record_key(make("Deep  Learning!", year="2020")) == record_key(make("deep learning", year="2020"))
+    assert record_key(make("Deep Learning", year="2020")) != record_key(make("Deep Learning", year="2021"))
+
+
+def test_duplicate_keys_get_suffixes():
+    keys = list(index(make("Same"), make("Same")))
+    assert keys[1] == keys[0] + "#2"
+
+
+def test_diff_compares_digests():
+    old = index(make("One"), make("Two"), make("Three"))
+    new = index(make("One"), make("Two", notes="changed"), make("Four"))
+    added, removed, changed = diff(old, new)
+    assert [len(added), len(removed), len(changed)] == [1, 1, 1]
+
+
+def test_merge_without_base_keeps_both_sides():
+    ours = index(make("One"), make("Shared", notes="ours"))
+    theirs = index(make("Two"), make("Shared", notes="theirs"))
+    merged, conflicts = merge(ours, theirs)
+    assert sorted(paper["title"] for paper in merged.values()) == ["One", "Two"]
+    assert [reason for _, reason, _ in conflicts] == ["different in the two libraries"]
+
+    merged, _ = merge(ours, theirs, prefer="theirs")
+    assert sorted(paper["notes"] for paper in merged.values()) == ["", "", "theirs"]
+
+
+def test_three_way_merge_takes_one_sided_changes():
+    base = index(make("Kept"), make("Edited"), make("Deleted"))
+    ours = index(make("Kept"), make("Edited", notes="ours"), make("Deleted"), make("Added"))
+    theirs = index(make("Kept"), make("Edited"))
+    merged, conflicts = merge(ours, theirs, base)
+    assert conflicts == []
+    by_title = {key: paper and paper["title"] for key, paper in merged.items()}
+    deleted = record_key(make("Deleted"))
+    assert by_title.pop(deleted) is None
+    assert sorted(by_title.values()) == ["Added", "Edited"]
+
+
+def test_three_way_merge_combines_fields():
+    base = index(make("Paper", tags=["a", "b"]))
+    ours = index(make("Paper", notes="ours", tags=["a", "b", "c"]))
+    theirs = index(make("Paper", doi="", summary="theirs", tags=["a"]))
+    merged, conflicts = merge(ours, theirs, base)
+    paper = merged[record_key(make("Paper"))]
+    assert conflicts == []
+    assert (paper["notes"], paper["summary"], paper["tags"]) == ("ours", "theirs", ["a", "c"])
+
+
+def test_conflicting_fields_follow_the_preference():
+    base = index(make("Paper", notes="base", summary="base"))
+    ours = index(make("Paper", notes="ours", summary="ours"))
+    theirs = index(make("Paper", notes="theirs", summary="base"))
+    key = record_key(make("Paper"))
+
+    merged, conflicts = merge(ours, theirs, base)
+    assert conflicts == [(key, "edited differently in both libraries", ["notes"])]
+    assert (merged[key]["notes"], merged[key]["summary"]) == ("ours", "ours")
+
+    merged, _ = merge(ours, theirs, base, prefer="theirs")
+    assert (merged[key]["notes"], merged[key]["summary"]) == ("theirs", "ours")
+
+
+def test_delete_against_edit_conflicts():
+    base = index(make("Paper"))
+    ours = index()
+    theirs = index(make("Paper", notes="edited"))
+    merged, conflicts = merge(ours, theirs, base)
+    key = record_key(make("Paper"))
+    assert conflicts[0][:2] == (key, "deleted in one library and edited in the other")
+    assert merged[key] is None
+    merged, _ = merge(ours, theirs, base, prefer="theirs")
+    assert merged[key]["notes"] == "edited"
+
+
+def test_merge_fields_keeps_lists_conflict_free():
+    paper, fields = merge_fields(make(categories=["x"]), make(categories=["x", "y"]), make(categories=[]))
+    assert (paper["categories"], fields) == (["y"], [])
+
+
+def test_unknown_preference_is_rejected():
+    with pytest.raises(ValueError):
+        merge({}, {}, prefer="mine")
+
+
+def test_apply_changes_brings_the_store_to_the_merge():
+    store = PaperStore()
+    store.load([make("Kept"), make("Edited"), make("Deleted")])
+    ours = index_library(store.items())
+    base = index(make("Kept"), make("Edited"), make("Deleted"))
+    theirs = index(make("Kept"), make("Edited", notes="theirs"), make("New"))
+    merged, _ = merge(ours, theirs, base)
+    result = changes(ours, merged)
+    assert count_changes(result) == {"add": 1, "update": 1, "delete": 1}
+
+    apply_changes(store, result)
+    assert sorted((paper["title"], paper["notes"]) for paper in store.papers()) == [
+        ("Edited", "theirs"), ("Kept", ""), ("New", ""),
+    ]
+    assert changes(index_library(store.items()), merged) == []
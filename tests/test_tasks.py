@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from conftest import FakeMaster
+from tasks import MAX_PENDING_ITEMS, TaskRunner
+
+
+@pytest.fixture
+def runner():
+    runner = TaskRunner(FakeMaster())
+    yield runner
+    runner.shutdown()
+
+
+def wait(runner, timeout=5):
+    """Poll like the Tk loop would until every task has finished."""
+    deadline = time.monotonic() + timeout
+    while runner.active:
+        assert time.monotonic() < deadline, "tasks did not finish"
+        runner.master.run()
+        time.sleep(0.005)
+
+
+def test_results_are_delivered_on_the_polling_thread(runner):
+    results = []
+    runner.submit(lambda task, x: (threading.current_thread(), x * 2), 21,
+                  on_done=lambda result: results.append((threading.current_thread(), result)))
+    wait(runner)
+    [(caller, (worker, value))] = results
+    assert caller is threading.current_thread() and worker is not caller and value == 42
+    # Nothing is polled once no task is active
+    runner.master.run()
+    assert runner.master.timers == {}
+
+
+def test_errors_go_to_on_error_or_are_raised(runner):
+    def fail(task):
+        raise ValueError("bad")
+
+    errors = []
+    runner.submit(fail, on_error=errors.append)
+    wait(runner)
+    assert [str(error) for error in errors] == ["bad"]
+
+    runner.submit(fail)
+    with pytest.raises(ValueError):
+        wait(runner)
+
+
+def test_items_arrive_in_order_with_few_pending(runner):
+    items = []
+    peak = []
+
+    def job(task):
+        for i in range(20):
+            task.emit(i)
+            peak.append(runner._messages.qsize())
+        return "done"
+
+    runner.submit(job, on_item=items.append, on_done=items.append)
+    wait(runner)
+    assert items == list(range(20)) + ["done"]
+    assert max(peak) <= MAX_PENDING_ITEMS
+
+
+def test_cancelled_tasks_call_on_cancel_only(runner):
+    started = threading.Event()
+    calls = []
+
+    def job(task):
+        started.set()
+        while True:
+            task.progress(0.5)
+            task.check_cancelled()
+            time.sleep(0.001)
+
+    task = runner.submit(job, on_done=calls.append, on_error=calls.append, on_cancel=lambda: calls.append("cancel"))
+    started.wait(5)
+    task.cancel()
+    wait(runner)
+    assert calls == ["cancel"]
+
+
+def test_shutdown_cancels_running_tasks(runner):
+    started = threading.Event()
+    task = runner.submit(lambda task: started.set() or task.cancel_event.wait(5))
+    started.wait(5)
+    runner.shutdown()
+    assert task.cancelled()
@@ -0,0 +1,86 @@
+from conftest import make
+from journal import Journal
+from store import PaperStore
+from text_index import TextIndex, tokenize
+
+
+def indexed(*papers):
+    store = PaperStore()
+    index = TextIndex()
+    index.attach(store)
+    store.load(list(papers))
+    return store, index
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Deep-Learning, 2020!") == ["deep", "learning", "2020"]
+
+
+def test_every_term_matches_as_a_prefix():
+    store, index = indexed(make("Graph Networks", authors="Ann Lee"), make("Graphical Models", year="2021"))
+    assert index.search("") is None
+    assert index.search("gr") == {1, 2}
+    assert index.search("graphic") == {2}
+    assert index.search("net lee") == {1}
+    assert index.search("graph 2021") == {2}
+    assert index.search("graph", within={1}) == {1}
+    assert index.search("nothing") == set()
+
+
+def test_index_follows_store_changes():
+    store, index = indexed(make("Graph Networks"), make("Deep Learning"))
+    store.update_paper(1, make("Sparse Networks"))
+    assert index.search("graph") == set() and index.search("gr") == set()
+    assert index.search("sparse net") == {1}
+    store.delete_paper(2)
+    assert index.search("deep") == set()
+    paper_id = store.add_paper(make("Deeper Graphs"))
+    assert index.search("dee") == {paper_id}
+    store.load([])
+    assert index.search("sparse") == set()
+
+
+def load_snapshot(tmp_path, papers):
+    journal = Journal(str(tmp_path / "autosave.json"))
+    store = PaperStore()
+    journal.load(store)
+    store.load(papers)
+    journal.compact(wait=True)
+    journal.close()
+
+    store = PaperStore()
+    index = TextIndex()
+    index.attach(store)
+    journal = Journal(str(tmp_path / "autosave.json"))
+    journal.load(store)
+    return store, index, journal
+
+
+def test_loaded_texts_wait_until_searched(tmp_path):
+    store, index, journal = load_snapshot(tmp_path, [
+        make("Graph Networks", summary="Message passing"), make("Deep Learning", notes="Read later"),
+    ])
+    assert index.pending() == 2
+    assert index.search("graph") == {1}
+    assert index.pending() == 0
+    assert index.search("passing") == {1} and index.search("later") == {2}
+    journal.close()
+
+
+def test_waiting_texts_are_indexed_in_chunks(tmp_path):
+    store, index, journal = load_snapshot(tmp_path, [make(str(i), summary=f"Topic{i}") for i in range(5)])
+    assert index.index_pending(limit=3) is True
+    assert index.pending() == 2
+    assert index.index_pending(limit=3) is False
+    assert index.search("topic") == {1, 2, 3, 4, 5}
+    journal.close()
+
+
+def test_removed_papers_leave_no_waiting_texts(tmp_path):
+    store, index, journal = load_snapshot(tmp_path, [make("One", summary="Kept"), make("Two", summary="Dropped")])
+    store.delete_paper(2)
+    store.update_paper(1, make("One", summary="Edited"))
+    assert index.pending() == 0
+    assert index.search("dropped") == set() and index.search("kept") == set()
+    assert index.search("edited") == {1}
+    journal.close()
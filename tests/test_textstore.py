@@ -0,0 +1,41 @@
+from conftest import make
+from records import PaperRecord, with_texts
+from textstore import TextRef, TextStore, unpack_papers, write_texts
+
+
+def open_texts(tmp_path, papers):
+    path = str(tmp_path / "library.text")
+    packed = write_texts(path, papers)
+    texts = TextStore(path, cache_size=2)
+    return unpack_papers(packed, texts), texts
+
+
+def test_texts_are_read_when_accessed(tmp_path):
+    papers, texts = open_texts(tmp_path, [make("One", summary="Résumé"), make("Two", notes="Notes")])
+    assert type(papers[0].raw("summary")) is TextRef and papers[0].raw("notes") == ""
+    assert [paper["summary"] for paper in papers] == ["Résumé", ""]
+    assert papers[1]["notes"] == "Notes"
+    texts.close()
+
+
+def test_read_many_keeps_the_order_asked_and_the_cache(tmp_path):
+    papers, texts = open_texts(tmp_path, [make(summary=str(i) * 3) for i in range(5)])
+    refs = [paper.raw("summary") for paper in reversed(papers)]
+    assert texts.read_many(refs) == ["444", "333", "222", "111", "000"]
+    assert len(texts._cache) == 0
+    texts.close()
+
+
+def test_with_texts_reads_each_chunk_in_bulk(tmp_path, monkeypatch):
+    papers, texts = open_texts(tmp_path, [make(str(i), summary=f"Summary {i}", notes="N") for i in range(5)])
+    calls = []
+    read_many = texts.read_many
+    monkeypatch.setattr(texts, "read", lambda offset, length: calls.append("read"))
+    monkeypatch.setattr(texts, "read_many", lambda refs: calls.append(len(refs)) or read_many(refs))
+    items = list(enumerate(papers + [PaperRecord(make("Plain", summary="Inline"))], start=1))
+
+    viewed = list(with_texts(items, chunk_size=4))
+    assert calls == [8, 2]
+    assert [paper["summary"] for _, paper in viewed] == [f"Summary {i}" for i in range(5)] + ["Inline"]
+    assert viewed[0][1]["title"] == "0" and viewed[5][1] is items[5][1]
+    texts.close()
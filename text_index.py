@@ -0,0 +1,190 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import islice
+
+from records import PaperRecord, with_texts
+
+TEXT_FIELDS = ["title", "authors", "year", "summary", "notes"]
+TOKEN_RE = re.compile(r"\w+")
+
+# Prefixes up to this length get their own postings so one- or two-letter
+# queries don't have to union the postings of thousands of vocabulary terms.
+SHORT_PREFIX_LEN = 2
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class TextIndex:
+    """Inverted index over the text fields of the papers in a PaperStore.
+
+    Every query term is treated as a prefix, so partial words still match.
+    Short prefixes are answered from their own postings; longer ones scan the
+    matching slice of the sorted vocabulary. Subscribe it to a store with
+    attach() and it is kept up to date on every add/edit/delete.
+
+    Summaries and notes that are still on disk (lazy texts of a snapshot or
+    database) are not read when their paper is added: the paper waits in a
+    queue that index_pending() works through in chunks, reading each
+    chunk's texts in bulk, e.g. while a window is idle. A search first
+    indexes whatever is left, so results are always complete; it is only
+    the first search after a large load that may pay for the rest.
+    """
+
+    def __init__(self, fields=TEXT_FIELDS):
+        self.fields = fields
+        self._postings = defaultdict(set)
+        self._short_prefixes = defaultdict(set)
+        self._vocabulary = []
+        self._new_tokens = set()
+        self._stale_tokens = 0
+        self._pending = {}
+
+    def attach(self, store):
+        self.clear()
+        for paper_id, paper in store.items():
+            self.add(paper_id, paper)
+        store.subscribe(self.on_change)
+
+    def on_change(self, event, paper_id, old, new):
+        if event == "clear":
+            self.clear()
+            return
+        if old is not None:
+            self.remove(paper_id, old)
+        if new is not None:
+            self.add(paper_id, new)
+
+    def clear(self):
+        self._postings.clear()
+        self._short_prefixes.clear()
+        self._vocabulary = []
+        self._new_tokens.clear()
+        self._stale_tokens = 0
+        self._pending.clear()
+
+    def tokens(self, paper, fields=None):
+        tokens = set()
+        for field in self.fields if fields is None else fields:
+            tokens.update(tokenize(paper.get(field, "")))
+        return tokens
+
+    def pending(self):
+        """Return how many papers still have summaries or notes waiting to be indexed."""
+        return len(self._pending)
+
+    def index_pending(self, limit=None):
+        """Index the waiting texts of up to limit papers (all by default); returns True while some remain."""
+        paper_ids = list(self._pending if limit is None else islice(self._pending, limit))
+        batch = [(paper_id, self._pending.pop(paper_id)) for paper_id in paper_ids]
+        deferred = {paper_id: fields for paper_id, (_, fields) in batch}
+        for paper_id, paper in with_texts((paper_id, paper) for paper_id, (paper, _) in batch):
+            self._add_tokens(paper_id, self.tokens(paper, deferred[paper_id]))
+        return bool(self._pending)
+
+    def _lazy_fields(self, paper):
+        if type(paper) is not PaperRecord:
+            return ()
+        return tuple(field for field in self.fields if hasattr(paper.raw(field, ""), "resolve"))
+
+    def add(self, paper_id, paper):
+        fields = None
+        deferred = self._lazy_fields(paper)
+        if deferred:
+            self._pending[paper_id] = (paper, deferred)
+            fields = [field for field in self.fields if field not in deferred]
+        self._add_tokens(paper_id, self.tokens(paper, fields))
+
+    def _add_tokens(self, paper_id, tokens):
+        for token in tokens:
+            ids = self._postings[token]
+            if not ids:
+                self._new_tokens.add(token)
+            ids.add(paper_id)
+            for length in range(1, min(len(token), SHORT_PREFIX_LEN) + 1):
+                self._short_prefixes[token[:length]].add(paper_id)
+
+    def remove(self, paper_id, paper):
+        fields = None
+        pending = self._pending.get(paper_id)
+        if pending is not None and pending[0] is paper:
+            # Its texts were never indexed, so there is nothing of them to remove
+            del self._pending[paper_id]
+            fields = [field for field in self.fields if field not in pending[1]]
+        tokens = self.tokens(paper, fields)
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(paper_id)
+            if not ids:
+                del self._postings[token]
+                self._stale_tokens += 1
+
+        # A short prefix may still be reachable through another token of the same paper
+        prefixes = {token[:length] for token in tokens for length in range(1, min(len(token), SHORT_PREFIX_LEN) + 1)}
+        for prefix in prefixes:
+            ids = self._short_prefixes.get(prefix)
+            if ids is None:
+                continue
+            ids.discard(paper_id)
+            if not ids:
+                del self._short_prefixes[prefix]
+
+    def _sorted_vocabulary(self):
+        # New tokens are merged in lazily so bulk loads sort the vocabulary once
+        # instead of paying an insertion per token; removed tokens are skipped
+        # at lookup time until the next full rebuild.
+        if self._new_tokens:
+            if len(self._new_tokens) + self._stale_tokens > len(self._vocabulary) // 8:
+                self._vocabulary = sorted(self._postings)
+                self._stale_tokens = 0
+            else:
+                for token in self._new_tokens:
+                    position = bisect_left(self._vocabulary, token)
+                    if position == len(self._vocabulary) or self._vocabulary[position] != token:
+                        self._vocabulary.insert(position, token)
+            self._new_tokens.clear()
+        return self._vocabulary
+
+    def prefix_ids(self, prefix):
+        """Return the set of paper IDs having a token that starts with prefix."""
+        if self._pending:
+            self.index_pending()
+        if len(prefix) <= SHORT_PREFIX_LEN:
+            return self._short_prefixes.get(prefix, set())
+
+        vocabulary = self._sorted_vocabulary()
+        matches = []
+        for position in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            token = vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            ids = self._postings.get(token)
+            if ids:
+                matches.append(ids)
+        if not matches:
+            return set()
+        if len(matches) == 1:
+            return matches[0]
+        return set().union(*matches)
+
+    def search(self, query, within=None):
+        """Return the IDs of papers matching every term of query.
+
+        Returns None for an empty query, meaning "no text restriction". within
+        optionally restricts the candidates, e.g. to a previous result set.
+        """
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not terms:
+            return None if within is None else set(within)
+
+        # Longer prefixes are usually more selective, so start from them
+        result = set(self.prefix_ids(terms[0])) if within is None else within & self.prefix_ids(terms[0])
+        for term in terms[1:]:
+            if not result:
+                break
+            result &= self.prefix_ids(term)
+        return result
@@ -0,0 +1,100 @@
+import os
+import threading
+from collections import OrderedDict
+
+from records import PaperRecord
+
+LAZY_FIELDS = ("summary", "notes")
+CACHE_SIZE = 256  # Texts kept in memory per TextStore
+
+
+class TextStore:
+    """Read-only file of UTF-8 texts addressed by (offset, length), with a small LRU cache.
+
+    Safe to share between the Tk thread and workers such as exports.
+    """
+
+    def __init__(self, path, cache_size=CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._file = open(path, "rb")
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def read(self, offset, length):
+        with self._lock:
+            text = self._cache.get(offset)
+            if text is not None:
+                self._cache.move_to_end(offset)
+                return text
+            self._file.seek(offset)
+            text = self._file.read(length).decode("utf-8")
+            self._cache[offset] = text
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def read_many(self, refs):
+        """Return the texts of refs, read in file order without evicting the cached ones."""
+        texts = [""] * len(refs)
+        with self._lock:
+            for position in sorted(range(len(refs)), key=lambda position: refs[position].offset):
+                ref = refs[position]
+                if ref.length:
+                    self._file.seek(ref.offset)
+                    texts[position] = self._file.read(ref.length).decode("utf-8")
+        return texts
+
+    def close(self):
+        self._file.close()
+
+
+class TextRef:
+    """Location of one text in a TextStore."""
+
+    __slots__ = ("texts", "offset", "length")
+
+    def __init__(self, texts, offset, length):
+        self.texts = texts
+        self.offset = offset
+        self.length = length
+
+    def resolve(self):
+        return self.texts.read(self.offset, self.length) if self.length else ""
+
+
+def write_texts(path, papers):
+    """Write the lazy fields of papers to a new text file at path.
+
+    Returns the papers with those fields replaced by [offset, length]
+    pairs, ready to be stored as JSON.
+    """
+    packed = []
+    offset = 0
+    with open(path, "wb") as f:
+        for paper in papers:
+            compact = {}
+            for key in paper:
+                if key in LAZY_FIELDS:
+                    data = str(paper[key]).encode("utf-8")
+                    f.write(data)
+                    compact[key] = [offset, len(data)]
+                    offset += len(data)
+                else:
+                    compact[key] = paper[key]
+            packed.append(compact)
+        f.flush()
+        os.fsync(f.fileno())
+    return packed
+
+
+def unpack_papers(papers, texts):
+    """Turn papers read with [offset, length] text fields into PaperRecords reading them from texts."""
+    unpacked = []
+    for paper in papers:
+        for key in LAZY_FIELDS:
+            location = paper.get(key)
+            if isinstance(location, list):
+                paper[key] = TextRef(texts, location[0], location[1]) if location[1] else ""
+        unpacked.append(PaperRecord(paper))
+    return unpacked